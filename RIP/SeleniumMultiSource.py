@@ -1,38 +1,68 @@
-from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
-from selenium.webdriver.chrome.options import Options
+import asyncio
 import json
+import threading
 import time
 from datetime import datetime
 import os
 import sys
 
 # Importer la configuration des sources
-from RIP.sourcesConfig import SOURCES, SCRAPING_CONFIG, get_enabled_sources
+from RIP.sourcesConfig import SOURCES, SCRAPING_CONFIG, get_enabled_sources, get_limites_source
+
+# Modules partagés avec le scraper Citya
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Script', 'Selenium'))
+from extractionJS import extraire_via_js, extraire_liens
+from attentePages import AttentePage
+from poolNavigateurs import LimiteurPolitesse
+from profilNavigateur import options_chrome, activer_blocage, CompteurOctets
+from metriquesCrawl import MetriquesCrawl
+from moteurAsync import MoteurCrawl
+from donneesStructurees import champs_structures, lire_payloads_driver
+from statsSelecteurs import StatsSelecteurs, SOURCE_JSON
+from demarrageNavigateur import DemarreurChrome
+from surveillanceNavigateur import SurveillanceNavigateur, nb_navigateurs_auto
+from shardsCrawl import argument_shard
+from fileReessais import FileReessais, Disjoncteur
+from controleurAIMD import ControleurAIMD, diagnostiquer_page, erreur_page, est_congestion
+from corpusHTML import CorpusHTML, ServeurReplay, charger_corpus
+from archiveHTML import ArchiveHTML
 
 
 class MultiSourceScraper:
-    def __init__(self, sources_to_scrape=None):
+    def __init__(self, sources_to_scrape=None, corpus=None, serveur_replay=None, stats_selecteurs=None,
+                 dossier_navigateur=None, shard=None, reessais=None, archive=None):
         """
         Initialiser le scraper multi-sources
         
         Args:
             sources_to_scrape: Liste des sources à scraper (None = toutes les sources activées)
+            corpus: CorpusHTML où enregistrer chaque page visitée
+            serveur_replay: ServeurReplay à interroger à la place des vrais sites
+            stats_selecteurs: StatsSelecteurs pour essayer d'abord les sélecteurs qui marchent le mieux
+            dossier_navigateur: Dossier du chromedriver en cache et des profils Chrome persistants
+            shard: Shard dont ce nœud visite les annonces (None = toutes)
+            reessais: FileReessais où planifier les pages en échec (None = échecs abandonnés)
+            archive: ArchiveHTML où conserver le HTML brut de chaque page, pour ré-extraire hors ligne
         """
-        # Configuration Chrome
-        chrome_options = Options()
-        if SCRAPING_CONFIG['headless']:
-            chrome_options.add_argument('--headless')
-        chrome_options.add_argument('--no-sandbox')
-        chrome_options.add_argument('--disable-dev-shm-usage')
-        chrome_options.add_argument('--disable-blink-features=AutomationControlled')
-        chrome_options.add_argument(f'user-agent={SCRAPING_CONFIG["user_agent"]}')
-        
-        self.driver = webdriver.Chrome(options=chrome_options)
-        self.wait = WebDriverWait(self.driver, SCRAPING_CONFIG['timeout'])
+        self.octets = CompteurOctets(SCRAPING_CONFIG['mode_leger'])
+        self.metriques = MetriquesCrawl('multi_source')
+        self.demarreur = DemarreurChrome(dossier_navigateur, 'multi_source', self.metriques)
+        self.surveillance = SurveillanceNavigateur(
+            SCRAPING_CONFIG['recyclage_pages'], SCRAPING_CONFIG['recyclage_memoire_mo'], metriques=self.metriques
+        )
+        # Navigateur du mode séquentiel, lancé au premier besoin (le moteur asynchrone a les siens)
+        self.driver = None
+        self.stats_selecteurs = stats_selecteurs
+        self.shard = shard
+        self.reessais = reessais
+        self.disjoncteur = Disjoncteur(**SCRAPING_CONFIG['disjoncteur'])
+        # Concurrence et délai de chaque source adaptés à ses réponses (moteur asynchrone)
+        self.controleur = ControleurAIMD(**SCRAPING_CONFIG['aimd']) if SCRAPING_CONFIG['controle_aimd'] else None
+        self.attente = AttentePage(timeout=SCRAPING_CONFIG['timeout'])
+        self.limiteur = LimiteurPolitesse(SCRAPING_CONFIG['download_delay'])
         
         # Déterminer les sources à scraper
         if sources_to_scrape is None:
@@ -40,39 +70,106 @@ class MultiSourceScraper:
         else:
             self.sources = {k: SOURCES[k] for k in sources_to_scrape if k in SOURCES}
         
+        # Enregistrement / rejeu hors ligne
+        self.corpus = corpus
+        self.archive = archive
+        if serveur_replay:
+            self.sources = {
+                k: {**config, 'urls': {t: serveur_replay.url_locale(u) for t, u in config['urls'].items()}}
+                for k, config in self.sources.items()
+            }
+        
         self.annonces = []
         self.stats = {source: {'total': 0, 'success': 0, 'errors': 0} 
                      for source in self.sources.keys()}
+        self._verrou = threading.Lock()
+    
+    def creer_driver(self):
+        """Créer un navigateur Chrome configuré"""
+        chrome_options = options_chrome(
+            SCRAPING_CONFIG['user_agent'],
+            headless=SCRAPING_CONFIG['headless'],
+            leger=SCRAPING_CONFIG['mode_leger']
+        )
+        
+        driver = self.demarreur.demarrer(chrome_options)
+        if SCRAPING_CONFIG['mode_leger']:
+            activer_blocage(
+                driver,
+                SCRAPING_CONFIG['ressources_bloquees'] + SCRAPING_CONFIG['domaines_bloques']
+            )
+        return driver
     
-    def extraire_texte_multi(self, element, selecteurs, source_name=""):
-        """Extraire du texte avec plusieurs sélecteurs"""
+    def navigateur(self):
+        """Navigateur du mode séquentiel, créé à la première page"""
+        if self.driver is None:
+            self.driver = self.creer_driver()
+        return self.driver
+    
+    def extraire_texte_multi(self, element, selecteurs, source_name="", champ=None):
+        """
+        Extraire du texte avec plusieurs sélecteurs
+        
+        Avec un nom de champ, les sélecteurs sont essayés du plus au moins souvent
+        gagnant et le résultat est compté dans les statistiques de sélecteurs.
+        """
+        suivre = self.stats_selecteurs is not None and champ is not None
+        if suivre:
+            selecteurs = self.stats_selecteurs.ordonner(source_name, champ, selecteurs)
         for selecteur in selecteurs:
             try:
                 el = element.find_element(By.CSS_SELECTOR, selecteur)
                 if el and el.text.strip():
+                    if suivre:
+                        self.stats_selecteurs.enregistrer(source_name, champ, selecteur)
                     return el.text.strip()
             except (NoSuchElementException, AttributeError):
                 continue
+        if suivre:
+            self.stats_selecteurs.enregistrer(source_name, champ)
         return None
     
+    def selecteurs_champs(self, source_key, config, champs):
+        """Sélecteurs de chaque champ de la configuration, les plus souvent gagnants en premier"""
+        selecteurs = {champ: config[champ] for champ in champs if champ in config}
+        if self.stats_selecteurs:
+            selecteurs = self.stats_selecteurs.ordonner_tous(source_key, selecteurs)
+        return selecteurs
+    
     def extraire_photos_multi(self, element, selecteurs):
         """Extraire les photos avec plusieurs sélecteurs"""
-        photos = set()
+        sources = []
         for selecteur in selecteurs:
             try:
                 images = element.find_elements(By.CSS_SELECTOR, selecteur)
                 for img in images:
-                    src = img.get_attribute('src')
-                    if src and 'http' in src:
-                        # Filtrer les logos et icônes
-                        if not any(x in src.lower() for x in ['logo', 'icon', 'avatar', 'placeholder']):
-                            photos.add(src)
+                    sources.append(img.get_attribute('src'))
             except:
                 continue
+        return self.filtrer_photos(sources)
+    
+    def filtrer_photos(self, sources):
+        """Garder les vraies photos (pas les logos ni les icônes), sans doublons"""
+        photos = set()
+        for src in sources:
+            if src and 'http' in src:
+                if not any(x in src.lower() for x in ['logo', 'icon', 'avatar', 'placeholder']):
+                    photos.add(src)
         return list(photos)
     
-    def accepter_cookies(self):
+    def enregistrer_page(self, driver, url):
+        """Copier le HTML de la page chargée dans le corpus de rejeu et l'archive"""
+        if not (self.corpus or self.archive):
+            return
+        html = driver.page_source
+        if self.corpus:
+            self.corpus.enregistrer(url, html)
+        if self.archive:
+            self.archive.enregistrer(url, html)
+    
+    def accepter_cookies(self, driver=None):
         """Accepter les cookies si présents"""
+        driver = driver or self.navigateur()
         selecteurs_cookies = [
             'button[id*="accept"]',
             'button[id*="consent"]',
@@ -85,53 +182,83 @@ class MultiSourceScraper:
         
         for selecteur in selecteurs_cookies:
             try:
-                btn = self.driver.find_element(By.CSS_SELECTOR, selecteur)
+                btn = driver.find_element(By.CSS_SELECTOR, selecteur)
                 if btn.is_displayed():
                     btn.click()
-                    time.sleep(1)
+                    self.attente.attendre_disparition(driver, btn)
                     return True
             except:
                 continue
         return False
     
-    def scraper_liste_annonces(self, source_key, url, max_annonces):
-        """Scraper la liste des annonces pour une source"""
+    def scraper_liste_annonces(self, source_key, url, max_annonces, driver=None, limiteur=None):
+        """
+        Scraper la liste des annonces pour une source
+        
+        Args:
+            limiteur: LimiteurPolitesse qui espace les chargements (None sous le moteur
+                asynchrone, dont le seau à jetons espace déjà les requêtes du domaine)
+        """
+        driver = driver or self.navigateur()
         print(f"\n{'='*70}")
         print(f"Source: {SOURCES[source_key]['name']}")
         print(f"URL: {url}")
         print(f"{'='*70}")
         
         try:
-            self.driver.get(url)
-            time.sleep(3)
+            config = SOURCES[source_key]['selectors']['liste']
+            condition_liste = [config['cartes']]
+            mesure = {'navigation': 0.0, 'attente': 0.0, 'extraction': 0.0, 'octets': 0}
+            
+            if limiteur:
+                limiteur.attendre(url)
+            debut = time.monotonic()
+            driver.get(url)
+            mesure['navigation'] = time.monotonic() - debut
+            debut = time.monotonic()
+            self.attente.attendre(driver, 'liste', condition_liste)
+            mesure['attente'] = time.monotonic() - debut
+            self.signaler_page(source_key, driver, mesure['navigation'] + mesure['attente'])
+            mesure['octets'] = self.octets.mesurer(driver)
+            self.enregistrer_page(driver, url)
             
             # Accepter les cookies
-            self.accepter_cookies()
-            time.sleep(1)
+            self.accepter_cookies(driver)
             
             urls_annonces = set()
             page = 1
             max_pages = 5
             
-            config = SOURCES[source_key]['selectors']['liste']
-            
             while page <= max_pages and len(urls_annonces) < max_annonces:
                 print(f"\n  Page {page}...")
+                nb_avant = len(urls_annonces)
+                debut = time.monotonic()
                 
                 # Extraire les liens des annonces
-                for selecteur in config['cartes']:
-                    try:
-                        elements = self.driver.find_elements(By.CSS_SELECTOR, selecteur)
-                        for elem in elements:
-                            href = elem.get_attribute('href')
-                            if href and href.startswith('http'):
-                                urls_annonces.add(href)
-                                if len(urls_annonces) >= max_annonces:
-                                    break
-                    except Exception as e:
-                        continue
+                if SCRAPING_CONFIG['mode_extraction'] == 'js':
+                    # Tous les liens de la page en un seul execute_script
+                    for href in extraire_liens(driver, config['cartes']):
+                        if href.startswith('http') and len(urls_annonces) < max_annonces:
+                            urls_annonces.add(href)
+                else:
+                    for selecteur in config['cartes']:
+                        try:
+                            elements = driver.find_elements(By.CSS_SELECTOR, selecteur)
+                            for elem in elements:
+                                href = elem.get_attribute('href')
+                                if href and href.startswith('http'):
+                                    urls_annonces.add(href)
+                                    if len(urls_annonces) >= max_annonces:
+                                        break
+                        except Exception as e:
+                            continue
                 
                 print(f"    → {len(urls_annonces)} annonces trouvées")
+                mesure['extraction'] = time.monotonic() - debut
+                self.metriques.enregistrer_page(
+                    f"{url}#page={page}", 'liste', source=source_key,
+                    champs=len(urls_annonces) - nb_avant, **mesure
+                )
                 
                 if len(urls_annonces) >= max_annonces:
                     break
@@ -140,12 +267,22 @@ class MultiSourceScraper:
                 next_found = False
                 for selecteur in config['pagination']:
                     try:
-                        next_btn = self.driver.find_element(By.CSS_SELECTOR, selecteur)
+                        next_btn = driver.find_element(By.CSS_SELECTOR, selecteur)
                         if next_btn.is_displayed() and next_btn.is_enabled():
-                            self.driver.execute_script("arguments[0].scrollIntoView();", next_btn)
-                            time.sleep(1)
+                            driver.execute_script("arguments[0].scrollIntoView();", next_btn)
+                            if limiteur:
+                                limiteur.attendre(url)
+                            debut = time.monotonic()
                             next_btn.click()
-                            time.sleep(3)
+                            # La page suivante est prête quand le bouton de l'ancienne est détaché
+                            self.attente.attendre_remplacement(driver, next_btn, 'liste', condition_liste)
+                            mesure = {
+                                'navigation': 0.0,
+                                'attente': time.monotonic() - debut,
+                                'extraction': 0.0,
+                                'octets': self.octets.mesurer(driver),
+                            }
+                            self.enregistrer_page(driver, driver.current_url)
                             next_found = True
                             break
                     except:
@@ -163,14 +300,36 @@ class MultiSourceScraper:
             print(f"  ✗ Erreur lors du scraping de la liste: {e}")
             return []
     
-    def scraper_annonce(self, source_key, url):
-        """Scraper une annonce individuelle"""
+    def scraper_annonce(self, source_key, url, driver=None, tentative=1):
+        """Scraper une annonce individuelle (tentative: numéro de l'essai, pour les métriques)"""
+        driver = driver or self.navigateur()
+        mesure = {'navigation': 0.0, 'attente': 0.0, 'extraction': 0.0, 'octets': 0, 'tentatives': tentative}
+        if not self.disjoncteur.autoriser(source_key):
+            self.reporter(source_key, url)
+            return None
         try:
-            self.driver.get(url)
-            time.sleep(2)
-            
             config = SOURCES[source_key]['selectors']['annonce']
             
+            debut = time.monotonic()
+            driver.get(url)
+            mesure['navigation'] = time.monotonic() - debut
+            
+            debut = time.monotonic()
+            # Après un timeout, la page est extraite quand même; le timeout est compté dans les métriques
+            mesure['timeout_attente'] = not self.attente.attendre(
+                driver, 'annonce',
+                [config[champ] for champ in ('titre', 'prix') if champ in config]
+            )
+            mesure['attente'] = time.monotonic() - debut
+            statut, captcha = self.signaler_page(source_key, driver, mesure['navigation'] + mesure['attente'])
+            mesure['octets'] = self.octets.mesurer(driver)
+            # Page d'erreur ou challenge anti-bot: un échec, pas une annonce vide
+            erreur = erreur_page(statut, captcha)
+            if erreur:
+                raise RuntimeError(erreur)
+            self.enregistrer_page(driver, url)
+            debut = time.monotonic()
+            
             # Données de base
             data = {
                 'source': source_key,
@@ -186,30 +345,116 @@ class MultiSourceScraper:
                 'description', 'reference', 'dpe', 'ges'
             ]
             
-            for champ in champs:
-                if champ in config:
-                    valeur = self.extraire_texte_multi(
-                        self.driver,
-                        config[champ],
-                        source_key
-                    )
-                    if valeur:
-                        data[champ] = valeur
+            # JSON-LD / état d'hydratation d'abord: les sélecteurs ne servent qu'aux champs manquants
+            structure = {}
+            if SOURCES[source_key].get('donnees_structurees', SCRAPING_CONFIG['donnees_structurees']):
+                structure = champs_structures(lire_payloads_driver(driver), url, champs)
+                data.update(structure)
+                if self.stats_selecteurs:
+                    for champ in structure:
+                        self.stats_selecteurs.enregistrer(source_key, champ, SOURCE_JSON)
             
-            # Extraire les photos
-            if 'photos' in config:
-                photos = self.extraire_photos_multi(self.driver, config['photos'])
-                if photos:
-                    data['photos'] = photos
-                    data['nb_photos'] = len(photos)
+            if SCRAPING_CONFIG['mode_extraction'] == 'js':
+                # Tous les champs et les photos en un seul execute_script
+                selecteurs = self.selecteurs_champs(source_key, config, [c for c in champs if c not in structure])
+                resultat = extraire_via_js(
+                    driver,
+                    champs=selecteurs,
+                    attributs={'photos': (config['photos'], 'src')} if 'photos' in config else None,
+                )
+                data.update(resultat['champs'])
+                if self.stats_selecteurs:
+                    for champ in selecteurs:
+                        self.stats_selecteurs.enregistrer(source_key, champ, resultat['selecteurs'].get(champ))
+                photos = self.filtrer_photos(resultat['attributs'].get('photos', []))
+            else:
+                for champ in champs:
+                    if champ in config and champ not in structure:
+                        valeur = self.extraire_texte_multi(
+                            driver,
+                            config[champ],
+                            source_key,
+                            champ=champ
+                        )
+                        if valeur:
+                            data[champ] = valeur
+                
+                photos = []
+                if 'photos' in config:
+                    photos = self.extraire_photos_multi(driver, config['photos'])
             
-            self.stats[source_key]['success'] += 1
+            # Photos
+            if photos:
+                data['photos'] = photos
+                data['nb_photos'] = len(photos)
+            mesure['extraction'] = time.monotonic() - debut
+            
+            self.metriques.enregistrer_page(
+                url, 'annonce', source=source_key, champs=len(data) - 4, **mesure
+            )
+            with self._verrou:
+                self.stats[source_key]['success'] += 1
+            self.disjoncteur.enregistrer(source_key, True)
+            if self.reessais:
+                self.reessais.succes(url)
             return data
             
         except Exception as e:
+            self.metriques.enregistrer_page(url, 'annonce', source=source_key, succes=False, **mesure)
+            self.disjoncteur.enregistrer(source_key, False)
+            if self.controleur and isinstance(e, TimeoutException):
+                self.controleur.signaler(source_key, mesure['navigation'] + mesure['attente'], congestion=True)
+            if self.reessais:
+                self.reessais.echec(url, source_key, e)
             print(f"    ✗ Erreur: {str(e)[:50]}")
-            self.stats[source_key]['errors'] += 1
+            with self._verrou:
+                self.stats[source_key]['errors'] += 1
+            return None
+    
+    def signaler_page(self, source_key, driver, latence):
+        """
+        Transmettre au contrôleur AIMD la latence de la page et les signes de blocage (429/5xx, captcha)
+
+        Returns:
+            (statut HTTP ou None, True si la page est un challenge anti-bot)
+        """
+        statut, captcha = diagnostiquer_page(driver)
+        if self.controleur:
+            self.controleur.signaler(source_key, latence, est_congestion(statut, captcha))
+        return statut, captcha
+    
+    def reporter(self, source_key, url):
+        """Remettre une annonce dans la file tant que sa source est suspendue"""
+        if self.reessais:
+            self.reessais.reporter(url, source_key, self.disjoncteur.attente(source_key))
+    
+    def attente_reessais(self, source_key, attente_max=SCRAPING_CONFIG['retry_attente_max']):
+        """Secondes avant les prochains réessais de la source, None s'il n'y a rien à réessayer dans ce run"""
+        if not self.reessais:
+            return None
+        attente = self.reessais.attente_prochain(source_key)
+        if attente is None:
+            return None
+        attente = max(attente, self.disjoncteur.attente(source_key))
+        if attente > attente_max:
+            print(f"  🔁 {source_key}: réessais restants laissés au run suivant")
             return None
+        return attente
+    
+    def reessayer_source(self, source_key):
+        """Réessayer les annonces en échec de la source (de ce run ou des précédents)"""
+        while True:
+            attente = self.attente_reessais(source_key)
+            if attente is None:
+                return
+            time.sleep(attente)
+            urls = self.reessais.prets(source_key)
+            print(f"\n  🔁 {source_key}: {len(urls)} annonces réessayées")
+            for url_annonce, tentative in urls.items():
+                self.limiteur.attendre(url_annonce)
+                annonce = self.scraper_annonce(source_key, url_annonce, tentative=tentative)
+                if annonce:
+                    self.annonces.append(annonce)
     
     def scraper_source(self, source_key, transaction_type='vente', max_annonces=5):
         """Scraper une source complète"""
@@ -226,7 +471,9 @@ class MultiSourceScraper:
         url = source_config['urls'][transaction_type]
         
         # 1. Récupérer les URLs des annonces
-        urls_annonces = self.scraper_liste_annonces(source_key, url, max_annonces)
+        urls_annonces = self.filtrer_shard(
+            self.scraper_liste_annonces(source_key, url, max_annonces, limiteur=self.limiteur)
+        )
         
         if not urls_annonces:
             print(f"  ✗ Aucune annonce trouvée")
@@ -239,14 +486,17 @@ class MultiSourceScraper:
         for i, url_annonce in enumerate(urls_annonces, 1):
             print(f"    [{i}/{len(urls_annonces)}] {url_annonce[:60]}...", end=" ")
             
+            self.limiteur.attendre(url_annonce)
+            self.driver = self.surveillance.verifier(self.navigateur(), self.creer_driver)
             annonce = self.scraper_annonce(source_key, url_annonce)
             if annonce:
                 self.annonces.append(annonce)
                 print("✓")
             else:
                 print("✗")
-            
-            time.sleep(SCRAPING_CONFIG['download_delay'])
+        
+        # 3. Réessayer les échecs dont l'heure est venue
+        self.reessayer_source(source_key)
     
     def scraper_toutes_sources(self, transaction_type='vente', max_annonces_par_source=30):
         """Scraper toutes les sources configurées"""
@@ -272,6 +522,98 @@ class MultiSourceScraper:
         
         self.afficher_statistiques(duree)
     
+    def scraper_toutes_sources_async(self, transaction_type='vente', max_annonces_par_source=30):
+        """Scraper toutes les sources en même temps, chaque site gardant son propre rythme"""
+        print("\n" + "╔" + "="*78 + "╗")
+        print("║" + " "*14 + "SCRAPING MULTI-SOURCES (ASYNCHRONE)" + " "*29 + "║")
+        print("╚" + "="*78 + "╝")
+        
+        print(f"\nType de transaction: {transaction_type}")
+        print(f"Sources à scraper: {len(self.sources)}")
+        print(f"Max annonces par source: {max_annonces_par_source}")
+        
+        debut = datetime.now()
+        asyncio.run(self.crawler_sources(transaction_type, max_annonces_par_source))
+        duree = (datetime.now() - debut).total_seconds()
+        
+        self.afficher_statistiques(duree)
+    
+    async def crawler_sources(self, transaction_type, max_annonces):
+        """Lancer une tâche par source; le moteur répartit les chargements par domaine"""
+        moteur = MoteurCrawl(self.creer_driver, surveillance=self.surveillance, controleur=self.controleur)
+        limites = {source_key: get_limites_source(source_key) for source_key in self.sources}
+        
+        # Un navigateur par requête simultanée: réduire chaque domaine si la mémoire manque
+        demandes = sum(l['concurrent_requests'] for l in limites.values())
+        possibles = nb_navigateurs_auto(demandes)
+        # Avec le contrôle AIMD, chaque source peut monter jusqu'au double de sa valeur de départ
+        plafond = nb_navigateurs_auto(2 * demandes) if self.controleur else possibles
+        for source_key, l in limites.items():
+            concurrence = max(1, l['concurrent_requests'] * possibles // demandes)
+            concurrence_max = max(concurrence, l['concurrent_requests'] * plafond // demandes)
+            moteur.ajouter_domaine(source_key, concurrence, l['download_delay'], concurrence_max)
+        
+        try:
+            resultats = await asyncio.gather(
+                *(self.crawler_source(moteur, source_key, transaction_type, max_annonces) for source_key in self.sources),
+                return_exceptions=True
+            )
+            for source_key, resultat in zip(self.sources, resultats):
+                if isinstance(resultat, Exception):
+                    print(f"\n✗ Erreur critique pour {source_key}: {resultat}")
+            moteur.afficher_resume()
+            if self.controleur:
+                self.controleur.afficher()
+                self.controleur.exporter(self.metriques)
+        finally:
+            moteur.fermer()
+    
+    async def crawler_source(self, moteur, source_key, transaction_type, max_annonces):
+        """Pagination puis pages de détail d'une source, en parallèle dans la limite du domaine"""
+        source_config = self.sources[source_key]
+        if transaction_type not in source_config['urls']:
+            print(f"✗ Type de transaction '{transaction_type}' non disponible pour {source_key}")
+            return
+        
+        url = source_config['urls'][transaction_type]
+        urls_annonces = await moteur.executer(
+            source_key,
+            lambda driver: self.scraper_liste_annonces(source_key, url, max_annonces, driver=driver)
+        )
+        urls_annonces = self.filtrer_shard(urls_annonces)
+        if not urls_annonces:
+            print(f"  ✗ {source_key}: aucune annonce trouvée")
+            return
+        
+        print(f"\n  {source_key}: scraping de {len(urls_annonces)} annonces...")
+        self.stats[source_key]['total'] = len(urls_annonces)
+        
+        async def scraper_une(url_annonce, tentative=1):
+            if self.disjoncteur.etat(source_key) == 'ouvert':
+                # Source suspendue: l'annonce attend dans la file, le navigateur reste libre
+                self.reporter(source_key, url_annonce)
+                return
+            annonce = await moteur.executer(
+                source_key,
+                lambda driver: self.scraper_annonce(source_key, url_annonce, driver=driver, tentative=tentative)
+            )
+            print(f"    [{source_key}] {url_annonce[:60]}... {'✓' if annonce else '✗'}")
+            if annonce:
+                with self._verrou:
+                    self.annonces.append(annonce)
+        
+        await asyncio.gather(*(scraper_une(url_annonce) for url_annonce in urls_annonces))
+        
+        # Réessais des échecs dont l'heure est venue, sans bloquer les autres sources
+        while True:
+            attente = self.attente_reessais(source_key)
+            if attente is None:
+                break
+            await asyncio.sleep(attente)
+            urls = self.reessais.prets(source_key)
+            print(f"\n  🔁 {source_key}: {len(urls)} annonces réessayées")
+            await asyncio.gather(*(scraper_une(url_annonce, tentative) for url_annonce, tentative in urls.items()))
+    
     def afficher_statistiques(self, duree):
         """Afficher les statistiques du scraping"""
         print("\n" + "="*70)
@@ -295,11 +637,23 @@ class MultiSourceScraper:
                       f"{stats['success']:<10} "
                       f"{stats['errors']:<10} "
                       f"{taux:.1f}%")
+        
+        self.attente.afficher_resume()
+        self.octets.afficher()
+    
+    def filtrer_shard(self, urls_annonces):
+        """Annonces qui reviennent à ce nœud quand le crawl est découpé en shards"""
+        if not self.shard or not urls_annonces:
+            return urls_annonces
+        urls_shard = self.shard.filtrer(urls_annonces)
+        print(f"  🧩 Shard {self.shard}: {len(urls_shard)}/{len(urls_annonces)} annonces")
+        return urls_shard
     
     def sauvegarder_json(self, nom_fichier=None):
         """Sauvegarder les données en JSON"""
         if nom_fichier is None:
-            nom_fichier = f"./PIPELINE_IMMO/Data_Immo/Data_Init/multi_source_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+            suffixe = f"_{self.shard.suffixe}" if self.shard else ''
+            nom_fichier = f"./PIPELINE_IMMO/Data_Immo/Data_Init/multi_source_{datetime.now().strftime('%Y%m%d_%H%M%S')}{suffixe}.json"
         
         # Créer le dossier si nécessaire
         os.makedirs(os.path.dirname(nom_fichier), exist_ok=True)
@@ -311,6 +665,7 @@ class MultiSourceScraper:
                 'nombre_annonces': len(self.annonces),
                 'sources': list(self.sources.keys()),
                 'statistiques': self.stats,
+                'shard': str(self.shard) if self.shard else None,
             },
             'annonces': self.annonces
         }
@@ -321,9 +676,25 @@ class MultiSourceScraper:
         print(f"\n✓ Données sauvegardées: {nom_fichier}")
         print(f"  Taille: {os.path.getsize(nom_fichier)/1024:.2f} KB")
     
+    def exporter_metriques(self, prefixe=None):
+        """Exporter les métriques du run en JSON et au format Prometheus"""
+        if prefixe is None:
+            prefixe = f"./PIPELINE_IMMO/Data_Immo/Data_Init/multi_source_metriques_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        
+        self.metriques.exporter_json(f"{prefixe}.json")
+        self.metriques.exporter_prometheus(f"{prefixe}.prom")
+        print(f"\n✓ Métriques exportées: {prefixe}.json / {prefixe}.prom")
+    
     def fermer(self):
         """Fermer le navigateur"""
-        self.driver.quit()
+        if self.driver is not None:
+            self.driver.quit()
+        if self.corpus:
+            self.corpus.fermer()
+        if self.archive:
+            self.archive.exporter(self.metriques)
+            self.archive.afficher()
+            self.archive.fermer()
 
 if __name__ == '__main__':
     import argparse
@@ -356,14 +727,74 @@ if __name__ == '__main__':
         help='Nom du fichier de sortie JSON'
     )
     
+    parser.add_argument(
+        '--record',
+        metavar='CORPUS',
+        help='Enregistrer chaque page visitée dans un corpus (.jsonl.gz)'
+    )
+    
+    parser.add_argument(
+        '--replay',
+        metavar='CORPUS',
+        help='Rejouer un corpus enregistré depuis un serveur local, sans réseau'
+    )
+    
+    parser.add_argument(
+        '--archive',
+        metavar='DOSSIER',
+        default=os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Script', 'Selenium', 'archive_html'),
+        help="Archive du HTML brut des pages, partagée avec le scraper Citya (défaut: Script/Selenium/archive_html/, "
+             "désactivée en rejeu)"
+    )
+    
+    parser.add_argument(
+        '--sequentiel',
+        action='store_true',
+        help='Scraper les sources l\'une après l\'autre au lieu du moteur asynchrone'
+    )
+    
+    parser.add_argument(
+        '--shard',
+        type=argument_shard,
+        metavar='i/N',
+        help='Ne visiter que la part i (0 à N-1) des annonces; fusionner ensuite avec Script/Selenium/shardsCrawl.py'
+    )
+    
     args = parser.parse_args()
+    if args.shard and args.output:
+        args.output = f"{os.path.splitext(args.output)[0]}_{args.shard.suffixe}.json"
+    
+    serveur = ServeurReplay(charger_corpus(args.replay)).demarrer() if args.replay else None
+    
+    dossier = os.path.dirname(os.path.abspath(__file__))
+    prefixe = 'replay_multi_source' if serveur else 'multi_source'
+    
+    # Sélecteurs gagnants par (source, champ), conservés entre les runs
+    stats_selecteurs = StatsSelecteurs(os.path.join(dossier, f'{prefixe}_selecteurs.json'))
+    
+    # Annonces en échec réessayées plus tard dans le run ou au run suivant (une file par shard)
+    reessais = FileReessais(
+        os.path.join(dossier, f"{prefixe}{'_' + args.shard.suffixe if args.shard else ''}_reessais.sqlite"),
+        max_tentatives=SCRAPING_CONFIG['retry_times'],
+        delai_base=SCRAPING_CONFIG['retry_delai_base']
+    )
     
     # Créer le scraper
-    scraper = MultiSourceScraper(sources_to_scrape=args.sources)
+    scraper = MultiSourceScraper(
+        sources_to_scrape=args.sources,
+        corpus=CorpusHTML(args.record) if args.record else None,
+        serveur_replay=serveur,
+        stats_selecteurs=stats_selecteurs,
+        dossier_navigateur=os.path.join(dossier, '.navigateur'),
+        shard=args.shard,
+        reessais=reessais,
+        archive=ArchiveHTML(args.archive) if not serveur else None
+    )
     
     try:
-        # Scraper toutes les sources
-        scraper.scraper_toutes_sources(
+        # Scraper toutes les sources (en parallèle par défaut, chaque site à son rythme)
+        scraper_sources = scraper.scraper_toutes_sources if args.sequentiel else scraper.scraper_toutes_sources_async
+        scraper_sources(
             transaction_type=args.transaction,
             max_annonces_par_source=args.max_annonces
         )
@@ -380,4 +811,15 @@ if __name__ == '__main__':
         import traceback
         traceback.print_exc()
     finally:
-        scraper.fermer()
\ No newline at end of file
+        scraper.fermer()
+        if serveur:
+            serveur.arreter()
+        reessais.afficher()
+        reessais.fermer()
+        scraper.metriques.definir('disjoncteur_ouvertures', scraper.disjoncteur.nb_ouvertures())
+        scraper.metriques.afficher_resume()
+        scraper.exporter_metriques(
+            os.path.splitext(args.output)[0] + '_metriques' if args.output else None
+        )
+        stats_selecteurs.afficher_rapport()
+        stats_selecteurs.sauvegarder()
\ No newline at end of file
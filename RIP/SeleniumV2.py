@@ -1,12 +1,25 @@
 from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
-import time
 import json
+import os
+import sys
 from datetime import datetime
 
+# Modules partagés avec le scraper Citya
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Script', 'Selenium'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from RIP.sourcesConfig import SOURCES
+from attentePages import AttentePage
+from poolNavigateurs import LimiteurPolitesse
+from paginationListe import lire_pagination, SuiviPagination
+
+# La page est prête dès qu'une carte d'annonce est présente
+ATTENTE = AttentePage(conditions={
+    'liste': [['[class*="annonce"]', '[class*="card"]', 'article']],
+})
+# Pause entre deux pages pour éviter d'être bloqué
+LIMITEUR = LimiteurPolitesse(2)
+
 def initialiser_driver():
     """Initialise le driver Chrome avec les options appropriées"""
     options = webdriver.ChromeOptions()
@@ -130,15 +143,11 @@ def page_contient_annonces(driver):
 def scraper_page(driver, url_page):
     """Scrape une page d'annonces"""
     print(f"\n🔍 Scraping de : {url_page}")
+    LIMITEUR.attendre(url_page)
     driver.get(url_page)
     
     # Attendre le chargement des annonces
-    try:
-        WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, '[class*="annonce"], [class*="card"], article'))
-        )
-        time.sleep(2)  # Attente supplémentaire pour le JS
-    except TimeoutException:
+    if not ATTENTE.attendre(driver, 'liste'):
         print("⚠️ Timeout - Les annonces n'ont pas chargé")
         return []
     
@@ -186,6 +195,10 @@ def scraper_avec_pagination_auto(url_base, max_pages=50):
     toutes_annonces = []
     pages_vides_consecutives = 0
     max_pages_vides = 3  # Arrêter après 3 pages vides consécutives
+    # Plage exacte de pages lue sur la première page (nombre de résultats, dernier numéro, lien "suivant")
+    suivi = SuiviPagination(max_pages)
+    # URLs déjà vues, pour savoir si une page apporte encore des annonces
+    urls_vues = set()
     
     try:
         for page_num in range(1, max_pages + 1):
@@ -214,9 +227,14 @@ def scraper_avec_pagination_auto(url_base, max_pages=50):
                 pages_vides_consecutives = 0  # Réinitialiser le compteur
                 toutes_annonces.extend(annonces)
                 print(f"\n📊 Total cumulé : {len(toutes_annonces)} annonces")
+            nouvelles = {annonce['url'] for annonce in annonces} - urls_vues
+            urls_vues.update(nouvelles)
             
-            # Pause pour éviter d'être bloqué
-            time.sleep(2)
+            info = lire_pagination(driver, SOURCES['citya']['selectors']['liste']['pagination'])
+            suivi.mettre_a_jour(info, len(annonces))
+            if suivi.est_derniere(info, page_num, len(nouvelles)):
+                print(f"\n🏁 Dernière page atteinte ({page_num}), fin du scraping")
+                break
         
         if page_num >= max_pages:
             print(f"\n🛑 Limite de {max_pages} pages atteinte")
@@ -229,6 +247,7 @@ def scraper_avec_pagination_auto(url_base, max_pages=50):
         traceback.print_exc()
     finally:
         driver.quit()
+        ATTENTE.afficher_resume()
     
     return toutes_annonces
 
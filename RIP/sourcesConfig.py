@@ -215,6 +215,15 @@ def get_source_config(source_name):
     return SOURCES.get(source_name)
 
 
+def get_limites_source(source_name):
+    """Concurrence et délai entre requêtes d'une source (réglages globaux sauf surcharge dans SOURCES)"""
+    source = SOURCES.get(source_name, {})
+    return {
+        'concurrent_requests': source.get('concurrent_requests', SCRAPING_CONFIG['concurrent_requests']),
+        'download_delay': source.get('download_delay', SCRAPING_CONFIG['download_delay']),
+    }
+
+
 def get_all_urls(transaction_type='vente'):
     """Obtenir toutes les URLs pour un type de transaction"""
     urls = {}
@@ -250,6 +259,49 @@ SCRAPING_CONFIG = {
     'timeout': 10,
     'headless': True,  # Pour Selenium
     'retry_times': 3,
+    'mode_extraction': 'js',  # 'js' = un seul execute_script par page, 'selenium' = un find_element par sélecteur
+    'donnees_structurees': True,  # JSON-LD / état d'hydratation d'abord, sélecteurs pour les champs manquants
+    # URLs des appels d'API dont les réponses JSON sont capturées (--capture-xhr)
+    'motifs_xhr': [r'/api/', r'[/?&](search|recherche)', r'annonces.*\.json'],
+    # Navigateur remplacé par un neuf (mêmes cookies) après N pages ou au-delà de cette mémoire
+    'recyclage_pages': 200,
+    'recyclage_memoire_mo': 1500,
+    # Réessais des pages en échec: délai doublé à chaque échec (retry_times réessais au plus),
+    # attente max en fin de section avant de laisser les pages restantes au run suivant
+    'retry_delai_base': 30,
+    'retry_attente_max': 120,
+    # Source suspendue quand la moitié de ses 20 dernières pages ont échoué
+    'disjoncteur': {'seuil': 0.5, 'fenetre': 20, 'min_requetes': 5, 'pause': 300},
+    # Politique par défaut: concurrence et délai adaptés à chaque domaine (AIMD), en partant de
+    # concurrent_requests / download_delay; False = valeurs fixes
+    'controle_aimd': True,
+    'aimd': {'delai_min': 0.5, 'delai_max': 30.0, 'latence_cible': 4.0, 'facteur': 0.5, 'pas_delai': 0.1},
+    # Vérification de disponibilité des annonces connues (verificationAnnonces.py): requêtes HEAD
+    # simultanées au total et par hôte
+    'verification': {'workers': 32, 'par_hote': 8, 'timeout': 10},
+    
+    # Profil navigateur léger: pas d'images, polices, médias ni traqueurs
+    'mode_leger': True,
+    'ressources_bloquees': [
+        '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.avif', '*.svg', '*.ico',
+        '*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot',
+        '*.mp4', '*.webm', '*.mp3', '*.ogg',
+    ],
+    'domaines_bloques': [
+        '*googletagmanager.com*',
+        '*google-analytics.com*',
+        '*doubleclick.net*',
+        '*googlesyndication.com*',
+        '*facebook.net*',
+        '*connect.facebook.com*',
+        '*hotjar.com*',
+        '*criteo.com*',
+        '*criteo.net*',
+        '*taboola.com*',
+        '*outbrain.com*',
+        '*tiktok.com*',
+        '*bing.com*',
+    ],
 }
 
 
@@ -3,6 +3,7 @@ import pandas as pd
 import numpy as np
 import json
 import re
+import sys
 from pathlib import Path
 from datetime import datetime
 import warnings
@@ -11,28 +12,46 @@ warnings.filterwarnings('ignore')
 RAW_DIR = Path(__file__).resolve().parents[2] / "Script" / "Selenium"
 PROCESSED_DIR = Path(__file__).resolve().parents[2] / "Data_Cleaner"
 PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
-INPUT_FILE = RAW_DIR / "citya_annonces.json"
+# Flux JSONL du scraper s'il existe, sinon l'ancien export JSON
+INPUT_FILE = RAW_DIR / "citya_annonces.jsonl"
+if not INPUT_FILE.exists():
+    INPUT_FILE = RAW_DIR / "citya_annonces.json"
 OUTPUT_FILE = PROCESSED_DIR / "citya_immobilier_clean.csv"
+# État du crawl: annonces marquées retirées ou redirigées par verificationAnnonces.py
+ETAT_FILE = RAW_DIR / "citya_etat.sqlite"
+
+sys.path.insert(0, str(RAW_DIR))
+from etatCrawl import EtatCrawl, cle_annonce
+from sortieJSONL import lire_jsonl
 
 
 class CityaDataCleaner:
-    def __init__(self, json_file):
-        """Initialiser avec le fichier JSON"""
+    def __init__(self, json_file, etat_file=None):
+        """Initialiser avec le fichier JSON (et l'état du crawl pour écarter les annonces retirées)"""
         self.json_file = json_file
+        self.etat_file = etat_file
         self.df = None
         self.df_clean = None
         
     def charger_donnees(self):
-        """Charger le fichier JSON"""
+        """Charger le fichier JSON ou JSONL"""
         print("=" * 60)
         print("CHARGEMENT DES DONNÉES")
         print("=" * 60)
         
         try:
-            with open(self.json_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            if str(self.json_file).endswith('.jsonl'):
+                # Flux du scraper, une annonce par ligne
+                data = list(lire_jsonl(self.json_file))
+            else:
+                with open(self.json_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
             
             self.df = pd.DataFrame(data)
+            # Une reprise (--resume) peut réécrire une annonce déjà présente
+            if 'url' in self.df.columns:
+                self.df = self.df.drop_duplicates(subset='url', keep='last').reset_index(drop=True)
+            self.retirer_annonces_indisponibles()
             print(f"✓ {len(self.df)} annonces chargées")
             print(f"✓ {len(self.df.columns)} colonnes trouvées")
             print(f"\nColonnes disponibles: {', '.join(self.df.columns)}")
@@ -45,6 +64,20 @@ class CityaDataCleaner:
             print(f"✗ Erreur de lecture du fichier JSON!")
             return False
     
+    def retirer_annonces_indisponibles(self):
+        """Écarter les annonces que la vérification de disponibilité a trouvées retirées ou redirigées"""
+        if not self.etat_file or not Path(self.etat_file).exists() or 'url' not in self.df.columns:
+            return
+        etat = EtatCrawl(str(self.etat_file))
+        try:
+            indisponibles = etat.annonces_indisponibles()
+        finally:
+            etat.fermer()
+        masque = self.df['url'].map(lambda url: cle_annonce(url) in indisponibles)
+        if masque.any():
+            print(f"✓ {masque.sum()} annonces retirées ou redirigées écartées")
+            self.df = self.df[~masque].reset_index(drop=True)
+    
     def afficher_statistiques_initiales(self):
         """Afficher les statistiques avant nettoyage"""
         print("\n" + "=" * 60)
@@ -521,7 +554,7 @@ if __name__ == '__main__':
     FICHIER_JSON = INPUT_FILE 
     FICHIER_CSV_SORTIE = OUTPUT_FILE
     # Créer l'instance du cleaner
-    cleaner = CityaDataCleaner(FICHIER_JSON)
+    cleaner = CityaDataCleaner(FICHIER_JSON, ETAT_FILE)
     
     # Exécuter le pipeline complet
     succes = cleaner.executer_pipeline_complet(FICHIER_CSV_SORTIE)
@@ -1,28 +1,266 @@
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
-from selenium.webdriver.chrome.options import Options
 import json
+import os
+import sys
+import threading
 import time
 from datetime import datetime
+from urllib.parse import urlparse
+
+# Configuration partagée avec le scraper multi-sources
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from RIP.sourcesConfig import SCRAPING_CONFIG, SOURCES
+
+from poolNavigateurs import PoolNavigateurs, LimiteurPolitesse
+from extractionJS import extraire_via_js, extraire_liens, extraire_cartes
+from attentePages import AttentePage
+from fetcherHTTP import FetcherHTTP, extraire_champs_html
+from etatCrawl import EtatCrawl
+from sortieJSONL import EcrivainJSONL, Checkpoint
+from profilNavigateur import options_chrome, activer_blocage, CompteurOctets
+from metriquesCrawl import MetriquesCrawl
+from donneesStructurees import champs_structures, lire_payloads_driver, lire_payloads_html
+from statsSelecteurs import StatsSelecteurs, SOURCE_JSON
+from demarrageNavigateur import DemarreurChrome
+from surveillanceNavigateur import SurveillanceNavigateur, nb_navigateurs_auto
+from shardsCrawl import argument_shard
+from fileReessais import FileReessais, Disjoncteur
+from controleurAIMD import ControleurAIMD, diagnostiquer_page, erreur_page, est_congestion
+from captureXHR import CaptureXHR, activer_journal_reseau
+from paginationListe import lire_pagination, SuiviPagination
+from corpusHTML import CorpusHTML, ServeurReplay, charger_corpus
+from archiveHTML import ArchiveHTML
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+
+# Sélecteurs possibles pour chaque champ d'une annonce
+SELECTEURS_ANNONCE = {
+    'titre': ['h1', '.property-title', '[class*="Title"]', 'header h1'],
+    'prix': ['.price', '[class*="Price"]', '[class*="prix"]', 'span[class*="amount"]'],
+    'type_bien': ['.property-type', '[class*="Type"]', '[class*="category"]'],
+    'surface': ['[class*="surface"]', '[class*="area"]', '[class*="size"]'],
+    'pieces': ['[class*="room"]', '[class*="piece"]', '[data-testid*="room"]'],
+    'chambres': ['[class*="bedroom"]', '[class*="chambre"]'],
+    'ville': ['.city', '[class*="City"]', '[class*="ville"]', '.location'],
+    'code_postal': ['[class*="postal"]', '[class*="zip"]', '.zipcode'],
+    'description': ['.description', '[class*="Description"]', 'article p', '.details'],
+    'reference': ['[class*="ref"]', '.reference', '[class*="Reference"]'],
+    'dpe': ['[class*="dpe"]', '[class*="energy"]', '.energy-class'],
+    'ges': ['[class*="ges"]', '[class*="emission"]', '.emission-class'],
+    'etage': ['[class*="floor"]', '[class*="etage"]'],
+    'ascenseur': ['[class*="elevator"]', '[class*="ascenseur"]'],
+    'balcon': ['[class*="balcon"]', '[class*="balcony"]'],
+    'parking': ['[class*="parking"]', '[class*="garage"]'],
+    'annee_construction': ['[class*="year"]', '[class*="annee"]', '[class*="construction"]'],
+}
+
+# Caractéristiques sous forme de liste
+SELECTEURS_CARACTERISTIQUES = [
+    '.features li',
+    '.caracteristiques li',
+    '[class*="feature"] li',
+    'ul[class*="amenities"] li',
+    '.details li'
+]
+
+# Loyer (location) et charges
+SELECTEURS_COMPLEMENTS = {
+    'loyer': ['[class*="rent"], [class*="loyer"]'],
+    'charges': ['[class*="charges"], [class*="fees"]'],
+}
+
+# Liens vers les annonces sur les pages de liste
+SELECTEURS_LIENS = [
+    'a[href*="/annonces/vente/"]',
+    'a[href*="/annonces/location/"]',
+    'a[href*="/annonce/"]',
+    'a[href*="/bien/"]',
+    '.property-card a',
+    '.listing-card a',
+    'article a',
+    '[class*="Card"] a[href*="/"]'
+]
+MOTIFS_LIENS_INCLUS = ['/annonces/', '/annonce/', '/bien/', '/vente/', '/location/']
+MOTIFS_LIENS_EXCLUS = ['#', 'javascript:', 'mailto:', 'tel:', '?page=']
+
+
+def est_lien_annonce(href):
+    """Mêmes filtres que les liens du DOM (extraire_liens): lien Citya vers une annonce"""
+    return (bool(href) and 'citya.com' in href
+            and any(x in href for x in MOTIFS_LIENS_INCLUS)
+            and not any(x in href for x in MOTIFS_LIENS_EXCLUS))
+
+
+# Champs d'une annonce, cherchés d'abord dans les données structurées de la page
+CHAMPS_ANNONCE = set(SELECTEURS_ANNONCE) | set(SELECTEURS_COMPLEMENTS)
+# Cartes des pages de liste et champs lisibles sans ouvrir l'annonce (cf. RIP/SeleniumV2.extraire_annonce)
+SELECTEURS_CARTES = [
+    '[class*="annonce"]',
+    '[class*="card"]',
+    '[class*="Card"]',
+    'article',
+    '[class*="listing-item"]',
+    '[class*="property"]',
+]
+CHAMPS_CARTE = {
+    'titre': ['h3', 'h2', '.title', '[class*="titre"]'],
+    'prix': ['[class*="price"]', '[class*="prix"]'],
+    'ville': ['[class*="city"]', '[class*="ville"]', '[class*="location"]'],
+    'ges': ['[class*="ges"]', '[class*="dpe"]'],
+    'charges': ['[class*="charge"]', '[class*="mensualite"]'],
+}
+# Liens "page suivante", partagés avec le scraper multi-sources
+SELECTEURS_PAGINATION = SOURCES['citya']['selectors']['liste']['pagination']
 
 class CityaScraper:
-    def __init__(self, headless=True):
-        # Configuration Chrome
-        chrome_options = Options()
-        if headless:
-            chrome_options.add_argument('--headless')
-        chrome_options.add_argument('--no-sandbox')
-        chrome_options.add_argument('--disable-dev-shm-usage')
-        chrome_options.add_argument('--disable-blink-features=AutomationControlled')
-        chrome_options.add_argument('user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36')
-        
-        self.driver = webdriver.Chrome(options=chrome_options)
+    def __init__(self, headless=True, nb_workers=1, delai_politesse=2, mode_extraction='js', timeout_attente=10,
+                 http_first=True, champs_requis=('titre', 'prix'), etat=None, fraction_rafraichissement=0.1,
+                 sortie=None, checkpoint=None, reprise=False, leger=SCRAPING_CONFIG['mode_leger'],
+                 pipeline=True, taille_file_pipeline=20, corpus=None, mode='details',
+                 donnees_structurees=SCRAPING_CONFIG['donnees_structurees'], capture_xhr=False,
+                 stats_selecteurs=None, dossier_navigateur=None, shard=None, reessais=None,
+                 controle_aimd=SCRAPING_CONFIG['controle_aimd'], archive=None):
+        """
+        Args:
+            headless: Lancer Chrome sans interface
+            nb_workers: Nombre de navigateurs pour les pages de détail (1 = séquentiel)
+            delai_politesse: Délai minimum entre deux requêtes vers le même hôte, tous workers confondus
+            mode_extraction: 'js' (un seul execute_script par page) ou 'selenium' (un find_element par sélecteur)
+            timeout_attente: Attente maximale pour qu'une page soit prête (secondes)
+            http_first: Essayer d'abord une simple requête HTTP + lxml, le navigateur ne sert qu'en repli
+            champs_requis: Champs qui doivent être trouvés en HTTP pour ne pas passer par le navigateur
+            etat: EtatCrawl pour ne revisiter que les nouvelles annonces (None = tout scraper)
+            fraction_rafraichissement: Part des annonces déjà connues revisitées à chaque run
+            sortie: EcrivainJSONL pour écrire chaque annonce dès son extraction (None = tout garder en mémoire)
+            checkpoint: Checkpoint où enregistrer la position du crawl
+            reprise: Reprendre depuis le checkpoint existant au lieu de repartir de zéro
+            leger: Bloquer images, polices, médias et traqueurs (listes dans SCRAPING_CONFIG)
+            pipeline: Scraper les pages de détail pendant la pagination au lieu d'attendre sa fin
+            taille_file_pipeline: Nombre max d'URLs en attente entre la pagination et les workers
+            corpus: CorpusHTML où enregistrer chaque page visitée, pour la rejouer hors ligne
+            mode: 'details' (chaque page d'annonce), 'cards' (seulement les cartes des pages de liste)
+                ou 'hybrid' (page d'annonce seulement si l'annonce est nouvelle ou sa carte a changé)
+            donnees_structurees: Lire d'abord le JSON-LD / l'état d'hydratation de la page,
+                les sélecteurs CSS ne servant qu'aux champs manquants
+            capture_xhr: Lire les annonces dans les réponses JSON des appels d'API des pages de liste
+                (URLs selon SCRAPING_CONFIG['motifs_xhr']); avec mode='cards', aucune page de détail
+            stats_selecteurs: StatsSelecteurs pour compter le sélecteur gagnant de chaque champ
+                et essayer d'abord les meilleurs (None = ordre de la configuration)
+            dossier_navigateur: Dossier du chromedriver en cache et des profils Chrome persistants
+                (cookies de consentement, cache HTTP); None = profils jetables
+            shard: Shard dont ce nœud visite les annonces (None = toutes); la pagination reste complète
+            reessais: FileReessais où planifier les pages en échec (None = échecs abandonnés)
+            controle_aimd: Adapter le délai de politesse et le nombre de workers actifs à la latence
+                et aux erreurs du site (delai_politesse et nb_workers deviennent départ et plafond)
+            archive: ArchiveHTML où conserver le HTML brut de chaque page, pour ré-extraire hors ligne
+        """
+        self.headless = headless
+        self.leger = leger
+        self.octets = CompteurOctets(leger)
+        self.metriques = MetriquesCrawl('citya')
+        self.demarreur = DemarreurChrome(dossier_navigateur, 'citya', self.metriques)
+        self.surveillance = SurveillanceNavigateur(
+            SCRAPING_CONFIG['recyclage_pages'], SCRAPING_CONFIG['recyclage_memoire_mo'], metriques=self.metriques
+        )
+        self.nb_workers = nb_workers
+        self.mode_extraction = mode_extraction
+        self.controleur = ControleurAIMD(
+            concurrence_initiale=1,
+            delai_initial=delai_politesse,
+            concurrence_max=max(nb_workers, 1),
+            **SCRAPING_CONFIG['aimd']
+        ) if controle_aimd else None
+        self.limiteur = LimiteurPolitesse(delai_politesse, self.controleur)
+        self.attente = AttentePage(timeout=timeout_attente)
+        self.corpus = corpus
+        self.archive = archive
+        self.fetcher = FetcherHTTP(
+            USER_AGENT, timeout=timeout_attente, taille_pool=max(nb_workers, 1) * 2, corpus=corpus,
+            controleur=self.controleur, archive=archive
+        ) if http_first else None
+        self.champs_requis = champs_requis
+        self.etat = etat
+        self.fraction_rafraichissement = fraction_rafraichissement
+        
+        # Sortie en flux et point de reprise
+        self.sortie = sortie
+        self.checkpoint = checkpoint
+        self.point_reprise = checkpoint.charger() if (checkpoint and reprise) else None
+        if checkpoint and not reprise:
+            checkpoint.supprimer()
+        self.sections_terminees = list((self.point_reprise or {}).get('sections_terminees', []))
+        self.section_en_cours = None
+        self.frontiere = {}
+        self.position_pagination = None
+        self.pipeline = pipeline
+        self.taille_file_pipeline = taille_file_pipeline
+        self.mode = mode
+        self.cartes = {}
+        self.donnees_structurees = donnees_structurees
+        self.capture = CaptureXHR(SCRAPING_CONFIG['motifs_xhr']) if capture_xhr else None
+        self.stats_selecteurs = stats_selecteurs
+        self.shard = shard
+        self.reessais = reessais
+        self.disjoncteur = Disjoncteur(**SCRAPING_CONFIG['disjoncteur'])
+        self.nb_annonces = 0
+        self.nb_modifiees = 0
+        self.pages_liste_vides = 0
+        self._verrou_sortie = threading.RLock()
+        
+        # Seul le navigateur des pages de liste journalise le réseau
+        self.driver = self.creer_driver(capture=self.capture is not None)
         self.wait = WebDriverWait(self.driver, 10)
         self.annonces = []
     
+    def creer_driver(self, capture=False):
+        """Créer un navigateur Chrome configuré"""
+        # Configuration Chrome
+        chrome_options = options_chrome(USER_AGENT, headless=self.headless, leger=self.leger)
+        if capture:
+            activer_journal_reseau(chrome_options)
+        driver = self.demarreur.demarrer(chrome_options)
+        if capture:
+            self.capture.preparer(driver)
+        
+        if self.leger:
+            activer_blocage(
+                driver,
+                SCRAPING_CONFIG['ressources_bloquees'] + SCRAPING_CONFIG['domaines_bloques']
+            )
+        return driver
+    
+    def surveiller_driver(self):
+        """Recycler le navigateur principal s'il a chargé trop de pages ou occupe trop de mémoire"""
+        driver = self.surveillance.verifier(self.driver, lambda: self.creer_driver(capture=self.capture is not None))
+        if driver is not self.driver:
+            self.driver = driver
+            self.wait = WebDriverWait(self.driver, 10)
+    
+    def signaler_page(self, driver, url, latence):
+        """
+        Transmettre au contrôleur AIMD la latence de la page et les signes de blocage (429/5xx, captcha)
+
+        Returns:
+            (statut HTTP ou None, True si la page est un challenge anti-bot)
+        """
+        statut, captcha = diagnostiquer_page(driver)
+        if self.controleur:
+            self.controleur.signaler(urlparse(url).netloc, latence, est_congestion(statut, captcha))
+        return statut, captcha
+    
+    def enregistrer_page(self, driver, url):
+        """Copier le HTML de la page chargée dans le corpus de rejeu et l'archive"""
+        if not (self.corpus or self.archive):
+            return
+        html = driver.page_source
+        if self.corpus:
+            self.corpus.enregistrer(url, html)
+        if self.archive:
+            self.archive.enregistrer(url, html)
+    
     def extraire_texte(self, element, selecteur):
         try:
             return element.find_element(By.CSS_SELECTOR, selecteur).text.strip()
@@ -68,15 +306,33 @@ class CityaScraper:
         
         return False, 0
     
-    def scraper_page_liste_auto(self, url_base, max_pages=100):
+    def scraper_page_liste_auto(self, url_base, max_pages=100, reprise=None, max_annonces=None, sur_page=None):
+        """
+        Parcourir les pages de liste et collecter les URLs des annonces
+        
+        Args:
+            reprise: Point de reprise (--resume) de cette section
+            max_annonces: Arrêter la pagination dès que ce nombre d'URLs est atteint
+            sur_page: Fonction appelée avec (numero_page, nouvelles_urls) après chaque page,
+                pour lancer les pages de détail sans attendre la fin de la pagination
+        """
         print(f"URL de base: {url_base}")
         print(f"Pages maximum: {max_pages}")
         
-        urls_annonces = set()
+        # dict utilisé comme ensemble ordonné: l'ordre de découverte est conservé
+        urls_annonces = {}
         pages_vides_consecutives = 0
         max_pages_vides = 3
+        premiere_page = 1
+        # Plage exacte de pages lue sur la première page de liste
+        suivi = SuiviPagination(max_pages)
+        
+        if reprise and reprise.get('phase') == 'pagination':
+            urls_annonces = dict.fromkeys(reprise['urls_trouvees'])
+            premiere_page = reprise['page'] + 1
+            print(f"♻️  Reprise à la page {premiere_page} ({len(urls_annonces)} annonces déjà trouvées)")
         
-        for page_num in range(1, max_pages + 1):
+        for page_num in range(premiere_page, max_pages + 1):
             # Générer l'URL de la page
             if page_num == 1:
                 url_page = url_base
@@ -86,12 +342,24 @@ class CityaScraper:
             print(f"📄 PAGE {page_num}")
             print(f"🔗 URL: {url_page}")
             
+            mesure = {'navigation': 0.0, 'attente': 0.0, 'extraction': 0.0, 'octets': 0}
             try:
+                # Pause pour éviter d'être bloqué
+                self.limiteur.attendre(url_page)
+                self.surveiller_driver()
+                debut = time.monotonic()
                 self.driver.get(url_page)
-                time.sleep(3)  # Attendre le chargement
+                mesure['navigation'] = time.monotonic() - debut
+                
+                debut = time.monotonic()
+                self.attente.attendre(self.driver, 'liste')
+                mesure['attente'] = time.monotonic() - debut
+                self.signaler_page(self.driver, url_page, mesure['navigation'] + mesure['attente'])
+                mesure['octets'] = self.octets.mesurer(self.driver)
+                self.enregistrer_page(self.driver, url_page)
                 
-                # Accepter les cookies si présents (seulement page 1)
-                if page_num == 1:
+                # Accepter les cookies si présents (seulement sur la première page visitée)
+                if page_num == premiere_page:
                     try:
                         cookie_selectors = [
                             'button[id*="accept"]',
@@ -105,7 +373,7 @@ class CityaScraper:
                                 cookie_btn = self.driver.find_element(By.CSS_SELECTOR, selector)
                                 if cookie_btn.is_displayed():
                                     cookie_btn.click()
-                                    time.sleep(1)
+                                    self.attente.attendre_disparition(self.driver, cookie_btn)
                                     break
                             except:
                                 continue
@@ -113,9 +381,13 @@ class CityaScraper:
                         pass
                 
                 # Vérifier si la page contient des annonces
+                debut = time.monotonic()
                 page_valide, nb_elements = self.verifier_page_valide()
                 
                 if not page_valide:
+                    mesure['extraction'] = time.monotonic() - debut
+                    self.metriques.enregistrer_page(url_page, 'liste', champs=0, **mesure)
+                    self.compter_page_liste_vide()
                     pages_vides_consecutives += 1
                     if pages_vides_consecutives >= max_pages_vides:
                         print(f"\n {max_pages_vides} pages vides consécutives détectées")
@@ -128,187 +400,657 @@ class CityaScraper:
                 print(f" {nb_elements} éléments trouvés sur la page")
                 
                 # Extraire les URLs des annonces
-                selecteurs_liens = [
-                    'a[href*="/annonces/vente/"]',
-                    'a[href*="/annonces/location/"]',
-                    'a[href*="/annonce/"]',
-                    'a[href*="/bien/"]',
-                    '.property-card a',
-                    '.listing-card a',
-                    'article a',
-                    '[class*="Card"] a[href*="/"]'
-                ]
+                debut = time.monotonic()
+                liens = self.recolter_liens()
+                if self.mode != 'details':
+                    cartes = self.lire_cartes()
+                    with self._verrou_sortie:
+                        self.cartes.update(cartes)
+                    print(f" 🃏 {len(cartes)} cartes lues")
+                if self.capture:
+                    # Les réponses d'API complètent (ou remplacent) les cartes
+                    captures = self.capture.lire_annonces(self.driver, url_page)
+                    # URLs lues dans le JSON: hors site ou hors annonces, elles n'atteignent pas le pool
+                    captures = {href: champs for href, champs in captures.items() if est_lien_annonce(href)}
+                    if captures:
+                        with self._verrou_sortie:
+                            for href, champs in captures.items():
+                                self.cartes[href] = {**self.cartes.get(href, {}), **champs}
+                        liens = list(dict.fromkeys(liens + list(captures)))
+                        print(f" 📡 {len(captures)} annonces lues dans les réponses d'API")
+                duree_recolte = time.monotonic() - debut
+                print(f" 🔗 {len(liens)} liens récoltés en {duree_recolte * 1000:.0f} ms ({self.mode_extraction})")
                 
-                nouvelles_annonces = 0
-                for selecteur in selecteurs_liens:
-                    try:
-                        elements = self.driver.find_elements(By.CSS_SELECTOR, selecteur)
-                        for elem in elements:
-                            href = elem.get_attribute('href')
-                            if href and 'citya.com' in href:
-                                # Filtrer les URLs valides
-                                if any(x in href for x in ['/annonces/', '/annonce/', '/bien/', '/vente/', '/location/']):
-                                    if not any(x in href for x in ['#', 'javascript:', 'mailto:', 'tel:', '?page=']):
-                                        if href not in urls_annonces:
-                                            urls_annonces.add(href)
-                                            nouvelles_annonces += 1
-                    except:
-                        continue
+                nouvelles = []
+                for href in liens:
+                    if href not in urls_annonces:
+                        urls_annonces[href] = None
+                        nouvelles.append(href)
+                
+                # Ne pas dépasser le budget d'annonces
+                budget_atteint = bool(max_annonces) and len(urls_annonces) >= max_annonces
+                if budget_atteint:
+                    for href in list(urls_annonces)[max_annonces:]:
+                        del urls_annonces[href]
+                    nouvelles = [href for href in nouvelles if href in urls_annonces]
+                nouvelles_annonces = len(nouvelles)
+                mesure['extraction'] = time.monotonic() - debut
+                self.metriques.enregistrer_page(url_page, 'liste', champs=nouvelles_annonces, **mesure)
                 
                 print(f" {nouvelles_annonces} nouvelles annonces trouvées")
                 print(f" Total cumulé: {len(urls_annonces)} annonces")
                 
                 # Si aucune nouvelle annonce, c'est peut-être la fin
                 if nouvelles_annonces == 0 and page_num > 1:
+                    self.compter_page_liste_vide()
                     pages_vides_consecutives += 1
                     print(f"⚠️  Aucune nouvelle annonce ({pages_vides_consecutives}/{max_pages_vides})")
                 
-                # Pause pour éviter d'être bloqué
-                time.sleep(2)
+                if sur_page:
+                    sur_page(page_num, nouvelles)
+                
+                with self._verrou_sortie:
+                    self.position_pagination = {'page': page_num, 'urls_trouvees': list(urls_annonces)}
+                    self.sauvegarder_checkpoint()
+                
+                if budget_atteint:
+                    print(f"🔒 Budget de {max_annonces} annonces atteint, fin de la pagination")
+                    break
+                
+                # Nombre de résultats, dernier numéro de page et lien "suivant"
+                info = lire_pagination(self.driver, SELECTEURS_PAGINATION)
+                suivi.mettre_a_jour(info, len(liens))
+                if suivi.est_derniere(info, page_num, nouvelles_annonces):
+                    print(f"🏁 Dernière page atteinte ({page_num}), fin de la pagination")
+                    break
                 
             except Exception as e:
+                self.metriques.enregistrer_page(url_page, 'liste', succes=False, **mesure)
                 print(f"❌ Erreur sur la page {page_num}: {e}")
                 pages_vides_consecutives += 1
                 if pages_vides_consecutives >= max_pages_vides:
                     break
                 continue
         
+        with self._verrou_sortie:
+            self.position_pagination = None
+        
         print(f"✅ PAGINATION TERMINÉE")
         print(f"📊 {len(urls_annonces)} annonces uniques trouvées")
         
         
         return list(urls_annonces)
     
-    def scraper_annonce(self, url):
+    def compter_page_liste_vide(self):
+        """Page de liste chargée pour rien (aucune nouvelle annonce)"""
+        with self._verrou_sortie:
+            self.pages_liste_vides += 1
+        self.metriques.definir('pages_liste_vides', self.pages_liste_vides)
+    
+    def recolter_liens(self):
+        """URLs d'annonces de la page de liste courante, filtrées et sans doublons"""
+        if self.mode_extraction == 'js':
+            # Un seul execute_script: filtres appliqués dans le navigateur
+            return extraire_liens(
+                self.driver,
+                SELECTEURS_LIENS,
+                domaine='citya.com',
+                inclure=MOTIFS_LIENS_INCLUS,
+                exclure=MOTIFS_LIENS_EXCLUS
+            )
+        
+        liens = []
+        for selecteur in SELECTEURS_LIENS:
+            try:
+                elements = self.driver.find_elements(By.CSS_SELECTOR, selecteur)
+                for elem in elements:
+                    href = elem.get_attribute('href')
+                    # Filtrer les URLs valides
+                    if est_lien_annonce(href) and href not in liens:
+                        liens.append(href)
+            except:
+                continue
+        return liens
+    
+    def lire_cartes(self):
+        """Champs des cartes de la page de liste courante, {url: champs}, en un seul execute_script"""
+        return extraire_cartes(
+            self.driver,
+            SELECTEURS_CARTES,
+            CHAMPS_CARTE,
+            domaine='citya.com',
+            inclure=MOTIFS_LIENS_INCLUS,
+            exclure=MOTIFS_LIENS_EXCLUS
+        )
+    
+    def scraper_annonce(self, url, driver=None, tentative=1):
+        # Chaque worker du pool passe son propre navigateur
+        driver = driver or self.driver
+        # Temps passé dans chaque phase, pour les métriques du run
+        mesure = {
+            'navigation': 0.0, 'attente': 0.0, 'extraction': 0.0, 'octets': 0,
+            'chemin': 'navigateur', 'tentatives': tentative,
+        }
+        # Sélecteur (ou données structurées) qui a donné chaque champ
+        gagnants = {}
+        if not self.disjoncteur.autoriser('citya'):
+            # Site suspendu: la page repart dans la file sans occuper le worker
+            if self.reessais:
+                self.reessais.reporter(url, 'citya', self.disjoncteur.attente('citya'))
+            return None
         try:
-            self.driver.get(url)
-            time.sleep(2)
-            
             # Dictionnaire pour stocker les données
             data = {
                 'url': url,
                 'date_extraction': datetime.now().isoformat(),
             }
             
-            # Sélecteurs possibles pour chaque champ
-            selecteurs = {
-                'titre': ['h1', '.property-title', '[class*="Title"]', 'header h1'],
-                'prix': ['.price', '[class*="Price"]', '[class*="prix"]', 'span[class*="amount"]'],
-                'type_bien': ['.property-type', '[class*="Type"]', '[class*="category"]'],
-                'surface': ['[class*="surface"]', '[class*="area"]', '[class*="size"]'],
-                'pieces': ['[class*="room"]', '[class*="piece"]', '[data-testid*="room"]'],
-                'chambres': ['[class*="bedroom"]', '[class*="chambre"]'],
-                'ville': ['.city', '[class*="City"]', '[class*="ville"]', '.location'],
-                'code_postal': ['[class*="postal"]', '[class*="zip"]', '.zipcode'],
-                'description': ['.description', '[class*="Description"]', 'article p', '.details'],
-                'reference': ['[class*="ref"]', '.reference', '[class*="Reference"]'],
-                'dpe': ['[class*="dpe"]', '[class*="energy"]', '.energy-class'],
-                'ges': ['[class*="ges"]', '[class*="emission"]', '.emission-class'],
-                'etage': ['[class*="floor"]', '[class*="etage"]'],
-                'ascenseur': ['[class*="elevator"]', '[class*="ascenseur"]'],
-                'balcon': ['[class*="balcon"]', '[class*="balcony"]'],
-                'parking': ['[class*="parking"]', '[class*="garage"]'],
-                'annee_construction': ['[class*="year"]', '[class*="annee"]', '[class*="construction"]'],
-            }
-            
-            # Extraire chaque champ avec les sélecteurs possibles
-            for champ, liste_selecteurs in selecteurs.items():
-                for selecteur in liste_selecteurs:
-                    try:
-                        element = self.driver.find_element(By.CSS_SELECTOR, selecteur)
-                        if element and element.text.strip():
-                            data[champ] = element.text.strip()
-                            break
-                    except:
-                        continue
-            
-           
-            # Extraire les caractéristiques sous forme de liste
-            caracteristiques = []
-            selecteurs_features = [
-                '.features li',
-                '.caracteristiques li',
-                '[class*="feature"] li',
-                'ul[class*="amenities"] li',
-                '.details li'
-            ]
-            
-            for selecteur in selecteurs_features:
-                try:
-                    items = self.driver.find_elements(By.CSS_SELECTOR, selecteur)
-                    for item in items:
-                        text = item.text.strip()
-                        if text and text not in caracteristiques:
-                            caracteristiques.append(text)
-                except:
-                    continue
-            
-            if caracteristiques:
-                data['caracteristiques'] = caracteristiques
+            # 1. HTTP + lxml si la page contient déjà les champs requis
+            champs = self.extraire_champs_http(url, mesure, gagnants) if self.fetcher else None
             
-            # Extraire le prix du loyer si c'est une location
-            try:
-                loyer = self.driver.find_element(By.CSS_SELECTOR, '[class*="rent"], [class*="loyer"]')
-                if loyer:
-                    data['loyer'] = loyer.text.strip()
-            except:
-                pass
+            if champs is not None:
+                self.fetcher.compter('http')
+                mesure['chemin'] = 'http'
+            else:
+                # 2. Repli sur le navigateur pour les pages rendues en JavaScript
+                gagnants.clear()
+                debut = time.monotonic()
+                driver.get(url)
+                mesure['navigation'] += time.monotonic() - debut
+                
+                debut = time.monotonic()
+                # Après un timeout, la page est extraite quand même; le timeout est compté dans les métriques
+                mesure['timeout_attente'] = not self.attente.attendre(driver, 'annonce')
+                mesure['attente'] = time.monotonic() - debut
+                statut, captcha = self.signaler_page(driver, url, mesure['navigation'] + mesure['attente'])
+                mesure['octets'] += self.octets.mesurer(driver)
+                # Page d'erreur ou challenge anti-bot: un échec, pas une annonce vide
+                erreur = erreur_page(statut, captcha)
+                if erreur:
+                    raise RuntimeError(erreur)
+                self.enregistrer_page(driver, url)
+                
+                debut = time.monotonic()
+                structure = champs_structures(lire_payloads_driver(driver), url, CHAMPS_ANNONCE) if self.donnees_structurees else {}
+                if self.mode_extraction == 'js':
+                    champs = self.extraire_champs_js(driver, exclure=structure, gagnants=gagnants)
+                else:
+                    champs = self.extraire_champs_selenium(driver, exclure=structure, gagnants=gagnants)
+                champs.update(structure)
+                gagnants.update(dict.fromkeys(structure, SOURCE_JSON))
+                mesure['extraction'] += time.monotonic() - debut
+                
+                if self.fetcher:
+                    self.fetcher.compter('navigateur')
             
-            # Extraire les charges
-            try:
-                charges = self.driver.find_element(By.CSS_SELECTOR, '[class*="charges"], [class*="fees"]')
-                if charges:
-                    data['charges'] = charges.text.strip()
-            except:
-                pass
+            data.update(champs)
+            self.compter_selecteurs(gagnants)
             
             # Nettoyer les données vides
             data = {k: v for k, v in data.items() if v}
             
+            self.metriques.enregistrer_page(url, 'annonce', champs=len(data) - 2, **mesure)
+            self.disjoncteur.enregistrer('citya', True)
+            if self.reessais:
+                self.reessais.succes(url)
             print(f"    ✅ {len(data)} champs extraits")
             return data
             
         except Exception as e:
+            self.metriques.enregistrer_page(url, 'annonce', succes=False, **mesure)
+            self.disjoncteur.enregistrer('citya', False)
+            if self.controleur and isinstance(e, TimeoutException):
+                self.controleur.signaler(urlparse(url).netloc, mesure['navigation'] + mesure['attente'], congestion=True)
+            if self.reessais:
+                self.reessais.echec(url, 'citya', e)
             print(f"    ❌ Erreur: {e}")
             return None
     
+    def extraire_champs_http(self, url, mesure, gagnants=None):
+        """
+        Extraire les champs depuis le HTML initial de la page
+        
+        Returns:
+            Les champs extraits, ou None si la page doit passer par le navigateur
+        """
+        debut = time.monotonic()
+        arbre, octets = self.fetcher.telecharger(url)
+        mesure['navigation'] += time.monotonic() - debut
+        mesure['octets'] += octets
+        if arbre is None:
+            return None
+        
+        debut = time.monotonic()
+        structure = champs_structures(lire_payloads_html(arbre), url, CHAMPS_ANNONCE) if self.donnees_structurees else {}
+        data = self.champs_depuis_resultat(extraire_champs_html(
+            arbre,
+            champs=self.selecteurs_manquants(structure),
+            listes={'caracteristiques': SELECTEURS_CARACTERISTIQUES},
+        ), gagnants)
+        data.update(structure)
+        if gagnants is not None:
+            gagnants.update(dict.fromkeys(structure, SOURCE_JSON))
+        mesure['extraction'] += time.monotonic() - debut
+        if not all(data.get(champ) for champ in self.champs_requis):
+            return None
+        return data
+    
+    def selecteurs_manquants(self, exclure=(), selecteurs=None):
+        """
+        Sélecteurs des champs qui n'ont pas déjà été trouvés dans les données structurées,
+        les plus souvent gagnants en premier
+        """
+        selecteurs = selecteurs or {**SELECTEURS_ANNONCE, **SELECTEURS_COMPLEMENTS}
+        manquants = {champ: liste for champ, liste in selecteurs.items() if champ not in exclure}
+        if self.stats_selecteurs:
+            manquants = self.stats_selecteurs.ordonner_tous('citya', manquants)
+        return manquants
+    
+    def compter_selecteurs(self, gagnants):
+        """Enregistrer le sélecteur gagnant (ou l'absence de valeur) de chaque champ d'une annonce"""
+        if not self.stats_selecteurs:
+            return
+        for champ in sorted(CHAMPS_ANNONCE):
+            self.stats_selecteurs.enregistrer('citya', champ, gagnants.get(champ))
+    
+    def extraire_champs_js(self, driver, exclure=(), gagnants=None):
+        """Extraire tous les champs en un seul execute_script"""
+        return self.champs_depuis_resultat(extraire_via_js(
+            driver,
+            champs=self.selecteurs_manquants(exclure),
+            listes={'caracteristiques': SELECTEURS_CARACTERISTIQUES},
+        ), gagnants)
+    
+    def champs_depuis_resultat(self, resultat, gagnants=None):
+        """Mettre à plat le résultat de extraire_via_js / extraire_champs_html"""
+        if gagnants is not None:
+            gagnants.update(resultat['selecteurs'])
+        data = dict(resultat['champs'])
+        if resultat['listes'].get('caracteristiques'):
+            data['caracteristiques'] = resultat['listes']['caracteristiques']
+        return data
+    
+    def extraire_champs_selenium(self, driver, exclure=(), gagnants=None):
+        """Extraire les champs avec un find_element par sélecteur"""
+        data = {}
+        gagnants = {} if gagnants is None else gagnants
+        
+        # Extraire chaque champ avec les sélecteurs possibles
+        for champ, liste_selecteurs in self.selecteurs_manquants(exclure, SELECTEURS_ANNONCE).items():
+            for selecteur in liste_selecteurs:
+                try:
+                    element = driver.find_element(By.CSS_SELECTOR, selecteur)
+                    if element and element.text.strip():
+                        data[champ] = element.text.strip()
+                        gagnants[champ] = selecteur
+                        break
+                except:
+                    continue
+        
+        # Extraire les caractéristiques sous forme de liste
+        caracteristiques = []
+        for selecteur in SELECTEURS_CARACTERISTIQUES:
+            try:
+                items = driver.find_elements(By.CSS_SELECTOR, selecteur)
+                for item in items:
+                    text = item.text.strip()
+                    if text and text not in caracteristiques:
+                        caracteristiques.append(text)
+            except:
+                continue
+        
+        if caracteristiques:
+            data['caracteristiques'] = caracteristiques
+        
+        # Loyer (si c'est une location) et charges
+        for champ, liste_selecteurs in SELECTEURS_COMPLEMENTS.items():
+            if champ in exclure:
+                continue
+            try:
+                element = driver.find_element(By.CSS_SELECTOR, liste_selecteurs[0])
+                if element:
+                    data[champ] = element.text.strip()
+                    if data[champ]:
+                        gagnants[champ] = liste_selecteurs[0]
+            except:
+                pass
+        
+        return data
+    
     def scraper(self, url_base, max_pages=500, max_annonces=None):
         print("\n")
         print("🚀 DÉMARRAGE DU SCRAPING CITYA.COM")
         
+        if url_base in self.sections_terminees:
+            print("⏭️  Section déjà terminée lors du run précédent")
+            return
         
-        # 1. Récupérer les URLs des annonces avec pagination automatique
-        urls_annonces = self.scraper_page_liste_auto(url_base, max_pages=max_pages)
+        # Point de reprise de cette section (--resume)
+        reprise = None
+        if self.point_reprise and self.point_reprise.get('section') == url_base:
+            reprise = self.point_reprise
+        self.point_reprise = None
+        self.section_en_cours = url_base
+        self.frontiere = {}
+        self.nb_modifiees = 0
+        self.cartes = {}
+        
+        if self.mode == 'cards':
+            urls_annonces, resultats = self.scraper_cartes(url_base, max_pages, max_annonces, reprise)
+        elif self.pipeline:
+            urls_annonces, resultats = self.scraper_en_pipeline(url_base, max_pages, max_annonces, reprise)
+        else:
+            urls_annonces, resultats = self.scraper_en_deux_temps(url_base, max_pages, max_annonces, reprise)
+        if self.mode != 'cards':
+            resultats = resultats + self.reessayer_echecs()
         
         if not urls_annonces:
             print("⚠️  Aucune annonce trouvée")
-            return
         
-        print(f"\n📋 {len(urls_annonces)} annonces à scraper")
+        if self.etat:
+            print(f"🗂️  {self.nb_modifiees}/{len(resultats)} annonces nouvelles ou modifiées")
         
-        # Limiter le nombre d'annonces si spécifié
-        if max_annonces:
-            urls_annonces = urls_annonces[:max_annonces]
-            print(f"🔒 Limitation à {max_annonces} annonces")
+        if self.sortie:
+            # Déjà écrites au fil de l'eau
+            self.nb_annonces += len(resultats)
+        else:
+            if self.etat:
+                resultats = self.completer_avec_etat(urls_annonces, resultats)
+            self.annonces.extend(resultats)
+            self.nb_annonces = len(self.annonces)
+        
+        self.terminer_section(url_base)
+        
+        print(f"\n{'='*60}")
+        print(f"✅ {self.nb_annonces} annonces scrapées avec succès")
+        print(f"{'='*60}")
+        self.attente.afficher_resume()
+        self.octets.afficher()
+        if self.fetcher:
+            self.fetcher.afficher_compteurs()
+        if self.capture:
+            self.capture.afficher()
+        if self.controleur:
+            self.controleur.afficher()
+            self.controleur.exporter(self.metriques)
+    
+    def reessayer_echecs(self, attente_max=SCRAPING_CONFIG['retry_attente_max']):
+        """
+        Réessayer les pages en échec (de ce run ou des précédents) dont l'heure est venue
+        
+        Les essais prévus dans moins de attente_max secondes sont attendus; les
+        autres restent dans la file pour le run suivant.
+        """
+        resultats = []
+        if not self.reessais:
+            return resultats
+        while True:
+            attente = self.reessais.attente_prochain('citya')
+            if attente is None:
+                break
+            attente = max(attente, self.disjoncteur.attente('citya'))
+            if attente > attente_max:
+                print(f"🔁 Réessais restants laissés au run suivant (prochain dans {attente:.0f}s)")
+                break
+            if attente > 0:
+                print(f"⏳ Prochain réessai dans {attente:.0f}s")
+                time.sleep(attente)
+            
+            urls = self.reessais.prets('citya')
+            print(f"\n🔁 {len(urls)} pages en échec réessayées")
+            for url, tentative in urls.items():
+                self.limiteur.attendre(url)
+                self.surveiller_driver()
+                annonce = self.traiter_annonce(url, tentative=tentative)
+                if annonce:
+                    resultats.append(annonce)
+        self.metriques.definir('disjoncteur_ouvertures', self.disjoncteur.nb_ouvertures())
+        return resultats
+    
+    def scraper_cartes(self, url_base, max_pages, max_annonces, reprise):
+        """Mode rapide: les annonces sont lues sur les cartes des pages de liste, sans pages de détail"""
+        print("🃏 Mode cartes: pas de pages de détail")
+        resultats = []
+        
+        def sur_page(numero_page, nouvelles):
+            resultats.extend(self.emettre_cartes(nouvelles))
+        
+        urls_annonces = self.scraper_page_liste_auto(
+            url_base,
+            max_pages=max_pages,
+            reprise=reprise,
+            max_annonces=max_annonces,
+            sur_page=sur_page
+        )
+        return urls_annonces, resultats
+    
+    def emettre_cartes(self, urls):
+        """Transformer les cartes en annonces et les écrire dans le flux de sortie"""
+        urls = self.filtrer_shard(urls)
+        maintenant = datetime.now().isoformat()
+        with self._verrou_sortie:
+            cartes = {url: self.cartes[url] for url in urls if self.cartes.get(url)}
+        annonces = [{'url': url, 'date_extraction': maintenant, **carte} for url, carte in cartes.items()]
+        
+        if self.etat:
+            self.etat.marquer_vues(urls)
+            self.etat.enregistrer_cartes(cartes)
+        
+        if self.sortie and annonces:
+            with self._verrou_sortie:
+                for annonce in annonces:
+                    self.sortie.ecrire(annonce)
+                self.sortie.synchroniser()
+        return annonces
+    
+    def scraper_en_deux_temps(self, url_base, max_pages, max_annonces, reprise):
+        """Toute la pagination d'abord, puis les pages de détail"""
+        if reprise and reprise.get('phase') == 'details':
+            # La pagination était terminée: reprendre directement les URLs restantes
+            urls_annonces = urls_a_visiter = reprise['urls_restantes']
+            print(f"♻️  Reprise: {len(urls_a_visiter)} annonces restantes")
+        else:
+            # 1. Récupérer les URLs des annonces avec pagination automatique
+            urls_annonces = self.scraper_page_liste_auto(
+                url_base, max_pages=max_pages, reprise=reprise, max_annonces=max_annonces
+            )
+            if not urls_annonces:
+                return [], []
+            
+            print(f"\n📋 {len(urls_annonces)} annonces à scraper")
+            urls_a_visiter = self.selectionner_a_visiter(urls_annonces)
+        
+        with self._verrou_sortie:
+            self.frontiere = dict.fromkeys(urls_a_visiter)
+            self.sauvegarder_checkpoint()
         
         # 2. Scraper chaque annonce
         print(f"\n")
         print("📥 EXTRACTION DES DÉTAILS DES ANNONCES")
         
         
-        for i, url in enumerate(urls_annonces, 1):
-            print(f"[{i}/{len(urls_annonces)}]", end=" ")
-            annonce_data = self.scraper_annonce(url)
-            if annonce_data:
-                self.annonces.append(annonce_data)
+        if self.nb_workers > 1:
+            resultats = self.scraper_annonces_parallele(urls_a_visiter)
+        else:
+            resultats = []
+            for i, url in enumerate(urls_a_visiter, 1):
+                print(f"[{i}/{len(urls_a_visiter)}]", end=" ")
+                # Pause entre chaque annonce
+                self.limiteur.attendre(url)
+                self.surveiller_driver()
+                annonce_data = self.traiter_annonce(url)
+                if annonce_data:
+                    resultats.append(annonce_data)
+        
+        return urls_annonces, resultats
+    
+    def scraper_en_pipeline(self, url_base, max_pages, max_annonces, reprise):
+        """Pages de détail scrapées par le pool pendant que la pagination continue"""
+        print(f"🧵 Pipeline: pagination + {self.nb_workers} navigateurs pour les détails")
+        
+        pool = PoolNavigateurs(
+            self.creer_driver,
+            self.nb_workers,
+            self.limiteur,
+            taille_file=self.taille_file_pipeline,
+            surveillance=self.surveillance,
+            controleur=self.controleur,
+            sur_echec=self.echec_sans_navigateur
+        )
+        pool.demarrer(lambda driver, url: self.traiter_annonce(url, driver))
+        prochain_index = [0]
+        
+        def envoyer(urls):
+            # Bloque quand la file est pleine: la pagination attend les workers
+            for url in urls:
+                with self._verrou_sortie:
+                    self.frontiere[url] = None
+                pool.soumettre(prochain_index[0], url)
+                prochain_index[0] += 1
+        
+        def sur_page(numero_page, nouvelles):
+            if nouvelles:
+                envoyer(self.selectionner_a_visiter(nouvelles))
+        
+        try:
+            # URLs en cours lors de l'interruption précédente
+            if reprise and reprise.get('urls_restantes'):
+                print(f"♻️  Reprise: {len(reprise['urls_restantes'])} annonces en attente")
+                envoyer(reprise['urls_restantes'])
             
-            # Pause entre chaque annonce
-            if i < len(urls_annonces):
-                time.sleep(2)
+            if reprise and reprise.get('phase') == 'details':
+                urls_annonces = list(reprise['urls_restantes'])
+            else:
+                urls_annonces = self.scraper_page_liste_auto(
+                    url_base,
+                    max_pages=max_pages,
+                    reprise=reprise,
+                    max_annonces=max_annonces,
+                    sur_page=sur_page
+                )
+        finally:
+            # Les résultats sont renvoyés dans l'ordre de découverte des URLs
+            resultats = pool.terminer()
         
-        print(f"\n{'='*60}")
-        print(f"✅ {len(self.annonces)} annonces scrapées avec succès")
-        print(f"{'='*60}")
+        return urls_annonces, resultats
+    
+    def filtrer_shard(self, urls):
+        """Annonces qui reviennent à ce nœud quand le crawl est découpé en shards"""
+        if not self.shard:
+            return urls
+        return self.shard.filtrer(urls)
+    
+    def selectionner_a_visiter(self, urls_annonces):
+        """Ne visiter que les nouvelles annonces (de ce shard) et une partie des annonces connues"""
+        urls_annonces = self.filtrer_shard(urls_annonces)
+        if not self.etat:
+            return urls_annonces
+        
+        self.etat.marquer_vues(urls_annonces)
+        if self.mode == 'hybrid':
+            # Page de détail seulement pour les annonces nouvelles ou dont la carte a changé
+            with self._verrou_sortie:
+                cartes = {url: self.cartes[url] for url in urls_annonces if self.cartes.get(url)}
+            a_visiter = set(self.etat.cartes_modifiees(urls_annonces, cartes))
+            urls_a_visiter = [url for url in urls_annonces if url in a_visiter]
+            urls_ignorees = [url for url in urls_annonces if url not in a_visiter]
+        else:
+            urls_a_visiter, urls_ignorees = self.etat.selectionner_urls(
+                urls_annonces, self.fraction_rafraichissement
+            )
+        print(f"🗂️  {len(urls_a_visiter)} à visiter, {len(urls_ignorees)} déjà connues ignorées")
+        
+        # Les annonces connues non revisitées partent tout de suite dans le flux
+        if self.sortie and urls_ignorees:
+            with self._verrou_sortie:
+                for url in urls_ignorees:
+                    annonce = self.etat.derniere_version(url)
+                    if annonce:
+                        self.sortie.ecrire(annonce)
+                self.sortie.synchroniser()
+        
+        return urls_a_visiter
+    
+    def traiter_annonce(self, url, driver=None, tentative=1):
+        """Scraper une annonce puis l'enregistrer dans l'état et dans le flux de sortie"""
+        annonce = self.scraper_annonce(url, driver, tentative)
+        
+        with self._verrou_sortie:
+            if annonce and self.etat:
+                if self.etat.enregistrer(annonce):
+                    self.nb_modifiees += 1
+                # La carte n'est retenue qu'une fois la page de détail extraite
+                if self.mode == 'hybrid' and self.cartes.get(url):
+                    self.etat.enregistrer_cartes({url: self.cartes[url]})
+            
+            if self.sortie:
+                synchronise = self.sortie.ecrire(annonce) if annonce else False
+                self.frontiere.pop(url, None)
+                # Le point de reprise ne doit jamais annoncer des annonces pas encore sur disque
+                if synchronise:
+                    self.sauvegarder_checkpoint()
+        
+        return annonce
+    
+    def sauvegarder_checkpoint(self):
+        """Enregistrer la position courante du crawl pour --resume (appelé sous _verrou_sortie)"""
+        if not self.checkpoint:
+            return
+        # Les URLs retirées de la frontière par les workers ont leur annonce peut-être encore
+        # dans le tampon de la sortie: elle doit être sur disque avant le point de reprise
+        if self.sortie:
+            self.sortie.synchroniser()
+        etat = {
+            'sections_terminees': self.sections_terminees,
+            'section': self.section_en_cours,
+            'urls_restantes': list(self.frontiere),
+        }
+        if self.position_pagination:
+            etat['phase'] = 'pagination'
+            etat.update(self.position_pagination)
+        else:
+            etat['phase'] = 'details'
+        self.checkpoint.sauvegarder(etat)
+    
+    def terminer_section(self, url_base):
+        """Marquer une section comme terminée dans le point de reprise"""
+        with self._verrou_sortie:
+            self.sections_terminees.append(url_base)
+            self.section_en_cours = None
+            if self.checkpoint:
+                if self.sortie:
+                    self.sortie.synchroniser()
+                self.checkpoint.sauvegarder({'sections_terminees': self.sections_terminees, 'section': None})
+    
+    def scraper_annonces_parallele(self, urls_annonces):
+        """Scraper les pages de détail avec un pool de navigateurs"""
+        print(f"🧵 {self.nb_workers} navigateurs en parallèle")
+        
+        pool = PoolNavigateurs(
+            self.creer_driver, self.nb_workers, self.limiteur, surveillance=self.surveillance,
+            controleur=self.controleur, sur_echec=self.echec_sans_navigateur
+        )
+        # Les résultats sont renvoyés dans l'ordre de urls_annonces
+        return pool.executer(
+            urls_annonces,
+            lambda driver, url: self.traiter_annonce(url, driver)
+        )
+    
+    def echec_sans_navigateur(self, url, erreur):
+        """Page jamais tentée faute de navigateur: comptée en échec et réessayée plus tard, sans pénaliser le site"""
+        self.metriques.enregistrer_page(url, 'annonce', succes=False)
+        if self.reessais:
+            self.reessais.echec(url, 'citya', erreur or "navigateur indisponible")
+    
+    def completer_avec_etat(self, urls_annonces, resultats):
+        """Reprendre la dernière version connue des annonces non revisitées, dans l'ordre de la liste"""
+        par_url = {annonce['url']: annonce for annonce in resultats}
+        annonces = []
+        for url in urls_annonces:
+            annonce = par_url.get(url) or self.etat.derniere_version(url)
+            if annonce:
+                annonces.append(annonce)
+        return annonces
     
     def sauvegarder_json(self, nom_fichier=None):
         """Sauvegarder les données en JSON"""
@@ -328,13 +1070,111 @@ class CityaScraper:
     
     def fermer(self):
         """Fermer le navigateur"""
+        if self.sortie:
+            self.sortie.fermer()
         self.driver.quit()
+        if self.fetcher:
+            self.fetcher.fermer()
+        if self.corpus:
+            self.corpus.fermer()
+        if self.archive:
+            self.archive.exporter(self.metriques)
+            self.archive.afficher()
+            self.archive.fermer()
 
 
 # Script principal
 if __name__ == '__main__':
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Scraper Citya')
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        help='Reprendre le run interrompu depuis le dernier checkpoint'
+    )
+    parser.add_argument(
+        '--mode',
+        choices=['details', 'cards', 'hybrid'],
+        help="details: chaque page d'annonce; cards: cartes des pages de liste seulement; "
+             "hybrid: page d'annonce si l'annonce est nouvelle ou sa carte a changé "
+             "(défaut: details, cards avec --capture-xhr)"
+    )
+    parser.add_argument(
+        '--capture-xhr',
+        action='store_true',
+        help="Lire les annonces dans les réponses JSON des appels d'API des pages de liste"
+    )
+    parser.add_argument(
+        '--record',
+        metavar='CORPUS',
+        help='Enregistrer chaque page visitée dans un corpus (.jsonl.gz)'
+    )
+    parser.add_argument(
+        '--replay',
+        metavar='CORPUS',
+        help='Rejouer un corpus enregistré depuis un serveur local, sans réseau'
+    )
+    parser.add_argument(
+        '--archive',
+        metavar='DOSSIER',
+        default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'archive_html'),
+        help="Archive du HTML brut des pages, relue par la ré-extraction hors ligne (défaut: archive_html/, "
+             "désactivée en rejeu)"
+    )
+    parser.add_argument(
+        '--shard',
+        type=argument_shard,
+        metavar='i/N',
+        help='Ne visiter que la part i (0 à N-1) des annonces; fusionner ensuite avec shardsCrawl.py'
+    )
+    args = parser.parse_args()
+    
+    dossier = os.path.dirname(os.path.abspath(__file__))
+    
+    # En rejeu, les fichiers du run sont séparés de ceux du vrai crawl; chaque shard a les siens
+    prefixe = 'replay_citya' if args.replay else 'citya'
+    if args.shard:
+        prefixe = f'{prefixe}_{args.shard.suffixe}'
+        print(f"🧩 Shard {args.shard}: fichiers '{prefixe}_*'")
+    serveur = ServeurReplay(charger_corpus(args.replay)).demarrer() if args.replay else None
+    corpus = CorpusHTML(args.record) if args.record else None
+    archive = ArchiveHTML(args.archive) if not args.replay else None
+    
+    # État du crawl conservé entre les runs (annonces déjà scrapées)
+    etat = EtatCrawl(os.path.join(dossier, f'{prefixe}_etat.sqlite'))
+    
+    # Pages en échec réessayées plus tard dans le run ou au run suivant
+    reessais = FileReessais(
+        os.path.join(dossier, f'{prefixe}_reessais.sqlite'),
+        max_tentatives=SCRAPING_CONFIG['retry_times'],
+        delai_base=SCRAPING_CONFIG['retry_delai_base']
+    )
+    
+    # Sélecteurs gagnants par champ, conservés entre les runs
+    stats_selecteurs = StatsSelecteurs(os.path.join(dossier, f'{prefixe}_selecteurs.json'))
+    
+    # Chaque annonce est écrite dès son extraction; le checkpoint permet --resume
+    sortie = EcrivainJSONL(os.path.join(dossier, f'{prefixe}_annonces.jsonl'), reprise=args.resume)
+    checkpoint = Checkpoint(os.path.join(dossier, f'{prefixe}_checkpoint.json'))
+    
     # Initialiser le scraper (headless=False pour voir le navigateur)
-    scraper = CityaScraper(headless=True)
+    scraper = CityaScraper(
+        headless=True,
+        nb_workers=nb_navigateurs_auto(3),
+        etat=etat,
+        sortie=sortie,
+        checkpoint=checkpoint,
+        reprise=args.resume,
+        corpus=corpus,
+        mode=args.mode or ('cards' if args.capture_xhr else 'details'),
+        capture_xhr=args.capture_xhr,
+        stats_selecteurs=stats_selecteurs,
+        dossier_navigateur=os.path.join(dossier, '.navigateur'),
+        shard=args.shard,
+        reessais=reessais,
+        archive=archive
+    )
     
     try:
         # Configuration
@@ -353,6 +1193,10 @@ if __name__ == '__main__':
             },
         ]
         
+        if serveur:
+            for config in urls:
+                config['url'] = serveur.url_locale(config['url'])
+        
         # Scraper chaque section
         for config in urls:
             print(f"\n\n🎯 SECTION: {config['nom']}")
@@ -362,15 +1206,28 @@ if __name__ == '__main__':
                 max_annonces=config.get('max_annonces')
             )
         
-        # Sauvegarder en JSON
-        scraper.sauvegarder_json()
+        # Run complet: plus besoin de point de reprise
+        checkpoint.supprimer()
+        print(f"\n💾 {sortie.nb_ecrites} annonces écrites dans '{sortie.chemin}'")
         
     except KeyboardInterrupt:
-        print("\n\n⚠️  Interruption par l'utilisateur")
+        print("\n\n⚠️  Interruption par l'utilisateur (relancer avec --resume pour reprendre)")
     except Exception as e:
         print(f"\n\n❌ Erreur: {e}")
         import traceback
         traceback.print_exc()
     finally:
         scraper.fermer()
+        etat.fermer()
+        reessais.afficher()
+        reessais.fermer()
+        if serveur:
+            serveur.arreter()
+        
+        # Métriques du run, même interrompu
+        scraper.metriques.afficher_resume()
+        scraper.metriques.exporter_json(os.path.join(dossier, f'{prefixe}_metriques.json'))
+        scraper.metriques.exporter_prometheus(os.path.join(dossier, f'{prefixe}_metriques.prom'))
+        stats_selecteurs.afficher_rapport()
+        stats_selecteurs.sauvegarder()
         print("\n✅ Scraping terminé!\n")
\ No newline at end of file
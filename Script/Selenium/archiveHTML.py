@@ -0,0 +1,166 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Archive des pages brutes pour ré-extraire les champs sans réseau: chaque corps
+# de page est stocké une seule fois sous son empreinte SHA-256 (objets/ab/abcd...),
+# compressé en zstd, et l'index (URL, date, empreinte) garde l'historique.
+
+FICHIER_INDEX = 'index.jsonl'
+NIVEAU_ZSTD = 12
+EXTENSION = '.html.zst' if zstandard else '.html.gz'
+
+
+def chemin_objet(dossier, empreinte, extension=EXTENSION):
+    return os.path.join(dossier, 'objets', empreinte[:2], empreinte + extension)
+
+
+def lire_objet(dossier, empreinte):
+    """HTML stocké sous cette empreinte (zstd, ou gzip si l'archive a été écrite sans zstandard)"""
+    chemin = chemin_objet(dossier, empreinte, '.html.zst')
+    if os.path.exists(chemin):
+        if zstandard is None:
+            raise RuntimeError("le module zstandard est nécessaire pour lire cette archive (pip install zstandard)")
+        with open(chemin, 'rb') as f:
+            return zstandard.ZstdDecompressor().decompress(f.read()).decode('utf-8')
+    with gzip.open(chemin_objet(dossier, empreinte, '.html.gz'), 'rt', encoding='utf-8') as f:
+        return f.read()
+
+
+def lire_index(dossier):
+    """Entrées de l'index dans l'ordre des téléchargements (une ligne coupée par un crash est ignorée)"""
+    chemin = os.path.join(dossier, FICHIER_INDEX)
+    if not os.path.exists(chemin):
+        return
+    with open(chemin, 'r', encoding='utf-8') as f:
+        for ligne in f:
+            try:
+                yield json.loads(ligne)
+            except json.JSONDecodeError:
+                continue
+
+
+def dernieres_versions(dossier, depuis=None):
+    """
+    Dernière version archivée de chaque URL
+
+    Args:
+        depuis: Ne garder que les pages téléchargées à partir de cette date ISO
+
+    Returns:
+        {url: entrée de l'index}
+    """
+    pages = {}
+    for entree in lire_index(dossier):
+        if depuis is None or entree['date'] >= depuis:
+            pages[entree['url']] = entree
+    return pages
+
+
+class ArchiveHTML:
+    """Archive adressée par contenu des pages téléchargées, partagée entre les workers"""
+
+    def __init__(self, dossier, niveau=NIVEAU_ZSTD):
+        """
+        Args:
+            dossier: Dossier de l'archive (complétée si elle existe déjà)
+            niveau: Niveau de compression zstd (la compression se fait hors du chemin critique des pages)
+        """
+        self.dossier = dossier
+        self.niveau = niveau
+        os.makedirs(os.path.join(dossier, 'objets'), exist_ok=True)
+        if zstandard is None:
+            print("⚠️  zstandard absent: pages de l'archive compressées en gzip")
+
+        self.nb_pages = 0
+        self.nb_doublons = 0
+        self.octets_html = 0
+        self.octets_stockes = 0
+        self._local = threading.local()
+        self._verrou = threading.Lock()
+        self._index = open(os.path.join(dossier, FICHIER_INDEX), 'a', encoding='utf-8')
+
+    def compresser(self, donnees):
+        if zstandard is None:
+            return gzip.compress(donnees, compresslevel=9)
+        # Un compresseur zstd ne doit pas servir à deux threads à la fois
+        if not hasattr(self._local, 'compresseur'):
+            self._local.compresseur = zstandard.ZstdCompressor(level=self.niveau)
+        return self._local.compresseur.compress(donnees)
+
+    def stocker(self, empreinte, donnees):
+        """
+        Écrire l'objet s'il n'existe pas encore
+
+        Returns:
+            Octets écrits sur disque (0 si la page était déjà archivée)
+        """
+        chemin = chemin_objet(self.dossier, empreinte)
+        if os.path.exists(chemin):
+            return 0
+        os.makedirs(os.path.dirname(chemin), exist_ok=True)
+        compresse = self.compresser(donnees)
+        # Écriture atomique: un objet présent est toujours complet
+        temporaire = f'{chemin}.{threading.get_ident()}.tmp'
+        with open(temporaire, 'wb') as f:
+            f.write(compresse)
+        os.replace(temporaire, chemin)
+        return len(compresse)
+
+    def enregistrer(self, url, html, statut=200, entetes=None):
+        """
+        Archiver une page (même interface que CorpusHTML.enregistrer)
+
+        Returns:
+            L'empreinte du HTML
+        """
+        donnees = html.encode('utf-8')
+        empreinte = hashlib.sha256(donnees).hexdigest()
+        octets = self.stocker(empreinte, donnees)
+        entree = {
+            'url': url,
+            'date': datetime.now().isoformat(),
+            'hash': empreinte,
+            'statut': statut,
+            'octets': len(donnees),
+        }
+        with self._verrou:
+            self._index.write(json.dumps(entree, ensure_ascii=False) + '\n')
+            self._index.flush()
+            self.nb_pages += 1
+            self.octets_html += len(donnees)
+            self.octets_stockes += octets
+            if not octets:
+                self.nb_doublons += 1
+        return empreinte
+
+    def lire(self, empreinte):
+        return lire_objet(self.dossier, empreinte)
+
+    def exporter(self, metriques):
+        """Pages archivées, doublons et taux de compression du run"""
+        with self._verrou:
+            metriques.definir('archive_pages', self.nb_pages)
+            metriques.definir('archive_doublons', self.nb_doublons)
+            metriques.definir('archive_octets_stockes', self.octets_stockes)
+            if self.octets_html:
+                metriques.definir('archive_ratio', round(self.octets_stockes / self.octets_html, 4))
+
+    def afficher(self):
+        with self._verrou:
+            ratio = f", {self.octets_stockes / self.octets_html:.1%} de la taille brute" if self.octets_html else ''
+            print(f"🗄️  Archive HTML: {self.nb_pages} pages dont {self.nb_doublons} déjà archivées, "
+                  f"{self.octets_stockes / 1024:.0f} Ko écrits{ratio}")
+
+    def fermer(self):
+        with self._verrou:
+            if not self._index.closed:
+                self._index.close()
@@ -0,0 +1,117 @@
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
+import threading
+import time
+
+# Conditions "page prête" par type de page.
+# Chaque condition est une liste de groupes: la page est prête quand chaque
+# groupe a au moins un élément présent (les sélecteurs d'un groupe sont des alternatives).
+CONDITIONS_PRETE = {
+    'liste': [
+        ['a[href*="/annonces/"]', '.property-card', '.listing-card', 'article[class*="card"]'],
+    ],
+    'annonce': [
+        ['h1'],
+        ['.price', '[class*="Price"]', '[class*="prix"]', 'span[class*="amount"]'],
+    ],
+}
+
+
+class AttentePage:
+    """Attendre qu'une page soit prête au lieu d'un time.sleep fixe, et mesurer chaque attente"""
+
+    def __init__(self, conditions=None, timeout=10, intervalle=0.1):
+        """
+        Args:
+            conditions: {type_page: [[sélecteurs], ...]} (défaut: CONDITIONS_PRETE)
+            timeout: Attente maximale en secondes
+            intervalle: Fréquence de vérification en secondes
+        """
+        self.conditions = dict(CONDITIONS_PRETE if conditions is None else conditions)
+        self.timeout = timeout
+        self.intervalle = intervalle
+        self.durees = {}
+        self.timeouts = {}
+        self._verrou = threading.Lock()
+
+    def _enregistrer(self, type_page, duree, prete):
+        with self._verrou:
+            self.durees.setdefault(type_page, []).append(duree)
+            if not prete:
+                self.timeouts[type_page] = self.timeouts.get(type_page, 0) + 1
+
+    def attendre(self, driver, type_page, conditions=None):
+        """
+        Attendre que la page soit prête
+
+        Returns:
+            True si la condition est remplie, False après le timeout
+        """
+        groupes = conditions if conditions is not None else self.conditions.get(type_page, [])
+        attentes = [
+            EC.presence_of_element_located((By.CSS_SELECTOR, ', '.join(groupe)))
+            for groupe in groupes if groupe
+        ]
+
+        debut = time.monotonic()
+        prete = True
+        if attentes:
+            try:
+                WebDriverWait(driver, self.timeout, poll_frequency=self.intervalle).until(
+                    EC.all_of(*attentes)
+                )
+            except TimeoutException:
+                prete = False
+
+        self._enregistrer(type_page, time.monotonic() - debut, prete)
+        return prete
+
+    def attendre_disparition(self, driver, element, type_page='cookies', timeout=2):
+        """Attendre qu'un élément (ex: bandeau cookies) disparaisse après un clic"""
+        debut = time.monotonic()
+        prete = True
+        try:
+            WebDriverWait(driver, timeout, poll_frequency=self.intervalle).until(
+                EC.invisibility_of_element(element)
+            )
+        except TimeoutException:
+            prete = False
+        self._enregistrer(type_page, time.monotonic() - debut, prete)
+        return prete
+
+    def attendre_remplacement(self, driver, element, type_page, conditions=None):
+        """Attendre qu'un élément de l'ancienne page soit détaché, puis que la nouvelle soit prête"""
+        try:
+            WebDriverWait(driver, self.timeout, poll_frequency=self.intervalle).until(
+                EC.staleness_of(element)
+            )
+        except TimeoutException:
+            pass
+        return self.attendre(driver, type_page, conditions)
+
+    def resume(self):
+        """Statistiques des attentes par type de page"""
+        with self._verrou:
+            return {
+                type_page: {
+                    'nombre': len(durees),
+                    'total': round(sum(durees), 3),
+                    'moyenne': round(sum(durees) / len(durees), 3),
+                    'max': round(max(durees), 3),
+                    'timeouts': self.timeouts.get(type_page, 0),
+                }
+                for type_page, durees in self.durees.items() if durees
+            }
+
+    def afficher_resume(self):
+        """Afficher le temps passé à attendre chaque type de page"""
+        resume = self.resume()
+        if not resume:
+            return
+        print("\n⏱️  Attentes de chargement:")
+        for type_page, stats in resume.items():
+            print(f"   - {type_page}: {stats['nombre']} pages, "
+                  f"moyenne {stats['moyenne']:.2f}s, max {stats['max']:.2f}s, "
+                  f"{stats['timeouts']} timeouts")
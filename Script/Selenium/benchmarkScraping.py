@@ -0,0 +1,177 @@
+"""
+Benchmark hors ligne du scraper Citya sur un corpus enregistré (--record)
+
+    python Script/Selenium/benchmarkScraping.py corpus.jsonl.gz --strategies http js selenium
+
+Pour chaque stratégie d'extraction, les pages de détail du corpus sont servies par un
+serveur local: le débit (pages/s) et la latence d'extraction de chaque champ sont
+reproductibles, sans réseau.
+"""
+import argparse
+import json
+import os
+import re
+import time
+
+from selenium.webdriver.common.by import By
+
+from SeleniumImmoV2 import CityaScraper, SELECTEURS_ANNONCE, SELECTEURS_CARACTERISTIQUES, SELECTEURS_COMPLEMENTS
+from corpusHTML import ServeurReplay, charger_corpus
+from etatCrawl import reference_annonce
+from fileReessais import Disjoncteur
+from extractionJS import extraire_via_js
+from fetcherHTTP import extraire_champs_html, parser_html
+from metriquesCrawl import resumer
+
+STRATEGIES = ('http', 'js', 'selenium')
+CHAMPS = {**SELECTEURS_ANNONCE, **SELECTEURS_COMPLEMENTS}
+
+
+def pages_annonces(pages, motif=None):
+    """URLs des pages de détail du corpus (référence d'annonce dans l'URL, ou motif donné)"""
+    if motif:
+        regex = re.compile(motif)
+        urls = [url for url in pages if regex.search(url)]
+    else:
+        urls = [url for url in pages if reference_annonce(url)]
+    return [url for url in urls if pages[url]['statut'] == 200]
+
+
+def texte_selenium(driver, selecteurs):
+    """Premier texte non vide, un find_element par sélecteur (comme extraire_champs_selenium)"""
+    for selecteur in selecteurs:
+        try:
+            texte = driver.find_element(By.CSS_SELECTOR, selecteur).text.strip()
+            if texte:
+                return texte
+        except Exception:
+            continue
+    return None
+
+
+def textes_selenium(driver, selecteurs):
+    valeurs = []
+    for selecteur in selecteurs:
+        for element in driver.find_elements(By.CSS_SELECTOR, selecteur):
+            texte = element.text.strip()
+            if texte and texte not in valeurs:
+                valeurs.append(texte)
+    return valeurs
+
+
+def mesurer_champs(strategie, driver, page, latences):
+    """Temps d'extraction de chaque champ pris isolément, sur la page déjà chargée"""
+    arbre = parser_html(page['html'], page['url']) if strategie == 'http' else None
+
+    for champ, selecteurs in list(CHAMPS.items()) + [('caracteristiques', SELECTEURS_CARACTERISTIQUES)]:
+        liste = champ == 'caracteristiques'
+        debut = time.monotonic()
+        if strategie == 'http':
+            extraire_champs_html(arbre, **({'listes': {champ: selecteurs}} if liste else {'champs': {champ: selecteurs}}))
+        elif strategie == 'js':
+            extraire_via_js(driver, **({'listes': {champ: selecteurs}} if liste else {'champs': {champ: selecteurs}}))
+        else:
+            textes_selenium(driver, selecteurs) if liste else texte_selenium(driver, selecteurs)
+        latences.setdefault(champ, []).append(time.monotonic() - debut)
+
+
+def benchmarker(strategie, urls, pages, serveur, headless=True):
+    """Scraper toutes les pages avec une stratégie et mesurer débit et latences par champ"""
+    print(f"\n🏁 Stratégie '{strategie}' sur {len(urls)} pages")
+    scraper = CityaScraper(
+        headless=headless,
+        delai_politesse=0,
+        mode_extraction='selenium' if strategie == 'selenium' else 'js',
+        http_first=strategie == 'http',
+        # En 'http', pas de repli navigateur: on mesure lxml seul
+        champs_requis=(),
+        pipeline=False,
+        # Le serveur local ne sature pas: pas de concurrence ni de délai adaptés
+        controle_aimd=False,
+    )
+    # Un disjoncteur ouvert renverrait None sans charger les pages suivantes et gonflerait le débit
+    scraper.disjoncteur = Disjoncteur(min_requetes=float('inf'))
+    latences = {}
+    duree = 0.0
+    reussies = 0
+    champs_remplis = []
+    try:
+        for url in urls:
+            debut = time.monotonic()
+            data = scraper.scraper_annonce(serveur.url_locale(url))
+            duree += time.monotonic() - debut
+            if data:
+                reussies += 1
+                champs_remplis.append(len(data) - 2)
+            # Hors du chronomètre de débit: la page est encore chargée dans le navigateur
+            mesurer_champs(strategie, scraper.driver, pages[url], latences)
+    finally:
+        scraper.fermer()
+
+    return {
+        'pages': len(urls),
+        'reussies': reussies,
+        'echecs': len(urls) - reussies,
+        'duree_secondes': round(duree, 3),
+        'pages_par_seconde': round(len(urls) / duree, 2) if duree > 0 else 0.0,
+        'champs_remplis': resumer(champs_remplis),
+        'phases': {
+            phase: stats
+            for phase, stats in scraper.metriques.resume()['par_type_page'].get('annonce', {}).items()
+            if phase in ('navigation', 'attente', 'extraction', 'total')
+        },
+        'latence_champs': {champ: resumer(valeurs) for champ, valeurs in latences.items()},
+    }
+
+
+def afficher_rapport(resultats):
+    print("\n" + "=" * 60)
+    print("📊 BENCHMARK D'EXTRACTION")
+    print("=" * 60)
+    for strategie, r in resultats.items():
+        print(f"\n  {strategie}: {r['pages_par_seconde']:.2f} pages/s "
+              f"({r['reussies']}/{r['pages']} pages, {r['echecs']} échecs, {r['duree_secondes']:.1f}s)")
+
+    champs = sorted({c for r in resultats.values() for c in r['latence_champs']})
+    print("\n  Latence p50 par champ (ms)")
+    print(f"  {'champ':<22}" + ''.join(f"{s:>12}" for s in resultats))
+    for champ in champs:
+        ligne = ''.join(
+            f"{r['latence_champs'][champ]['p50'] * 1000:>12.2f}" if champ in r['latence_champs'] else f"{'-':>12}"
+            for r in resultats.values()
+        )
+        print(f"  {champ:<22}{ligne}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark hors ligne des stratégies d'extraction")
+    parser.add_argument('corpus', help='Corpus enregistré avec --record (.jsonl.gz)')
+    parser.add_argument(
+        '--strategies',
+        nargs='+',
+        choices=STRATEGIES,
+        default=list(STRATEGIES),
+        help="Stratégies d'extraction à comparer (défaut: toutes)"
+    )
+    parser.add_argument('--max-pages', type=int, help='Nombre max de pages de détail')
+    parser.add_argument('--motif', help='Regex des URLs de détail (défaut: référence Citya dans l\'URL)')
+    parser.add_argument('--output', help='Fichier JSON du rapport')
+    args = parser.parse_args()
+
+    pages = charger_corpus(args.corpus)
+    urls = pages_annonces(pages, args.motif)[:args.max_pages]
+    if not urls:
+        raise SystemExit(f"❌ Aucune page de détail dans '{args.corpus}'")
+
+    serveur = ServeurReplay(pages).demarrer()
+    try:
+        resultats = {strategie: benchmarker(strategie, urls, pages, serveur) for strategie in args.strategies}
+    finally:
+        serveur.arreter()
+
+    afficher_rapport(resultats)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(resultats, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 Rapport écrit dans '{args.output}'")
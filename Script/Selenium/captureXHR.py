@@ -0,0 +1,82 @@
+import base64
+import json
+import re
+
+from donneesStructurees import annonces_json
+
+
+def activer_journal_reseau(chrome_options):
+    """Activer les logs de performance Chrome (événements réseau CDP) sur des options existantes"""
+    chrome_options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+    return chrome_options
+
+
+class CaptureXHR:
+    """
+    Récupérer les réponses JSON des appels d'API faits par une page
+
+    Les logs de performance donnent les requêtes terminées; le corps des réponses
+    dont l'URL correspond à un motif est lu avec Network.getResponseBody.
+    """
+
+    def __init__(self, motifs):
+        """
+        Args:
+            motifs: Expressions régulières des URLs d'API à capturer
+        """
+        self.motifs = [re.compile(motif) for motif in motifs]
+        self.nb_reponses = 0
+        self.nb_annonces = 0
+
+    def preparer(self, driver):
+        driver.execute_cdp_cmd('Network.enable', {})
+
+    def lire_reponses(self, driver):
+        """
+        Corps JSON des réponses capturées depuis le dernier appel (le journal est vidé à la lecture)
+
+        Returns:
+            Liste de (url, objet JSON)
+        """
+        reponses = {}
+        terminees = set()
+        for entree in driver.get_log('performance'):
+            try:
+                message = json.loads(entree['message'])['message']
+            except (KeyError, ValueError):
+                continue
+            params = message.get('params', {})
+            if message.get('method') == 'Network.responseReceived':
+                reponse = params.get('response', {})
+                if 'json' in reponse.get('mimeType', '') and any(m.search(reponse.get('url', '')) for m in self.motifs):
+                    reponses[params['requestId']] = reponse['url']
+            elif message.get('method') == 'Network.loadingFinished':
+                terminees.add(params.get('requestId'))
+
+        resultats = []
+        for id_requete, url in reponses.items():
+            if id_requete not in terminees:
+                continue
+            try:
+                corps = driver.execute_cdp_cmd('Network.getResponseBody', {'requestId': id_requete})
+                texte = corps['body']
+                if corps.get('base64Encoded'):
+                    texte = base64.b64decode(texte).decode('utf-8')
+                resultats.append((url, json.loads(texte)))
+            except Exception:
+                # Corps déjà libéré par le navigateur ou réponse non JSON
+                continue
+        self.nb_reponses += len(resultats)
+        return resultats
+
+    def lire_annonces(self, driver, url_page):
+        """Annonces trouvées dans les réponses d'API de la page courante, {url: champs}"""
+        annonces = {}
+        for _, objet in self.lire_reponses(driver):
+            annonces.update(annonces_json([objet], url_page))
+        self.nb_annonces += len(annonces)
+        return annonces
+
+    def afficher(self):
+        if self.nb_reponses:
+            print(f"\n📡 Capture XHR: {self.nb_reponses} réponses d'API, {self.nb_annonces} annonces")
@@ -0,0 +1,179 @@
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+# Statut HTTP de la page courante (Chrome >= 109) et page de blocage anti-bot,
+# lus en un seul execute_script. Seuls les marqueurs propres aux pages de
+# challenge comptent: un reCAPTCHA de formulaire de contact n'est pas un blocage.
+SCRIPT_DIAGNOSTIC = r"""
+var nav = performance.getEntriesByType('navigation')[0];
+var titre = (document.title || '').toLowerCase();
+return {
+    statut: nav && nav.responseStatus ? nav.responseStatus : null,
+    captcha: !!document.querySelector('#challenge-form, #cf-challenge-running, iframe[src*="captcha-delivery"]')
+        || /captcha|just a moment|attention required|access denied|accès refusé|too many requests/.test(titre)
+};
+"""
+
+
+def diagnostiquer_page(driver):
+    """
+    Returns:
+        (statut HTTP ou None si inconnu, True si la page est un challenge anti-bot)
+    """
+    try:
+        info = driver.execute_script(SCRIPT_DIAGNOSTIC) or {}
+    except Exception:
+        return None, False
+    return info.get('statut'), bool(info.get('captcha'))
+
+
+def est_congestion(statut=None, captcha=False, timeout=False):
+    """429, erreur serveur, timeout ou captcha: le site demande de ralentir"""
+    return timeout or captcha or statut == 429 or (statut is not None and statut >= 500)
+
+
+def erreur_page(statut=None, captcha=False):
+    """
+    Raison pour laquelle la page chargée n'est pas l'annonce attendue
+
+    Une page dont les éléments attendus ne sont pas apparus à temps reste
+    exploitable (un sélecteur de prix qui ne correspond pas n'en fait pas un échec).
+
+    Returns:
+        Le message d'erreur, ou None si la page est exploitable
+    """
+    if captcha:
+        return "page de challenge anti-bot"
+    if statut is not None and statut >= 400:
+        return f"statut HTTP {statut}"
+    return None
+
+
+class ControleurAIMD:
+    """
+    Concurrence et délai par domaine réglés comme le contrôle de congestion TCP
+
+    Tant que les pages arrivent vite et sans erreur, la fenêtre (pages simultanées)
+    grandit d'environ 1 par fenêtre de succès et le délai entre requêtes diminue
+    d'un pas fixe (augmentation additive). Sur 429/5xx, timeout ou captcha, la
+    fenêtre est multipliée par `facteur` et le délai doublé (diminution
+    multiplicative), au plus une fois par aller-retour.
+    """
+
+    def __init__(self, concurrence_initiale=1, delai_initial=2.0, concurrence_min=1, concurrence_max=8,
+                 delai_min=0.5, delai_max=30.0, latence_cible=4.0, facteur=0.5, pas_delai=0.1):
+        """
+        Args:
+            concurrence_initiale, delai_initial: Point de départ d'un domaine inconnu
+            latence_cible: Au-delà du double de cette latence (secondes), la page compte comme un signal de congestion
+            facteur: Facteur de réduction de la fenêtre en cas de congestion
+            pas_delai: Diminution du délai après chaque page rapide (secondes)
+        """
+        self.concurrence_initiale = concurrence_initiale
+        self.delai_initial = delai_initial
+        self.concurrence_min = concurrence_min
+        self.concurrence_max = concurrence_max
+        self.delai_min = delai_min
+        self.delai_max = delai_max
+        self.latence_cible = latence_cible
+        self.facteur = facteur
+        self.pas_delai = pas_delai
+        self.domaines = {}
+        self._verrou = threading.Lock()
+        self._condition = threading.Condition(self._verrou)
+
+    def _domaine(self, domaine):
+        if domaine not in self.domaines:
+            self.domaines[domaine] = {
+                'fenetre': float(self.concurrence_initiale),
+                'delai': self.delai_initial,
+                'concurrence_max': self.concurrence_max,
+                'en_cours': 0,
+                'pages': 0,
+                'congestions': 0,
+                'reductions': 0,
+                'derniere_reduction': 0.0,
+            }
+        return self.domaines[domaine]
+
+    def ajouter(self, domaine, concurrence, delai, concurrence_max=None):
+        """Point de départ d'un domaine (valeurs statiques de la configuration)"""
+        with self._verrou:
+            d = self._domaine(domaine)
+            d['concurrence_max'] = concurrence_max or self.concurrence_max
+            d['fenetre'] = float(max(self.concurrence_min, min(concurrence, d['concurrence_max'])))
+            d['delai'] = min(self.delai_max, max(self.delai_min, delai))
+
+    def signaler(self, domaine, latence, congestion=False):
+        """Ajuster le domaine après une page chargée en `latence` secondes"""
+        with self._condition:
+            d = self._domaine(domaine)
+            d['pages'] += 1
+            if congestion or latence > 2 * self.latence_cible:
+                d['congestions'] += 1
+                maintenant = time.monotonic()
+                # Les échecs des requêtes déjà parties ne réduisent pas une deuxième fois
+                if maintenant - d['derniere_reduction'] >= max(latence, d['delai']):
+                    d['derniere_reduction'] = maintenant
+                    d['reductions'] += 1
+                    d['fenetre'] = max(self.concurrence_min, d['fenetre'] * self.facteur)
+                    d['delai'] = min(self.delai_max, max(d['delai'] * 2, self.delai_min))
+                    print(f"📉 {domaine}: congestion, {int(d['fenetre'])} en parallèle, {d['delai']:.1f}s entre requêtes")
+            elif latence <= self.latence_cible:
+                d['fenetre'] = min(d['concurrence_max'], d['fenetre'] + 1 / d['fenetre'])
+                d['delai'] = max(self.delai_min, d['delai'] - self.pas_delai)
+                self._condition.notify_all()
+
+    def concurrence(self, domaine):
+        """Nombre de pages du domaine autorisées en même temps"""
+        with self._verrou:
+            return max(self.concurrence_min, int(self._domaine(domaine)['fenetre']))
+
+    def delai(self, domaine):
+        """Délai actuel entre deux requêtes vers le domaine (secondes)"""
+        with self._verrou:
+            return self._domaine(domaine)['delai']
+
+    @contextmanager
+    def creneau(self, domaine):
+        """Bloquer (threads) tant que le domaine a déjà autant de pages en cours que sa fenêtre"""
+        with self._condition:
+            d = self._domaine(domaine)
+            while d['en_cours'] >= max(self.concurrence_min, int(d['fenetre'])):
+                self._condition.wait()
+            d['en_cours'] += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                d['en_cours'] -= 1
+                self._condition.notify_all()
+
+    def etat(self):
+        """{domaine: état courant}, pour les métriques du run"""
+        with self._verrou:
+            return {
+                domaine: {
+                    'concurrence': max(self.concurrence_min, int(d['fenetre'])),
+                    'delai_secondes': round(d['delai'], 2),
+                    'pages': d['pages'],
+                    'congestions': d['congestions'],
+                    'reductions': d['reductions'],
+                }
+                for domaine, d in self.domaines.items()
+            }
+
+    def exporter(self, metriques):
+        """Écrire l'état de chaque domaine dans les valeurs du run (gauges Prometheus)"""
+        for domaine, etat in self.etat().items():
+            nom = re.sub(r'\W', '_', domaine)
+            for cle, valeur in etat.items():
+                metriques.definir(f'aimd_{cle}_{nom}', valeur)
+
+    def afficher(self):
+        print("\n🚦 Contrôle AIMD par domaine:")
+        for domaine, etat in self.etat().items():
+            print(f"   - {domaine}: {etat['concurrence']} en parallèle, {etat['delai_secondes']}s entre requêtes, "
+                  f"{etat['congestions']} signaux de congestion sur {etat['pages']} pages")
@@ -0,0 +1,152 @@
+import gzip
+import json
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+
+class CorpusHTML:
+    """Enregistrer les pages visitées (URL, statut, en-têtes, HTML) dans un JSONL compressé"""
+
+    def __init__(self, chemin):
+        """
+        Args:
+            chemin: Fichier .jsonl.gz du corpus (complété s'il existe déjà)
+        """
+        self.chemin = chemin
+        self.nb_pages = 0
+        self._verrou = threading.Lock()
+        self._fichier = gzip.open(chemin, 'at', encoding='utf-8')
+
+    def enregistrer(self, url, html, statut=200, entetes=None):
+        """Ajouter une page au corpus (la dernière version d'une URL l'emporte au rejeu)"""
+        page = {
+            'url': url,
+            'statut': statut,
+            'entetes': dict(entetes or {'Content-Type': 'text/html; charset=utf-8'}),
+            'date': datetime.now().isoformat(),
+            'html': html,
+        }
+        with self._verrou:
+            self._fichier.write(json.dumps(page, ensure_ascii=False) + '\n')
+            self.nb_pages += 1
+
+    def fermer(self):
+        with self._verrou:
+            if not self._fichier.closed:
+                self._fichier.close()
+
+
+def lire_corpus(chemin):
+    """Lire les pages d'un corpus (un membre gzip coupé par un crash arrête la lecture)"""
+    with gzip.open(chemin, 'rt', encoding='utf-8') as f:
+        try:
+            for ligne in f:
+                if ligne.strip():
+                    yield json.loads(ligne)
+        except (EOFError, json.JSONDecodeError):
+            return
+
+
+def charger_corpus(chemin):
+    """Pages du corpus indexées par URL"""
+    return {page['url']: page for page in lire_corpus(chemin)}
+
+
+class ServeurReplay:
+    """
+    Servir un corpus depuis un serveur HTTP local
+
+    https://www.citya.com/annonces/x devient http://127.0.0.1:<port>/www.citya.com/annonces/x :
+    le nom de domaine reste dans l'URL, donc les filtres des scrapers fonctionnent sans modification.
+    """
+
+    def __init__(self, pages, hote='127.0.0.1', port=0):
+        """
+        Args:
+            pages: Pages indexées par URL (charger_corpus)
+            port: Port d'écoute (0 = port libre choisi par le système)
+        """
+        self.pages = {}
+        for url, page in pages.items():
+            morceaux = urlsplit(url)
+            chemin = morceaux.path or '/'
+            if morceaux.query:
+                chemin += '?' + morceaux.query
+            self.pages[(morceaux.netloc, chemin)] = page
+        self.hotes = sorted({netloc for netloc, _ in self.pages}, key=len, reverse=True)
+
+        self.serveur = ThreadingHTTPServer((hote, port), self._gestionnaire())
+        self.serveur.daemon_threads = True
+        self.origine = f"http://{hote}:{self.serveur.server_address[1]}"
+        self._thread = None
+
+    def url_locale(self, url):
+        """URL du serveur local correspondant à une URL d'origine"""
+        morceaux = urlsplit(url)
+        locale = f"{self.origine}/{morceaux.netloc}{morceaux.path or '/'}"
+        return locale + ('?' + morceaux.query if morceaux.query else '')
+
+    def reecrire(self, html):
+        """Faire pointer les liens absolus du corpus vers le serveur local"""
+        for netloc in self.hotes:
+            for schema in ('https://', 'http://'):
+                html = html.replace(f"{schema}{netloc}", f"{self.origine}/{netloc}")
+        return html
+
+    def trouver(self, chemin, referer=None):
+        """Page correspondant à un chemin demandé au serveur (None si absente du corpus)"""
+        netloc, _, reste = chemin.lstrip('/').partition('/')
+        if netloc in self.hotes:
+            return self.pages.get((netloc, '/' + reste))
+
+        # Lien relatif à la racine (/annonces/x): même domaine que la page qui l'a demandé
+        if referer and referer.startswith(self.origine + '/'):
+            netloc_referer = referer[len(self.origine) + 1:].split('/', 1)[0]
+            if (netloc_referer, chemin) in self.pages:
+                return self.pages[(netloc_referer, chemin)]
+        return next((self.pages[(n, chemin)] for n in self.hotes if (n, chemin) in self.pages), None)
+
+    def _gestionnaire(self):
+        serveur = self
+
+        class Gestionnaire(BaseHTTPRequestHandler):
+            def do_GET(self):
+                page = serveur.trouver(self.path, self.headers.get('Referer'))
+                if page is None:
+                    self.send_error(404, 'Page absente du corpus')
+                    return
+
+                corps = serveur.reecrire(page['html']).encode('utf-8')
+                self.send_response(page['statut'])
+                type_contenu = next(
+                    (v for k, v in page['entetes'].items() if k.lower() == 'content-type'),
+                    'text/html'
+                )
+                # Le HTML du corpus est du texte, toujours renvoyé en UTF-8
+                self.send_header('Content-Type', type_contenu.split(';')[0] + '; charset=utf-8')
+                self.send_header('Content-Length', str(len(corps)))
+                self.end_headers()
+                self.wfile.write(corps)
+
+            def do_HEAD(self):
+                page = serveur.trouver(self.path, self.headers.get('Referer'))
+                self.send_response(page['statut'] if page else 404)
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                pass
+
+        return Gestionnaire
+
+    def demarrer(self):
+        """Lancer le serveur dans un thread en arrière-plan"""
+        self._thread = threading.Thread(target=self.serveur.serve_forever, daemon=True)
+        self._thread.start()
+        print(f"📼 Rejeu de {len(self.pages)} pages sur {self.origine}")
+        return self
+
+    def arreter(self):
+        self.serveur.shutdown()
+        self.serveur.server_close()
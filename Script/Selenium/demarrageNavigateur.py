@@ -0,0 +1,174 @@
+import os
+import shutil
+import threading
+import time
+
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+
+# Démarrage à chaud de Chrome: le chromedriver est résolu une seule fois et gardé
+# en cache sur disque, et chaque navigateur reprend un profil (user-data-dir)
+# persistant, avec ses cookies de consentement et son cache HTTP.
+
+_verrou = threading.Lock()
+_chromedriver = {}
+
+FICHIERS_VERROU = ('SingletonLock', 'SingletonSocket', 'SingletonCookie')
+
+
+def chemin_chromedriver(dossier_cache=None):
+    """
+    Chemin du chromedriver, résolu une seule fois par processus
+
+    Ordre: variable CHROMEDRIVER, chromedriver préinstallé (CHROMEWEBDRIVER des
+    runners GitHub, PATH), puis webdriver-manager avec son cache dans dossier_cache.
+
+    Returns:
+        Le chemin, ou None pour laisser Selenium Manager le trouver
+    """
+    with _verrou:
+        if dossier_cache not in _chromedriver:
+            _chromedriver[dossier_cache] = _resoudre_chromedriver(dossier_cache)
+        return _chromedriver[dossier_cache]
+
+
+def _resoudre_chromedriver(dossier_cache):
+    if os.environ.get('CHROMEDRIVER'):
+        return os.environ['CHROMEDRIVER']
+    if os.environ.get('CHROMEWEBDRIVER'):
+        chemin = os.path.join(os.environ['CHROMEWEBDRIVER'], 'chromedriver')
+        if os.path.exists(chemin):
+            return chemin
+    chemin = shutil.which('chromedriver')
+    if chemin:
+        return chemin
+    try:
+        from webdriver_manager.chrome import ChromeDriverManager
+        from webdriver_manager.core.driver_cache import DriverCacheManager
+    except ImportError:
+        return None
+    try:
+        # Pas de nouveau téléchargement tant que la version en cache a moins de 7 jours
+        cache = DriverCacheManager(root_dir=dossier_cache, valid_range=7)
+        return ChromeDriverManager(cache_manager=cache).install()
+    except Exception as e:
+        print(f"⚠️  webdriver-manager indisponible ({e}), repli sur Selenium Manager")
+        return None
+
+
+def processus_actif(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def profil_occupe(chemin):
+    """
+    True si un Chrome vivant utilise ce profil
+
+    Sous Linux, SingletonLock est un lien symbolique 'hôte-pid'; le verrou laissé
+    par un Chrome tué est supprimé pour que le profil puisse être repris.
+    """
+    try:
+        cible = os.readlink(os.path.join(chemin, 'SingletonLock'))
+    except OSError:
+        return False
+    pid = cible.rsplit('-', 1)[-1]
+    if pid.isdigit() and processus_actif(int(pid)):
+        return True
+    for nom in FICHIERS_VERROU:
+        try:
+            os.remove(os.path.join(chemin, nom))
+        except OSError:
+            pass
+    return False
+
+
+class ProfilsNavigateur:
+    """Profils Chrome persistants, un par navigateur ouvert en même temps (profil-0, profil-1...)"""
+
+    def __init__(self, dossier, nom='profil'):
+        self.dossier = dossier
+        self.nom = nom
+        self._reserves = set()
+        self._verrou = threading.Lock()
+
+    def reserver(self):
+        """Premier profil libre, créé au besoin"""
+        with self._verrou:
+            numero = 0
+            while True:
+                chemin = os.path.join(self.dossier, f'{self.nom}-{numero}')
+                if chemin not in self._reserves and not profil_occupe(chemin):
+                    os.makedirs(chemin, exist_ok=True)
+                    self._reserves.add(chemin)
+                    return chemin
+                numero += 1
+
+    def liberer(self, chemin):
+        with self._verrou:
+            self._reserves.discard(chemin)
+
+
+class DemarreurChrome:
+    """Créer les navigateurs d'un scraper et mesurer leur temps de démarrage"""
+
+    def __init__(self, dossier=None, nom='profil', metriques=None):
+        """
+        Args:
+            dossier: Dossier du cache de chromedriver et des profils (None = profils jetables)
+            nom: Préfixe des profils, pour que deux scrapers ne partagent pas les mêmes
+            metriques: MetriquesCrawl où enregistrer les temps de démarrage
+        """
+        self.dossier = dossier
+        self.profils = ProfilsNavigateur(os.path.join(dossier, 'profils'), nom) if dossier else None
+        self.metriques = metriques
+        self.durees = []
+        self._verrou = threading.Lock()
+
+    def demarrer(self, chrome_options):
+        """Lancer Chrome avec le chromedriver en cache et un profil persistant libre"""
+        debut = time.monotonic()
+        profil = self.profils.reserver() if self.profils else None
+        if profil:
+            chrome_options.add_argument(f'--user-data-dir={profil}')
+
+        chemin = chemin_chromedriver(os.path.join(self.dossier, 'drivers') if self.dossier else None)
+        try:
+            driver = webdriver.Chrome(
+                service=Service(executable_path=chemin) if chemin else Service(),
+                options=chrome_options
+            )
+        except Exception:
+            if profil:
+                self.profils.liberer(profil)
+            raise
+
+        if profil:
+            # Le profil redevient disponible quand le navigateur est fermé
+            quitter = driver.quit
+
+            def quitter_et_liberer():
+                try:
+                    quitter()
+                finally:
+                    self.profils.liberer(profil)
+
+            driver.quit = quitter_et_liberer
+
+        self.enregistrer(time.monotonic() - debut)
+        return driver
+
+    def enregistrer(self, duree):
+        with self._verrou:
+            self.durees.append(duree)
+            durees = list(self.durees)
+        if self.metriques:
+            self.metriques.definir('demarrage_navigateur_nb', len(durees))
+            self.metriques.definir('demarrage_navigateur_premier_s', round(durees[0], 3))
+            self.metriques.definir('demarrage_navigateur_moyen_s', round(sum(durees) / len(durees), 3))
+            self.metriques.definir('demarrage_navigateur_max_s', round(max(durees), 3))
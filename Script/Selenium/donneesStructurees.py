@@ -0,0 +1,325 @@
+import json
+import re
+from urllib.parse import urljoin, urlsplit
+
+from etatCrawl import cle_annonce, reference_annonce
+
+# Données structurées embarquées dans les pages d'annonce: JSON-LD (schema.org)
+# et état d'hydratation des frameworks (Next.js, Nuxt, état Redux initial...).
+# Un seul parse JSON par page au lieu de dizaines de requêtes DOM; les sélecteurs
+# CSS ne servent plus qu'aux champs absents de ces données. Une page d'annonce
+# embarque souvent d'autres annonces (similaires, récemment vues...): seul l'objet
+# qui désigne la page elle-même (référence ou lien) est retenu.
+
+SCRIPT_DONNEES = r"""
+var payloads = [];
+document.querySelectorAll('script[type="application/ld+json"], script#__NEXT_DATA__')
+    .forEach(function (s) {
+        if (s.textContent) {
+            payloads.push(s.textContent);
+        }
+    });
+['__NUXT__', '__INITIAL_STATE__', '__PRELOADED_STATE__', '__APOLLO_STATE__'].forEach(function (nom) {
+    try {
+        if (window[nom]) {
+            payloads.push(JSON.stringify(window[nom]));
+        }
+    } catch (e) {}
+});
+return payloads;
+"""
+
+XPATH_DONNEES = (
+    '//script[@type="application/ld+json"]/text()'
+    ' | //script[@id="__NEXT_DATA__"]/text()'
+)
+
+# Types schema.org qui décrivent un bien ou son annonce
+TYPES_ANNONCE = {
+    'Offer', 'RealEstateListing', 'Residence', 'Accommodation', 'Apartment',
+    'House', 'SingleFamilyResidence',
+}
+
+# Noms de clés rencontrés dans les états d'hydratation, par champ
+CLES_CHAMPS = {
+    'titre': ['title', 'titre', 'name'],
+    'prix': ['price', 'prix', 'priceValue'],
+    'surface': ['surface', 'livingArea', 'surfaceArea', 'floorSize', 'area'],
+    'pieces': ['rooms', 'nbRooms', 'roomsQuantity', 'numberOfRooms', 'pieces', 'nbPieces'],
+    'chambres': ['bedrooms', 'nbBedrooms', 'bedroomsQuantity', 'numberOfBedrooms', 'chambres'],
+    'ville': ['city', 'ville', 'addressLocality', 'cityLabel'],
+    'code_postal': ['postalCode', 'zipCode', 'zipcode', 'codePostal', 'code_postal'],
+    'description': ['description'],
+    'reference': ['reference', 'ref', 'sku'],
+    'dpe': ['dpe', 'energyClass', 'energyClassification', 'classeEnergie', 'dpeClass'],
+    'ges': ['ges', 'gesClass', 'greenhouseGasClass', 'ghgClass', 'classeGes'],
+    'etage': ['floor', 'etage'],
+    'annee_construction': ['yearBuilt', 'constructionYear', 'anneeConstruction'],
+}
+
+# Clés qui portent le lien vers la page de l'annonce
+CLES_URL = ('url', 'link', 'permalink', 'href', 'canonicalUrl', 'detailUrl')
+
+# Unité ajoutée aux valeurs numériques, pour garder le format du texte affiché
+UNITES = {'prix': '€', 'surface': 'm²', 'pieces': 'pièces', 'chambres': 'chambres'}
+
+
+def lire_payloads_driver(driver):
+    """Textes JSON embarqués dans la page courante, en un seul execute_script"""
+    try:
+        return driver.execute_script(SCRIPT_DONNEES) or []
+    except Exception:
+        return []
+
+
+def lire_payloads_html(arbre):
+    """Textes JSON embarqués dans une page parsée avec lxml"""
+    return [texte for texte in arbre.xpath(XPATH_DONNEES) if texte.strip()]
+
+
+def parser_payloads(payloads):
+    objets = []
+    for texte in payloads:
+        try:
+            objets.append(json.loads(texte))
+        except (TypeError, ValueError):
+            continue
+    return objets
+
+
+def parcourir(objet):
+    """Tous les dictionnaires contenus dans un objet JSON"""
+    pile = [objet]
+    while pile:
+        courant = pile.pop()
+        if isinstance(courant, dict):
+            yield courant
+            pile.extend(courant.values())
+        elif isinstance(courant, list):
+            pile.extend(courant)
+
+
+def types_schema(objet):
+    type_ld = objet.get('@type')
+    return set(type_ld) if isinstance(type_ld, list) else {type_ld}
+
+
+def valeur_simple(valeur):
+    """Valeur scalaire d'un champ ({'value': 65, 'unitCode': 'MTK'} -> 65)"""
+    if isinstance(valeur, dict):
+        for cle in ('value', 'price', 'amount', 'name', 'label'):
+            if cle in valeur:
+                return valeur_simple(valeur[cle])
+        return None
+    if isinstance(valeur, list):
+        return valeur_simple(valeur[0]) if valeur else None
+    if isinstance(valeur, bool):
+        return None
+    return valeur
+
+
+def formater(champ, valeur):
+    if isinstance(valeur, float) and valeur.is_integer():
+        valeur = int(valeur)
+    texte = ' '.join(str(valeur).split())
+    if not texte:
+        return None
+    if isinstance(valeur, (int, float)) and champ in UNITES:
+        texte = f"{texte} {UNITES[champ]}"
+    return texte
+
+
+def offres(objet):
+    """Offres rattachées à une annonce par sa clé 'offers' (objet ou liste)"""
+    valeur = objet.get('offers')
+    if isinstance(valeur, dict):
+        return [valeur]
+    if isinstance(valeur, list):
+        return [offre for offre in valeur if isinstance(offre, dict)]
+    return []
+
+
+def annonces_json_ld(objets):
+    """
+    Objets d'annonce du JSON-LD, chacun complété par les clés de son offre
+
+    Une annonce schema.org (Apartment, RealEstateListing...) porte souvent son
+    prix dans une Offer imbriquée ('offers'), ou est elle-même le bien d'une Offer
+    ('itemOffered'): les deux objets décrivent la même annonce et ne sont pas deux
+    candidats, leurs clés (url, sku, prix) sont réunies.
+    """
+    annonces = [o for racine in objets for o in parcourir(racine) if types_schema(o) & TYPES_ANNONCE]
+    rattachees = {id(offre) for annonce in annonces for offre in offres(annonce)}
+    rattachees |= {id(bien(annonce)) for annonce in annonces if bien(annonce)}
+    fusionnees = []
+    for annonce in annonces:
+        if id(annonce) in rattachees:
+            continue
+        complement = {}
+        for offre in offres(annonce):
+            complement.update({cle: valeur for cle, valeur in offre.items() if cle not in complement})
+        fusionnees.append({**complement, **annonce, **(bien(annonce) or {})})
+    return fusionnees
+
+
+def bien(offre):
+    """Bien d'annonce décrit par une Offer ('itemOffered'), ou None"""
+    objet = offre.get('itemOffered')
+    if isinstance(objet, dict) and types_schema(objet) & TYPES_ANNONCE:
+        return objet
+    return None
+
+
+def champs_json_ld(objets, url):
+    """
+    Champs d'une annonce décrite en JSON-LD schema.org
+
+    Un seul objet d'annonce est lu tel quel; s'il y en a plusieurs, seul celui
+    qui désigne la page est retenu (aucun ou plusieurs: pas de champs).
+    """
+    annonces = annonces_json_ld(objets)
+    if len(annonces) > 1:
+        annonces = objet_de_la_page(annonces, url, cles_reference=('sku', 'identifier'))
+    data = {}
+    for objet in annonces:
+        offre = objet.get('offers') if isinstance(objet.get('offers'), dict) else {}
+        adresse = objet.get('address') if isinstance(objet.get('address'), dict) else {}
+        candidats = {
+            'titre': objet.get('name'),
+            'prix': offre.get('price', objet.get('price')),
+            'surface': objet.get('floorSize'),
+            'pieces': objet.get('numberOfRooms'),
+            'chambres': objet.get('numberOfBedrooms'),
+            'ville': adresse.get('addressLocality'),
+            'code_postal': adresse.get('postalCode'),
+            'description': objet.get('description'),
+            'reference': objet.get('sku') or objet.get('identifier'),
+            'annee_construction': objet.get('yearBuilt'),
+        }
+        for champ, valeur in candidats.items():
+            valeur = valeur_simple(valeur)
+            if champ not in data and valeur not in (None, ''):
+                texte = formater(champ, valeur)
+                if texte:
+                    data[champ] = texte
+    return data
+
+
+def score_objet(objet):
+    """Nombre de champs d'annonce reconnus parmi les clés d'un dictionnaire"""
+    return sum(1 for cles in CLES_CHAMPS.values() if any(cle in objet for cle in cles))
+
+
+def designe_la_page(objet, url, cles_reference):
+    """True si la référence ou le lien de l'objet correspond à l'URL de la page"""
+    for cle in CLES_URL:
+        lien = objet.get(cle)
+        if isinstance(lien, str) and lien and cle_annonce(urljoin(url, lien)) == cle_annonce(url):
+            return True
+    segments = set(re.split(r'[/\-_.]', urlsplit(url).path.lower())) - {''}
+    reference_page = (reference_annonce(url) or '').lower()
+    for cle in cles_reference:
+        reference = objet.get(cle)
+        if isinstance(reference, (str, int)) and not isinstance(reference, bool):
+            reference = str(reference).strip().lower()
+            if reference and (reference == reference_page or reference in segments):
+                return True
+    return False
+
+
+def objet_de_la_page(candidats, url, cles_reference=CLES_CHAMPS['reference'] + ['id']):
+    """
+    L'objet annonce qui désigne la page, dans une liste (annonce + similaires...)
+
+    Returns:
+        [objet], ou [] si aucun ou plusieurs objets différents correspondent
+    """
+    retenus = []
+    for objet in candidats:
+        if designe_la_page(objet, url, cles_reference) and objet not in retenus:
+            retenus.append(objet)
+    return retenus if len(retenus) == 1 else []
+
+
+def champs_hydratation(objets, url):
+    """
+    Champs de l'objet annonce d'un état d'hydratation
+
+    Parmi les dictionnaires qui ont la forme d'une annonce, seul celui dont la
+    référence ou le lien correspond à la page est lu; ses sous-objets directs
+    (adresse, localisation...) complètent les champs.
+    """
+    candidats = [o for racine in objets for o in parcourir(racine) if '@type' not in o and score_objet(o) >= 3]
+    annonces = objet_de_la_page(candidats, url)
+    return champs_objet(annonces[0]) if annonces else {}
+
+
+def champs_objet(annonce):
+    """Champs d'un objet annonce JSON, complétés par ses sous-objets directs"""
+    sources = [annonce] + [v for v in annonce.values() if isinstance(v, dict)]
+    data = {}
+    for champ, cles in CLES_CHAMPS.items():
+        for source in sources:
+            cle = next((c for c in cles if c in source), None)
+            if cle is None:
+                continue
+            valeur = valeur_simple(source[cle])
+            if valeur not in (None, ''):
+                texte = formater(champ, valeur)
+                if texte:
+                    data[champ] = texte
+                    break
+    return data
+
+
+
+def annonces_json(objets, url_base):
+    """
+    Annonces contenues dans des réponses JSON d'API de recherche
+
+    Une liste de dictionnaires est une liste d'annonces quand ses éléments portent
+    au moins trois champs d'annonce; les éléments sans lien sont ignorés.
+
+    Returns:
+        {url absolue: {champ: texte}}
+    """
+    annonces = {}
+    for racine in objets:
+        pile = [racine]
+        while pile:
+            courant = pile.pop()
+            if isinstance(courant, dict):
+                pile.extend(courant.values())
+                continue
+            if not isinstance(courant, list):
+                continue
+            elements = [e for e in courant if isinstance(e, dict)]
+            if elements and all(score_objet(e) >= 3 for e in elements):
+                for element in elements:
+                    lien = next((element[c] for c in CLES_URL if isinstance(element.get(c), str)), None)
+                    if lien:
+                        annonces[urljoin(url_base, lien)] = champs_objet(element)
+            else:
+                pile.extend(courant)
+    return annonces
+
+
+def champs_structures(payloads, url, champs_connus=None):
+    """
+    Champs trouvés dans les données structurées d'une page
+
+    Args:
+        payloads: Textes JSON (lire_payloads_driver / lire_payloads_html)
+        url: URL de la page, pour ne lire que l'annonce qu'elle affiche
+        champs_connus: Ne garder que ces champs (None = tous)
+
+    Returns:
+        {champ: texte}, le JSON-LD l'emportant sur l'état d'hydratation
+    """
+    objets = parser_payloads(payloads)
+    if not objets:
+        return {}
+    data = {**champs_hydratation(objets, url), **champs_json_ld(objets, url)}
+    if champs_connus is not None:
+        data = {k: v for k, v in data.items() if k in champs_connus}
+    return data
@@ -0,0 +1,246 @@
+import sqlite3
+import hashlib
+import json
+import math
+import re
+import threading
+from datetime import datetime
+from urllib.parse import urlsplit, urlunsplit
+
+# Référence Citya en fin d'URL, ex: .../bordeaux-33063/TAPP923582
+REGEX_REFERENCE = re.compile(r'/([A-Z]{3,5}\d{4,})/?$')
+
+# Champs qui changent à chaque extraction et ne comptent pas dans le hash
+CHAMPS_VOLATILS = ('date_extraction',)
+
+# Disponibilité d'une annonce: vue en ligne (liste, extraction ou vérification),
+# retirée (404/410) ou redirigée ailleurs (vendue, remplacée par une recherche...)
+EN_LIGNE = 'en_ligne'
+RETIREE = 'retiree'
+REDIRIGEE = 'redirigee'
+
+
+def url_canonique(url):
+    """URL sans paramètres de suivi, fragment ni slash final"""
+    parties = urlsplit(url)
+    return urlunsplit((parties.scheme, parties.netloc.lower(), parties.path.rstrip('/'), '', ''))
+
+
+def reference_annonce(url):
+    """Référence de l'annonce extraite de l'URL (None si absente)"""
+    correspondance = REGEX_REFERENCE.search(urlsplit(url).path)
+    return correspondance.group(1) if correspondance else None
+
+
+def cle_annonce(url):
+    """Clé stable d'une annonce: la référence si elle existe, sinon l'URL canonique"""
+    return reference_annonce(url) or url_canonique(url)
+
+
+def hash_contenu(data):
+    """Hash du contenu extrait, indépendant de la date d'extraction"""
+    contenu = {k: v for k, v in data.items() if k not in CHAMPS_VOLATILS}
+    return hashlib.sha1(json.dumps(contenu, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+class EtatCrawl:
+    """État persistant du crawl (SQLite): annonces déjà vues et contenu de la dernière extraction"""
+
+    def __init__(self, chemin='citya_etat.sqlite'):
+        self.chemin = chemin
+        self._verrou = threading.Lock()
+        self.connexion = sqlite3.connect(chemin, check_same_thread=False)
+        self.connexion.execute("""
+            CREATE TABLE IF NOT EXISTS annonces (
+                cle TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                reference TEXT,
+                premiere_vue TEXT NOT NULL,
+                derniere_vue TEXT NOT NULL,
+                derniere_extraction TEXT,
+                hash_contenu TEXT,
+                donnees TEXT,
+                hash_carte TEXT,
+                disponibilite TEXT,
+                date_verification TEXT,
+                url_redirection TEXT
+            )
+        """)
+        # Bases créées avant la lecture des cartes de liste ou la vérification des annonces
+        colonnes = {ligne[1] for ligne in self.connexion.execute("PRAGMA table_info(annonces)")}
+        for colonne in ('hash_carte', 'disponibilite', 'date_verification', 'url_redirection'):
+            if colonne not in colonnes:
+                self.connexion.execute(f"ALTER TABLE annonces ADD COLUMN {colonne} TEXT")
+        self.connexion.commit()
+
+    def marquer_vues(self, urls):
+        """Enregistrer les URLs trouvées dans les pages de liste (première et dernière vue)"""
+        maintenant = datetime.now().isoformat()
+        with self._verrou:
+            self.connexion.executemany("""
+                INSERT INTO annonces (cle, url, reference, premiere_vue, derniere_vue, disponibilite)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(cle) DO UPDATE SET
+                    url = excluded.url,
+                    derniere_vue = excluded.derniere_vue,
+                    disponibilite = excluded.disponibilite
+            """, [(cle_annonce(url), url, reference_annonce(url), maintenant, maintenant, EN_LIGNE) for url in urls])
+            self.connexion.commit()
+
+    def selectionner_urls(self, urls, fraction_rafraichissement=0.1):
+        """
+        Choisir les URLs à visiter
+
+        Args:
+            urls: URLs trouvées dans les pages de liste
+            fraction_rafraichissement: Part des annonces déjà connues à revisiter
+                (les plus anciennement extraites d'abord)
+
+        Returns:
+            (urls_a_visiter, urls_connues_ignorees), dans l'ordre de la liste d'origine
+        """
+        extractions = self.dates_extraction([cle_annonce(url) for url in urls])
+
+        nouvelles = [url for url in urls if not extractions.get(cle_annonce(url))]
+        connues = [url for url in urls if extractions.get(cle_annonce(url))]
+
+        nb_rafraichir = math.ceil(len(connues) * fraction_rafraichissement)
+        a_rafraichir = set(sorted(connues, key=lambda url: extractions[cle_annonce(url)])[:nb_rafraichir])
+
+        a_visiter = set(nouvelles) | a_rafraichir
+        return (
+            [url for url in urls if url in a_visiter],
+            [url for url in urls if url not in a_visiter],
+        )
+
+    def cartes_modifiees(self, urls, cartes):
+        """
+        URLs dont la page de détail doit être visitée en mode 'hybrid'
+
+        Args:
+            cartes: {url: champs lus sur la carte de la page de liste}
+
+        Returns:
+            Les URLs jamais extraites, sans carte, ou dont la carte a changé, dans l'ordre d'origine
+        """
+        cles = [cle_annonce(url) for url in urls]
+        connues = {}
+        with self._verrou:
+            for i in range(0, len(cles), 500):
+                lot = cles[i:i + 500]
+                requete = (f"SELECT cle, hash_carte FROM annonces "
+                           f"WHERE derniere_extraction IS NOT NULL AND cle IN ({','.join('?' * len(lot))})")
+                connues.update(self.connexion.execute(requete, lot).fetchall())
+
+        return [
+            url for url in urls
+            if url not in cartes or connues.get(cle_annonce(url)) != hash_contenu(cartes[url])
+        ]
+
+    def enregistrer_cartes(self, cartes):
+        """Enregistrer le hash des cartes de liste {url: champs} (sans toucher aux données de détail)"""
+        maintenant = datetime.now().isoformat()
+        with self._verrou:
+            self.connexion.executemany("""
+                INSERT INTO annonces (cle, url, reference, premiere_vue, derniere_vue, hash_carte)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(cle) DO UPDATE SET
+                    derniere_vue = excluded.derniere_vue,
+                    hash_carte = excluded.hash_carte
+            """, [(cle_annonce(url), url, reference_annonce(url), maintenant, maintenant, hash_contenu(carte))
+                  for url, carte in cartes.items()])
+            self.connexion.commit()
+
+    def dates_extraction(self, cles):
+        """Date de dernière extraction pour chaque clé connue"""
+        dates = {}
+        with self._verrou:
+            for i in range(0, len(cles), 500):
+                lot = cles[i:i + 500]
+                requete = f"SELECT cle, derniere_extraction FROM annonces WHERE cle IN ({','.join('?' * len(lot))})"
+                dates.update(self.connexion.execute(requete, lot).fetchall())
+        return dates
+
+    def enregistrer(self, data):
+        """
+        Enregistrer le résultat d'une extraction
+
+        Returns:
+            True si le contenu a changé depuis la dernière extraction
+        """
+        url = data['url']
+        cle = cle_annonce(url)
+        nouveau_hash = hash_contenu(data)
+        maintenant = datetime.now().isoformat()
+
+        with self._verrou:
+            ligne = self.connexion.execute(
+                "SELECT hash_contenu FROM annonces WHERE cle = ?", (cle,)
+            ).fetchone()
+            self.connexion.execute("""
+                INSERT INTO annonces (cle, url, reference, premiere_vue, derniere_vue,
+                                      derniere_extraction, hash_contenu, donnees, disponibilite)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(cle) DO UPDATE SET
+                    url = excluded.url,
+                    derniere_vue = excluded.derniere_vue,
+                    derniere_extraction = excluded.derniere_extraction,
+                    hash_contenu = excluded.hash_contenu,
+                    donnees = excluded.donnees,
+                    disponibilite = excluded.disponibilite
+            """, (cle, url, reference_annonce(url), maintenant, maintenant, maintenant,
+                  nouveau_hash, json.dumps(data, ensure_ascii=False), EN_LIGNE))
+            self.connexion.commit()
+
+        return ligne is None or ligne[0] != nouveau_hash
+
+    def derniere_version(self, url):
+        """Données de la dernière extraction d'une annonce (None si jamais extraite)"""
+        with self._verrou:
+            ligne = self.connexion.execute(
+                "SELECT donnees FROM annonces WHERE cle = ?", (cle_annonce(url),)
+            ).fetchone()
+        return json.loads(ligne[0]) if ligne and ligne[0] else None
+
+    def urls_a_verifier(self, limite=None):
+        """
+        URLs des annonces encore considérées en ligne, les moins récemment vérifiées d'abord
+
+        Args:
+            limite: Nombre max d'URLs (None = toutes)
+        """
+        with self._verrou:
+            lignes = self.connexion.execute("""
+                SELECT url FROM annonces
+                WHERE disponibilite IS NULL OR disponibilite = ?
+                ORDER BY COALESCE(date_verification, ''), derniere_vue
+                LIMIT ?
+            """, (EN_LIGNE, -1 if limite is None else limite)).fetchall()
+        return [ligne[0] for ligne in lignes]
+
+    def enregistrer_disponibilites(self, resultats):
+        """
+        Enregistrer le résultat d'une vérification
+
+        Args:
+            resultats: [(url, disponibilite, url_redirection ou None)]
+        """
+        maintenant = datetime.now().isoformat()
+        with self._verrou:
+            self.connexion.executemany("""
+                UPDATE annonces SET disponibilite = ?, url_redirection = ?, date_verification = ?
+                WHERE cle = ?
+            """, [(disponibilite, redirection, maintenant, cle_annonce(url))
+                  for url, disponibilite, redirection in resultats])
+            self.connexion.commit()
+
+    def annonces_indisponibles(self):
+        """{clé: disponibilité} des annonces retirées ou redirigées"""
+        with self._verrou:
+            lignes = self.connexion.execute(
+                "SELECT cle, disponibilite FROM annonces WHERE disponibilite IN (?, ?)", (RETIREE, REDIRIGEE)
+            ).fetchall()
+        return dict(lignes)
+
+    def fermer(self):
+        self.connexion.close()
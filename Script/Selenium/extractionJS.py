@@ -0,0 +1,291 @@
+# Extraction de tous les champs d'une page en un seul aller-retour WebDriver:
+# toute la carte des sélecteurs est envoyée au navigateur dans un seul
+# execute_script, au lieu d'un find_element (et d'un .text) par sélecteur.
+
+SCRIPT_EXTRACTION = r"""
+var config = arguments[0];
+
+function texte(el) {
+    return ((el.innerText || el.textContent || '') + '').trim();
+}
+
+function chercher(selecteur, tous) {
+    // Un sélecteur invalide (ex: :has-text) ne doit pas bloquer les autres
+    try {
+        return tous ? Array.prototype.slice.call(document.querySelectorAll(selecteur))
+                    : document.querySelector(selecteur);
+    } catch (e) {
+        return tous ? [] : null;
+    }
+}
+
+var resultat = {champs: {}, listes: {}, attributs: {}, selecteurs: {}};
+
+// Premier texte non vide, dans l'ordre des sélecteurs (et le sélecteur qui l'a donné)
+Object.keys(config.champs).forEach(function (champ) {
+    var selecteurs = config.champs[champ];
+    for (var i = 0; i < selecteurs.length; i++) {
+        var el = chercher(selecteurs[i], false);
+        if (el) {
+            var t = texte(el);
+            if (t) {
+                resultat.champs[champ] = t;
+                resultat.selecteurs[champ] = selecteurs[i];
+                break;
+            }
+        }
+    }
+});
+
+// Tous les textes uniques de tous les sélecteurs
+Object.keys(config.listes).forEach(function (nom) {
+    var vus = {};
+    var valeurs = [];
+    config.listes[nom].forEach(function (selecteur) {
+        chercher(selecteur, true).forEach(function (el) {
+            var t = texte(el);
+            if (t && !vus[t]) {
+                vus[t] = true;
+                valeurs.push(t);
+            }
+        });
+    });
+    resultat.listes[nom] = valeurs;
+});
+
+// Toutes les valeurs uniques d'un attribut
+Object.keys(config.attributs).forEach(function (nom) {
+    var spec = config.attributs[nom];
+    var vus = {};
+    var valeurs = [];
+    spec.selecteurs.forEach(function (selecteur) {
+        chercher(selecteur, true).forEach(function (el) {
+            var v = el[spec.attribut] || el.getAttribute(spec.attribut);
+            if (v && !vus[v]) {
+                vus[v] = true;
+                valeurs.push(v);
+            }
+        });
+    });
+    resultat.attributs[nom] = valeurs;
+});
+
+return resultat;
+"""
+
+
+def extraire_via_js(driver, champs=None, listes=None, attributs=None):
+    """
+    Extraire tous les champs demandés en un seul execute_script
+
+    Args:
+        driver: WebDriver positionné sur la page
+        champs: {nom: [sélecteurs]} -> premier texte non vide
+        listes: {nom: [sélecteurs]} -> tous les textes uniques, dans l'ordre
+        attributs: {nom: ([sélecteurs], attribut)} -> toutes les valeurs uniques de l'attribut
+
+    Returns:
+        dict avec les clés 'champs', 'listes', 'attributs' et 'selecteurs'
+        (sélecteur qui a donné chaque champ trouvé)
+    """
+    config = {
+        'champs': champs or {},
+        'listes': listes or {},
+        'attributs': {
+            nom: {'selecteurs': list(selecteurs), 'attribut': attribut}
+            for nom, (selecteurs, attribut) in (attributs or {}).items()
+        },
+    }
+    resultat = driver.execute_script(SCRIPT_EXTRACTION, config) or {}
+    return {
+        'champs': resultat.get('champs') or {},
+        'listes': resultat.get('listes') or {},
+        'attributs': resultat.get('attributs') or {},
+        'selecteurs': resultat.get('selecteurs') or {},
+    }
+
+
+# Récolte des liens d'une page de liste en un seul aller-retour: dédoublonnage
+# et filtres appliqués dans le navigateur, au lieu d'un get_attribute par lien.
+SCRIPT_LIENS = r"""
+var config = arguments[0];
+var vus = {};
+var liens = [];
+
+function contientUn(href, motifs) {
+    for (var i = 0; i < motifs.length; i++) {
+        if (href.indexOf(motifs[i]) !== -1) {
+            return true;
+        }
+    }
+    return false;
+}
+
+config.selecteurs.forEach(function (selecteur) {
+    var elements;
+    try {
+        elements = document.querySelectorAll(selecteur);
+    } catch (e) {
+        return;
+    }
+    for (var i = 0; i < elements.length; i++) {
+        var href = elements[i].href;
+        if (typeof href !== 'string' || !href || vus[href]) {
+            continue;
+        }
+        if (config.domaine && href.indexOf(config.domaine) === -1) {
+            continue;
+        }
+        if (config.inclure.length && !contientUn(href, config.inclure)) {
+            continue;
+        }
+        if (contientUn(href, config.exclure)) {
+            continue;
+        }
+        vus[href] = true;
+        liens.push(href);
+    }
+});
+
+return liens;
+"""
+
+
+def extraire_liens(driver, selecteurs, domaine=None, inclure=(), exclure=()):
+    """
+    Récolter les liens d'une page en un seul execute_script
+
+    Args:
+        selecteurs: Sélecteurs CSS des liens, dans l'ordre
+        domaine: Texte que le lien doit contenir (ex: 'citya.com')
+        inclure: Le lien doit contenir au moins un de ces motifs
+        exclure: Le lien ne doit contenir aucun de ces motifs
+
+    Returns:
+        Liste des href absolus, sans doublons, dans l'ordre de découverte
+    """
+    config = {
+        'selecteurs': list(selecteurs),
+        'domaine': domaine,
+        'inclure': list(inclure),
+        'exclure': list(exclure),
+    }
+    return driver.execute_script(SCRIPT_LIENS, config) or []
+
+
+# Lecture des cartes d'une page de liste en un seul aller-retour: pour chaque lien
+# d'annonce, la plus grande carte qui ne contient que ce lien, et ses champs.
+SCRIPT_CARTES = r"""
+var config = arguments[0];
+var selecteurCartes = config.selecteurs_cartes.join(', ');
+
+function contientUn(href, motifs) {
+    for (var i = 0; i < motifs.length; i++) {
+        if (href.indexOf(motifs[i]) !== -1) {
+            return true;
+        }
+    }
+    return false;
+}
+
+function estAnnonce(href) {
+    if (typeof href !== 'string' || !href) {
+        return false;
+    }
+    if (config.domaine && href.indexOf(config.domaine) === -1) {
+        return false;
+    }
+    if (config.inclure.length && !contientUn(href, config.inclure)) {
+        return false;
+    }
+    return !contientUn(href, config.exclure);
+}
+
+function autreAnnonce(el, href) {
+    var liens = el.querySelectorAll('a[href]');
+    for (var i = 0; i < liens.length; i++) {
+        if (liens[i].href !== href && estAnnonce(liens[i].href)) {
+            return true;
+        }
+    }
+    return false;
+}
+
+function estCarte(el) {
+    try {
+        return el.matches(selecteurCartes);
+    } catch (e) {
+        return false;
+    }
+}
+
+function texte(el) {
+    return ((el.innerText || el.textContent || '') + '').trim();
+}
+
+var cartes = {};
+var ordre = [];
+document.querySelectorAll('a[href]').forEach(function (a) {
+    var href = a.href;
+    if (!estAnnonce(href) || cartes[href]) {
+        return;
+    }
+
+    // Remonter tant que l'ancêtre ne contient pas une autre annonce
+    var carte = null;
+    for (var el = a.parentElement; el && el !== document.body; el = el.parentElement) {
+        if (autreAnnonce(el, href)) {
+            break;
+        }
+        if (estCarte(el)) {
+            carte = el;
+        }
+    }
+    if (!carte) {
+        return;
+    }
+
+    var champs = {};
+    Object.keys(config.champs).forEach(function (champ) {
+        var selecteurs = config.champs[champ];
+        for (var i = 0; i < selecteurs.length; i++) {
+            var trouve;
+            try {
+                trouve = carte.querySelector(selecteurs[i]);
+            } catch (e) {
+                continue;
+            }
+            if (trouve && texte(trouve)) {
+                champs[champ] = texte(trouve);
+                break;
+            }
+        }
+    });
+    cartes[href] = champs;
+    ordre.push(href);
+});
+
+return ordre.map(function (href) { return [href, cartes[href]]; });
+"""
+
+
+def extraire_cartes(driver, selecteurs_cartes, champs, domaine=None, inclure=(), exclure=()):
+    """
+    Lire les champs de toutes les cartes d'une page de liste en un seul execute_script
+
+    Args:
+        selecteurs_cartes: Sélecteurs CSS possibles d'une carte d'annonce
+        champs: {nom: [sélecteurs]} cherchés à l'intérieur de chaque carte
+        domaine, inclure, exclure: Filtres des liens d'annonce (comme extraire_liens)
+
+    Returns:
+        {url: {champ: texte}} dans l'ordre de la page
+    """
+    config = {
+        'selecteurs_cartes': list(selecteurs_cartes),
+        'champs': champs,
+        'domaine': domaine,
+        'inclure': list(inclure),
+        'exclure': list(exclure),
+    }
+    return {url: champs_carte for url, champs_carte in (driver.execute_script(SCRIPT_CARTES, config) or [])}
@@ -0,0 +1,208 @@
+import re
+import threading
+import time
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+import lxml.html
+from lxml.cssselect import CSSSelector
+from cssselect import SelectorError
+
+from controleurAIMD import est_congestion
+
+# Sélecteurs CSS compilés une seule fois (None = sélecteur non supporté par lxml)
+_SELECTEURS_COMPILES = {}
+# Textes qu'un sélecteur exige dans le HTML brut pour pouvoir trouver un élément
+_LITTERAUX = {}
+REGEX_ATTRIBUT = re.compile(r'\[\s*[\w-]+\s*[*^$~|]?=\s*["\']?([^"\'\]]*)["\']?\s*\]')
+REGEX_CLASSE_ID = re.compile(r'[.#]([\w-]+)')
+
+
+def compiler_selecteur(selecteur):
+    """Compiler un sélecteur CSS en XPath, avec cache"""
+    if selecteur not in _SELECTEURS_COMPILES:
+        try:
+            _SELECTEURS_COMPILES[selecteur] = CSSSelector(selecteur)
+        except SelectorError:
+            _SELECTEURS_COMPILES[selecteur] = None
+    return _SELECTEURS_COMPILES[selecteur]
+
+
+def litteraux_requis(selecteur):
+    """
+    Textes dont un sélecteur a besoin dans le HTML (classes, ids, valeurs d'attribut)
+
+    Returns:
+        Une liste de textes requis par alternative du sélecteur ('a, b'),
+        ou None si le sélecteur est trop complexe pour être préfiltré
+    """
+    if selecteur not in _LITTERAUX:
+        alternatives = []
+        for partie in selecteur.split(','):
+            if ':not(' in partie or partie.count('[') != len(REGEX_ATTRIBUT.findall(partie)):
+                alternatives = None
+                break
+            litteraux = REGEX_ATTRIBUT.findall(partie)
+            litteraux += REGEX_CLASSE_ID.findall(re.sub(r'\[[^\]]*\]|\([^)]*\)', '', partie))
+            # Les entités HTML (&amp;...) rendraient la recherche dans le texte brut fausse
+            alternatives.append([l for l in litteraux if l and '&' not in l and l.isascii()])
+        _LITTERAUX[selecteur] = alternatives
+    return _LITTERAUX[selecteur]
+
+
+def peut_correspondre(selecteur, html):
+    """False si le HTML brut ne contient pas les textes que le sélecteur exige"""
+    alternatives = litteraux_requis(selecteur)
+    if alternatives is None:
+        return True
+    return any(all(litteral in html for litteral in litteraux) for litteraux in alternatives)
+
+
+def chercher(arbre, selecteur, html=None):
+    """
+    Éléments correspondant au sélecteur
+
+    Args:
+        html: HTML brut de la page; s'il est donné, les sélecteurs qui ne peuvent pas
+            correspondre sont écartés sans parcourir l'arbre
+    """
+    compile = compiler_selecteur(selecteur)
+    if compile is None or (html is not None and not peut_correspondre(selecteur, html)):
+        return []
+    return compile(arbre)
+
+
+def texte_element(element):
+    """Texte d'un élément, espaces normalisés (équivalent de .text.strip() côté Selenium)"""
+    return ' '.join(element.text_content().split())
+
+
+def extraire_champs_html(arbre, champs=None, listes=None, attributs=None, html=None):
+    """
+    Extraire les champs d'une page déjà parsée avec lxml
+
+    Même format d'entrée et de sortie que extractionJS.extraire_via_js, pour que
+    les deux chemins soient interchangeables.
+
+    Args:
+        html: HTML brut de la page, pour écarter sans recherche les sélecteurs absents
+    """
+    resultat = {'champs': {}, 'listes': {}, 'attributs': {}, 'selecteurs': {}}
+
+    # Premier texte non vide, dans l'ordre des sélecteurs
+    for champ, selecteurs in (champs or {}).items():
+        for selecteur in selecteurs:
+            elements = chercher(arbre, selecteur, html)
+            if elements:
+                texte = texte_element(elements[0])
+                if texte:
+                    resultat['champs'][champ] = texte
+                    resultat['selecteurs'][champ] = selecteur
+                    break
+
+    # Tous les textes uniques
+    for nom, selecteurs in (listes or {}).items():
+        valeurs = []
+        for selecteur in selecteurs:
+            for element in chercher(arbre, selecteur, html):
+                texte = texte_element(element)
+                if texte and texte not in valeurs:
+                    valeurs.append(texte)
+        resultat['listes'][nom] = valeurs
+
+    # Toutes les valeurs uniques d'un attribut
+    for nom, (selecteurs, attribut) in (attributs or {}).items():
+        valeurs = []
+        for selecteur in selecteurs:
+            for element in chercher(arbre, selecteur, html):
+                valeur = element.get(attribut)
+                if valeur and valeur not in valeurs:
+                    valeurs.append(valeur)
+        resultat['attributs'][nom] = valeurs
+
+    return resultat
+
+
+def parser_html(html, url=None):
+    """Parser une page HTML; les liens relatifs sont rendus absolus si l'URL est connue"""
+    arbre = lxml.html.fromstring(html)
+    if url:
+        arbre.make_links_absolute(url)
+    return arbre
+
+
+class FetcherHTTP:
+    """Client HTTP keep-alive avec un pool de connexions, partagé entre les workers"""
+
+    def __init__(self, user_agent, timeout=10, taille_pool=10, corpus=None, controleur=None, archive=None):
+        """
+        Args:
+            corpus: CorpusHTML où enregistrer chaque page téléchargée (None = pas d'enregistrement)
+            archive: ArchiveHTML où conserver le HTML de chaque page téléchargée
+            controleur: ControleurAIMD à qui signaler la latence et les 429/5xx/timeouts
+        """
+        self.timeout = timeout
+        self.corpus = corpus
+        self.archive = archive
+        self.controleur = controleur
+        self.session = requests.Session()
+        adaptateur = HTTPAdapter(pool_connections=taille_pool, pool_maxsize=taille_pool)
+        self.session.mount('http://', adaptateur)
+        self.session.mount('https://', adaptateur)
+        self.session.headers.update({
+            'User-Agent': user_agent,
+            'Accept': 'text/html,application/xhtml+xml',
+            'Accept-Language': 'fr-FR,fr;q=0.9',
+        })
+
+        self.compteurs = {'http': 0, 'navigateur': 0, 'erreurs_http': 0}
+        self._verrou = threading.Lock()
+
+    def compter(self, chemin):
+        """Compter une page servie par 'http' ou par le 'navigateur'"""
+        with self._verrou:
+            self.compteurs[chemin] += 1
+
+    def telecharger(self, url):
+        """
+        Télécharger une page
+
+        Returns:
+            (arbre lxml de la page ou None si la requête échoue, octets reçus)
+        """
+        debut = time.monotonic()
+        try:
+            reponse = self.session.get(url, timeout=self.timeout)
+        except requests.RequestException as e:
+            self.compter('erreurs_http')
+            if self.controleur:
+                self.controleur.signaler(urlparse(url).netloc, time.monotonic() - debut,
+                                         congestion=isinstance(e, requests.Timeout))
+            return None, 0
+        if self.controleur:
+            self.controleur.signaler(urlparse(url).netloc, time.monotonic() - debut,
+                                     congestion=est_congestion(reponse.status_code))
+
+        octets = len(reponse.content)
+        if self.corpus and 'html' in reponse.headers.get('Content-Type', ''):
+            self.corpus.enregistrer(url, reponse.text, reponse.status_code, reponse.headers)
+        if self.archive and 'html' in reponse.headers.get('Content-Type', ''):
+            self.archive.enregistrer(url, reponse.text, reponse.status_code)
+        if reponse.status_code != 200 or 'html' not in reponse.headers.get('Content-Type', ''):
+            self.compter('erreurs_http')
+            return None, octets
+
+        return parser_html(reponse.content, reponse.url), octets
+
+    def afficher_compteurs(self):
+        """Afficher combien de pages ont été servies par chaque chemin"""
+        total = self.compteurs['http'] + self.compteurs['navigateur']
+        if not total:
+            return
+        print("\n🌐 Pages de détail servies:")
+        print(f"   - HTTP + lxml: {self.compteurs['http']} ({self.compteurs['http'] / total * 100:.0f}%)")
+        print(f"   - Navigateur: {self.compteurs['navigateur']}")
+        print(f"   - Échecs HTTP: {self.compteurs['erreurs_http']}")
+
+    def fermer(self):
+        self.session.close()
@@ -0,0 +1,212 @@
+import random
+import sqlite3
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+
+class FileReessais:
+    """
+    File persistante (SQLite) des pages en échec, à réessayer plus tard
+
+    Chaque échec repousse le prochain essai de façon exponentielle; après
+    max_tentatives réessais ratés la page est abandonnée. La file survit au
+    run: les pages non réessayées sont reprises au run suivant.
+    """
+
+    def __init__(self, chemin, max_tentatives=3, delai_base=30, delai_max=3600):
+        """
+        Args:
+            chemin: Base SQLite de la file
+            max_tentatives: Nombre de réessais avant abandon (SCRAPING_CONFIG['retry_times'])
+            delai_base: Délai avant le premier réessai (secondes), doublé à chaque échec
+            delai_max: Délai maximum entre deux essais (secondes)
+        """
+        self.chemin = chemin
+        self.max_tentatives = max_tentatives
+        self.delai_base = delai_base
+        self.delai_max = delai_max
+        self._verrou = threading.Lock()
+        self.connexion = sqlite3.connect(chemin, check_same_thread=False)
+        self.connexion.execute("""
+            CREATE TABLE IF NOT EXISTS reessais (
+                url TEXT PRIMARY KEY,
+                source TEXT NOT NULL,
+                tentatives INTEGER NOT NULL DEFAULT 0,
+                prochain_essai REAL NOT NULL,
+                derniere_erreur TEXT,
+                date_ajout TEXT NOT NULL,
+                abandon INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        self.connexion.commit()
+
+    def delai(self, tentatives):
+        """Délai avant le prochain essai, avec ±20% d'aléa pour ne pas réessayer en rafale"""
+        return min(self.delai_base * 2 ** (tentatives - 1), self.delai_max) * random.uniform(0.8, 1.2)
+
+    def echec(self, url, source, erreur=None):
+        """
+        Enregistrer un échec et planifier le prochain essai
+
+        Returns:
+            True si la page sera réessayée, False si elle est abandonnée
+        """
+        with self._verrou:
+            ligne = self.connexion.execute("SELECT tentatives FROM reessais WHERE url = ?", (url,)).fetchone()
+            tentatives = (ligne[0] if ligne else 0) + 1
+            abandon = tentatives > self.max_tentatives
+            self.connexion.execute("""
+                INSERT INTO reessais (url, source, tentatives, prochain_essai, derniere_erreur, date_ajout, abandon)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(url) DO UPDATE SET
+                    tentatives = excluded.tentatives,
+                    prochain_essai = excluded.prochain_essai,
+                    derniere_erreur = excluded.derniere_erreur,
+                    abandon = excluded.abandon
+            """, (url, source, tentatives, time.time() + self.delai(tentatives),
+                  str(erreur)[:500] if erreur else None, datetime.now().isoformat(), int(abandon)))
+            self.connexion.commit()
+        return not abandon
+
+    def reporter(self, url, source, delai):
+        """Repousser une page non tentée (source suspendue), sans compter d'échec"""
+        with self._verrou:
+            self.connexion.execute("""
+                INSERT INTO reessais (url, source, prochain_essai, date_ajout)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(url) DO UPDATE SET prochain_essai = MAX(prochain_essai, excluded.prochain_essai)
+            """, (url, source, time.time() + delai, datetime.now().isoformat()))
+            self.connexion.commit()
+
+    def succes(self, url):
+        """Retirer une page réussie de la file"""
+        with self._verrou:
+            self.connexion.execute("DELETE FROM reessais WHERE url = ?", (url,))
+            self.connexion.commit()
+
+    def prets(self, source, dans=0.0):
+        """
+        URLs de la source à réessayer maintenant (ou dans les `dans` secondes), les plus anciennes d'abord
+
+        Returns:
+            {url: numéro de l'essai à venir (2 pour le premier réessai)}
+        """
+        with self._verrou:
+            lignes = self.connexion.execute("""
+                SELECT url, tentatives FROM reessais
+                WHERE source = ? AND abandon = 0 AND prochain_essai <= ?
+                ORDER BY prochain_essai
+            """, (source, time.time() + dans)).fetchall()
+        return {url: tentatives + 1 for url, tentatives in lignes}
+
+    def attente_prochain(self, source):
+        """Secondes avant le prochain essai prévu pour la source (None si la file est vide)"""
+        with self._verrou:
+            ligne = self.connexion.execute(
+                "SELECT MIN(prochain_essai) FROM reessais WHERE source = ? AND abandon = 0", (source,)
+            ).fetchone()
+        return max(0.0, ligne[0] - time.time()) if ligne[0] is not None else None
+
+    def resume(self):
+        """{source: {'en_attente': n, 'abandonnees': n}}"""
+        with self._verrou:
+            lignes = self.connexion.execute(
+                "SELECT source, abandon, COUNT(*) FROM reessais GROUP BY source, abandon"
+            ).fetchall()
+        resume = {}
+        for source, abandon, nombre in lignes:
+            resume.setdefault(source, {'en_attente': 0, 'abandonnees': 0})
+            resume[source]['abandonnees' if abandon else 'en_attente'] = nombre
+        return resume
+
+    def afficher(self):
+        for source, compteurs in self.resume().items():
+            print(f"🔁 {source}: {compteurs['en_attente']} pages à réessayer, {compteurs['abandonnees']} abandonnées")
+
+    def fermer(self):
+        with self._verrou:
+            self.connexion.close()
+
+
+class Disjoncteur:
+    """
+    Suspendre une source quand trop de ses requêtes récentes échouent
+
+    Fermé: les requêtes passent. Ouvert: la source est en pause pendant `pause`
+    secondes et ses pages sont reportées. Ensuite une seule requête d'essai
+    passe (semi-ouvert): son succès referme le disjoncteur, son échec le rouvre.
+    """
+
+    def __init__(self, seuil=0.5, fenetre=20, min_requetes=5, pause=300):
+        """
+        Args:
+            seuil: Taux d'échec qui ouvre le disjoncteur
+            fenetre: Nombre de requêtes récentes prises en compte
+            min_requetes: Requêtes minimum dans la fenêtre avant de pouvoir ouvrir
+            pause: Durée de la suspension (secondes)
+        """
+        self.seuil = seuil
+        self.fenetre = fenetre
+        self.min_requetes = min_requetes
+        self.pause = pause
+        self.sources = {}
+        self._verrou = threading.Lock()
+
+    def _source(self, source):
+        return self.sources.setdefault(source, {
+            'resultats': deque(maxlen=self.fenetre), 'ouvert_jusqua': 0.0, 'essai': False, 'ouvertures': 0,
+        })
+
+    def autoriser(self, source):
+        """True si une requête vers la source peut partir maintenant"""
+        with self._verrou:
+            etat = self._source(source)
+            if not etat['ouvert_jusqua']:
+                return True
+            if time.monotonic() < etat['ouvert_jusqua'] or etat['essai']:
+                return False
+            etat['essai'] = True
+            return True
+
+    def enregistrer(self, source, succes):
+        with self._verrou:
+            etat = self._source(source)
+            if etat['ouvert_jusqua']:
+                # Seul le résultat de la requête d'essai compte pendant la suspension
+                if not etat['essai']:
+                    return
+                etat['essai'] = False
+                if succes:
+                    etat['ouvert_jusqua'] = 0.0
+                    etat['resultats'].clear()
+                    print(f"✅ {source}: disjoncteur refermé")
+                else:
+                    etat['ouvert_jusqua'] = time.monotonic() + self.pause
+                return
+
+            etat['resultats'].append(succes)
+            resultats = etat['resultats']
+            echecs = resultats.count(False)
+            if len(resultats) >= self.min_requetes and echecs / len(resultats) >= self.seuil:
+                etat['ouvert_jusqua'] = time.monotonic() + self.pause
+                etat['ouvertures'] += 1
+                print(f"⛔ {source}: {echecs}/{len(resultats)} échecs récents, source suspendue {self.pause:.0f}s")
+
+    def attente(self, source):
+        """Secondes avant la fin de la suspension de la source (0 si elle n'est pas suspendue)"""
+        with self._verrou:
+            etat = self._source(source)
+            return max(0.0, etat['ouvert_jusqua'] - time.monotonic()) if etat['ouvert_jusqua'] else 0.0
+
+    def etat(self, source):
+        with self._verrou:
+            etat = self._source(source)
+            if not etat['ouvert_jusqua']:
+                return 'ferme'
+            return 'ouvert' if time.monotonic() < etat['ouvert_jusqua'] else 'semi_ouvert'
+
+    def nb_ouvertures(self):
+        with self._verrou:
+            return sum(etat['ouvertures'] for etat in self.sources.values())
@@ -0,0 +1,195 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+# Durées mesurées pour chaque page, dans l'ordre d'affichage
+PHASES = ('navigation', 'attente', 'extraction')
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+def percentile(valeurs_triees, q):
+    """Percentile par interpolation linéaire sur une liste déjà triée"""
+    if not valeurs_triees:
+        return 0.0
+    position = (len(valeurs_triees) - 1) * q
+    bas = int(position)
+    haut = min(bas + 1, len(valeurs_triees) - 1)
+    return valeurs_triees[bas] + (valeurs_triees[haut] - valeurs_triees[bas]) * (position - bas)
+
+
+def resumer(valeurs):
+    """Nombre, total et p50/p95/p99 d'une série de mesures"""
+    triees = sorted(valeurs)
+    return {
+        'nombre': len(triees),
+        'total': round(sum(triees), 4),
+        **{f'p{int(q * 100)}': round(percentile(triees, q), 4) for q in QUANTILES},
+    }
+
+
+class MetriquesCrawl:
+    """Mesures par page d'un run de scraping, exportées en JSON et au format Prometheus"""
+
+    def __init__(self, nom_run='citya'):
+        self.nom_run = nom_run
+        self.debut = time.monotonic()
+        self.date_debut = datetime.now().isoformat()
+        self.pages = []
+        self.valeurs = {}
+        self._verrou = threading.Lock()
+
+    def enregistrer_page(self, url, type_page, navigation=0.0, attente=0.0, extraction=0.0,
+                         octets=0, tentatives=1, champs=0, chemin='navigateur', succes=True, source=None,
+                         timeout_attente=False):
+        """
+        Enregistrer les mesures d'une page
+
+        Args:
+            timeout_attente: Les éléments attendus ne sont pas apparus à temps (page extraite quand même)
+        """
+        page = {
+            'url': url,
+            'type_page': type_page,
+            'source': source or self.nom_run,
+            'chemin': chemin,
+            'navigation': round(navigation, 4),
+            'attente': round(attente, 4),
+            'extraction': round(extraction, 4),
+            'octets': octets,
+            'tentatives': tentatives,
+            'champs': champs,
+            'succes': succes,
+            'timeout_attente': timeout_attente,
+        }
+        with self._verrou:
+            self.pages.append(page)
+
+    def definir(self, nom, valeur):
+        """Enregistrer une valeur ponctuelle du run (ex: temps de démarrage du navigateur)"""
+        with self._verrou:
+            self.valeurs[nom] = valeur
+
+    def resume(self):
+        """Résumé du run: p50/p95/p99 par type de page et par phase"""
+        with self._verrou:
+            pages = list(self.pages)
+            valeurs = dict(self.valeurs)
+        duree = time.monotonic() - self.debut
+
+        par_type = {}
+        for type_page in sorted({p['type_page'] for p in pages}):
+            groupe = [p for p in pages if p['type_page'] == type_page]
+            par_type[type_page] = {
+                'pages': len(groupe),
+                'echecs': sum(1 for p in groupe if not p['succes']),
+                'timeouts_attente': sum(1 for p in groupe if p['timeout_attente']),
+                'octets': sum(p['octets'] for p in groupe),
+                'tentatives': sum(p['tentatives'] for p in groupe),
+                'chemins': {c: sum(1 for p in groupe if p['chemin'] == c) for c in sorted({p['chemin'] for p in groupe})},
+                'champs': resumer([p['champs'] for p in groupe if p['succes']]),
+                **{phase: resumer([p[phase] for p in groupe]) for phase in PHASES},
+                'total': resumer([sum(p[phase] for phase in PHASES) for p in groupe]),
+            }
+
+        return {
+            'run': self.nom_run,
+            'date_debut': self.date_debut,
+            'duree_secondes': round(duree, 3),
+            'pages': len(pages),
+            'pages_par_seconde': round(len(pages) / duree, 4) if duree > 0 else 0.0,
+            'valeurs': valeurs,
+            'par_type_page': par_type,
+        }
+
+    def exporter_json(self, chemin, avec_pages=False):
+        """Écrire le résumé du run (et le détail par page si demandé) en JSON"""
+        data = self.resume()
+        if avec_pages:
+            with self._verrou:
+                data['detail_pages'] = list(self.pages)
+        os.makedirs(os.path.dirname(os.path.abspath(chemin)), exist_ok=True)
+        with open(chemin, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+
+    def exporter_prometheus(self, chemin):
+        """Écrire les métriques au format texte Prometheus (node_exporter textfile collector)"""
+        resume = self.resume()
+        run = resume['run']
+        lignes = [
+            '# HELP crawl_duree_run_secondes Durée totale du run',
+            '# TYPE crawl_duree_run_secondes gauge',
+            f'crawl_duree_run_secondes{{run="{run}"}} {resume["duree_secondes"]}',
+            '# HELP crawl_pages_total Pages traitées',
+            '# TYPE crawl_pages_total counter',
+        ]
+        for type_page, stats in resume['par_type_page'].items():
+            for chemin_page, nombre in stats['chemins'].items():
+                lignes.append(f'crawl_pages_total{{run="{run}",type_page="{type_page}",chemin="{chemin_page}"}} {nombre}')
+
+        lignes += ['# HELP crawl_echecs_total Pages en échec', '# TYPE crawl_echecs_total counter']
+        for type_page, stats in resume['par_type_page'].items():
+            lignes.append(f'crawl_echecs_total{{run="{run}",type_page="{type_page}"}} {stats["echecs"]}')
+
+        lignes += [
+            '# HELP crawl_timeouts_attente_total Pages extraites sans que les éléments attendus soient apparus',
+            '# TYPE crawl_timeouts_attente_total counter',
+        ]
+        for type_page, stats in resume['par_type_page'].items():
+            lignes.append(f'crawl_timeouts_attente_total{{run="{run}",type_page="{type_page}"}} {stats["timeouts_attente"]}')
+
+        lignes += ['# HELP crawl_octets_total Octets téléchargés', '# TYPE crawl_octets_total counter']
+        for type_page, stats in resume['par_type_page'].items():
+            lignes.append(f'crawl_octets_total{{run="{run}",type_page="{type_page}"}} {stats["octets"]}')
+
+        lignes += ['# HELP crawl_tentatives_total Tentatives de chargement', '# TYPE crawl_tentatives_total counter']
+        for type_page, stats in resume['par_type_page'].items():
+            lignes.append(f'crawl_tentatives_total{{run="{run}",type_page="{type_page}"}} {stats["tentatives"]}')
+
+        lignes += [
+            '# HELP crawl_page_duree_secondes Durée par page et par phase',
+            '# TYPE crawl_page_duree_secondes summary',
+        ]
+        for type_page, stats in resume['par_type_page'].items():
+            for phase in PHASES + ('total',):
+                etiquettes = f'run="{run}",type_page="{type_page}",phase="{phase}"'
+                for q in QUANTILES:
+                    lignes.append(f'crawl_page_duree_secondes{{{etiquettes},quantile="{q}"}} {stats[phase][f"p{int(q * 100)}"]}')
+                lignes.append(f'crawl_page_duree_secondes_sum{{{etiquettes}}} {stats[phase]["total"]}')
+                lignes.append(f'crawl_page_duree_secondes_count{{{etiquettes}}} {stats[phase]["nombre"]}')
+
+        lignes += [
+            '# HELP crawl_champs_remplis Champs remplis par page',
+            '# TYPE crawl_champs_remplis summary',
+        ]
+        for type_page, stats in resume['par_type_page'].items():
+            etiquettes = f'run="{run}",type_page="{type_page}"'
+            for q in QUANTILES:
+                lignes.append(f'crawl_champs_remplis{{{etiquettes},quantile="{q}"}} {stats["champs"][f"p{int(q * 100)}"]}')
+            lignes.append(f'crawl_champs_remplis_sum{{{etiquettes}}} {stats["champs"]["total"]}')
+            lignes.append(f'crawl_champs_remplis_count{{{etiquettes}}} {stats["champs"]["nombre"]}')
+
+        for nom, valeur in resume['valeurs'].items():
+            if isinstance(valeur, (int, float)) and not isinstance(valeur, bool):
+                lignes += [f'# TYPE crawl_{nom} gauge', f'crawl_{nom}{{run="{run}"}} {valeur}']
+
+        os.makedirs(os.path.dirname(os.path.abspath(chemin)), exist_ok=True)
+        with open(chemin, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lignes) + '\n')
+
+    def afficher_resume(self):
+        """Afficher où part le temps du crawl"""
+        resume = self.resume()
+        print("\n" + "=" * 60)
+        print("⏱️  MÉTRIQUES DU CRAWL")
+        print("=" * 60)
+        print(f"Durée: {resume['duree_secondes']:.1f}s - {resume['pages']} pages "
+              f"({resume['pages_par_seconde']:.2f} pages/s)")
+        for type_page, stats in resume['par_type_page'].items():
+            print(f"\n  {type_page}: {stats['pages']} pages, {stats['echecs']} échecs, "
+                  f"{stats['timeouts_attente']} timeouts d'attente, "
+                  f"{stats['octets'] / 1024:.0f} KB, chemins {stats['chemins']}")
+            for phase in PHASES + ('total',):
+                print(f"    {phase:<11} p50 {stats[phase]['p50']:.3f}s  "
+                      f"p95 {stats[phase]['p95']:.3f}s  p99 {stats[phase]['p99']:.3f}s")
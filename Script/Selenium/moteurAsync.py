@@ -0,0 +1,161 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class SeauJetons:
+    """Seau à jetons asyncio: au plus `debit` requêtes par seconde, rafales limitées à `capacite`"""
+
+    def __init__(self, debit, capacite=1):
+        """
+        Args:
+            debit: Jetons ajoutés par seconde (None = pas de limite)
+            capacite: Nombre max de jetons accumulés
+        """
+        self.debit = debit
+        self.capacite = capacite
+        self.jetons = capacite
+        self.dernier = time.monotonic()
+        self._verrou = asyncio.Lock()
+
+    async def prendre(self):
+        """Attendre qu'un jeton soit disponible puis le consommer"""
+        if not self.debit:
+            return
+        async with self._verrou:
+            while True:
+                maintenant = time.monotonic()
+                self.jetons = min(self.capacite, self.jetons + (maintenant - self.dernier) * self.debit)
+                self.dernier = maintenant
+                if self.jetons >= 1:
+                    self.jetons -= 1
+                    return
+                await asyncio.sleep((1 - self.jetons) / self.debit)
+
+
+class MoteurCrawl:
+    """
+    Ordonnancer les chargements de pages de plusieurs domaines en même temps
+
+    Chaque domaine a son seau à jetons (délai entre requêtes) et son plafond de
+    requêtes simultanées. Selenium étant bloquant, chaque tâche s'exécute dans un
+    thread avec un navigateur réservé au domaine, réutilisé d'une tâche à l'autre.
+    """
+
+    def __init__(self, fabrique_driver, surveillance=None, controleur=None):
+        """
+        Args:
+            fabrique_driver: Fonction sans argument qui crée un navigateur
+            surveillance: SurveillanceNavigateur qui recycle les navigateurs trop chargés
+            controleur: ControleurAIMD qui ajuste concurrence et délai de chaque domaine
+                d'après les signaux des tâches (sinon valeurs fixes)
+        """
+        self.fabrique_driver = fabrique_driver
+        self.surveillance = surveillance
+        self.controleur = controleur
+        self.domaines = {}
+        self.drivers = []
+        self._verrou = threading.Lock()
+        self._executeur = None
+
+    def ajouter_domaine(self, domaine, concurrence, delai, concurrence_max=None):
+        """
+        Args:
+            concurrence: Nombre max de pages chargées en même temps sur ce domaine
+                (point de départ avec un contrôleur AIMD)
+            delai: Délai moyen entre deux requêtes vers ce domaine (secondes)
+            concurrence_max: Plafond de la concurrence avec un contrôleur AIMD
+        """
+        if self.controleur:
+            self.controleur.ajouter(domaine, concurrence, delai, concurrence_max)
+        self.domaines[domaine] = {
+            'condition': asyncio.Condition(),
+            'en_cours': 0,
+            'seau': SeauJetons(1 / delai if delai else None),
+            'concurrence': concurrence_max if self.controleur and concurrence_max else concurrence,
+            'libres': [],
+            'requetes': 0,
+            'attente_jetons': 0.0,
+        }
+
+    def _nouveau_driver(self):
+        driver = self.fabrique_driver()
+        with self._verrou:
+            self.drivers.append(driver)
+        return driver
+
+    def _surveiller(self, driver):
+        """Navigateur à remettre dans le pool après une tâche (recyclé au besoin)"""
+        nouveau = self.surveillance.verifier(driver, self.fabrique_driver)
+        if nouveau is not driver:
+            with self._verrou:
+                self.drivers = [d for d in self.drivers if d is not driver] + [nouveau]
+        return nouveau
+
+    async def executer(self, domaine, tache, *args):
+        """
+        Exécuter tache(driver, *args) dans un thread dès que le domaine le permet
+
+        Returns:
+            Le résultat de la tâche
+        """
+        if self._executeur is None:
+            self._executeur = ThreadPoolExecutor(
+                max_workers=sum(d['concurrence'] for d in self.domaines.values())
+            )
+        loop = asyncio.get_running_loop()
+        d = self.domaines[domaine]
+
+        async with d['condition']:
+            await d['condition'].wait_for(lambda: d['en_cours'] < self.limite(domaine))
+            d['en_cours'] += 1
+        try:
+            if self.controleur:
+                delai = self.controleur.delai(domaine)
+                d['seau'].debit = 1 / delai if delai else None
+            debut = time.monotonic()
+            await d['seau'].prendre()
+            d['attente_jetons'] += time.monotonic() - debut
+            d['requetes'] += 1
+
+            driver = d['libres'].pop() if d['libres'] else await loop.run_in_executor(self._executeur, self._nouveau_driver)
+            try:
+                return await loop.run_in_executor(self._executeur, tache, driver, *args)
+            finally:
+                if self.surveillance:
+                    try:
+                        driver = await loop.run_in_executor(self._executeur, self._surveiller, driver)
+                    except Exception as e:
+                        driver = None
+                        print(f"❌ {domaine}: impossible de relancer le navigateur: {e}")
+                if driver is not None:
+                    d['libres'].append(driver)
+        finally:
+            async with d['condition']:
+                d['en_cours'] -= 1
+                d['condition'].notify_all()
+
+    def limite(self, domaine):
+        """Pages du domaine autorisées en même temps (fenêtre AIMD ou valeur fixe)"""
+        if self.controleur:
+            return min(self.controleur.concurrence(domaine), self.domaines[domaine]['concurrence'])
+        return self.domaines[domaine]['concurrence']
+
+    def afficher_resume(self):
+        """Afficher la charge envoyée à chaque domaine"""
+        print(f"\n🚦 Moteur asynchrone: {len(self.drivers)} navigateurs")
+        for domaine, d in self.domaines.items():
+            print(f"   - {domaine}: {d['requetes']} tâches, max {d['concurrence']} en parallèle, "
+                  f"{d['attente_jetons']:.1f}s d'attente de jetons")
+
+    def fermer(self):
+        """Fermer les navigateurs et les threads"""
+        if self._executeur:
+            self._executeur.shutdown(wait=True)
+        for driver in self.drivers:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+        self.drivers = []
@@ -0,0 +1,172 @@
+import math
+
+# Éléments qui affichent le nombre de résultats d'une recherche ("1 234 annonces")
+SELECTEURS_TOTAL = [
+    '[class*="result"][class*="count"]',
+    '[class*="nb-result"]',
+    '[class*="nombre"][class*="result"]',
+    '[data-testid*="count"]',
+    'h1',
+]
+
+# Lecture de la pagination d'une page de liste en un seul execute_script:
+# nombre total de résultats annoncé, plus grand numéro de page lié, et présence
+# d'un lien "suivant" (sélecteurs 'pagination' de SOURCES).
+SCRIPT_PAGINATION = r"""
+var config = arguments[0];
+var resultat = {total_resultats: null, derniere_page: null, suivant: false};
+
+// Plus grand numéro de page dans les liens (?page=N) et dans les blocs de pagination
+var regexPage = new RegExp('[?&]' + config.param_page + '=(\\d+)');
+var max = 0;
+document.querySelectorAll('a[href]').forEach(function (a) {
+    var m = regexPage.exec(a.href);
+    if (m) {
+        max = Math.max(max, parseInt(m[1], 10));
+    }
+});
+document.querySelectorAll('[class*="pagination"] a, [class*="pagination"] button, nav[aria-label*="agination"] a')
+    .forEach(function (el) {
+        var t = (el.textContent || '').trim();
+        if (/^\d+$/.test(t)) {
+            max = Math.max(max, parseInt(t, 10));
+        }
+    });
+if (max > 0) {
+    resultat.derniere_page = max;
+}
+
+// "1 234 annonces", "56 résultats"... sur une seule ligne: un prix ou un numéro
+// de la ligne précédente ne doit pas être lu comme le nombre de résultats
+var regexTotal = /(\d(?:[\d.  ]| (?=\d))*)[   ]*(résultats?|annonces?|biens?|logements?)\b/i;
+function lireTotal(texte) {
+    var lignes = (texte || '').split('\n');
+    for (var i = 0; i < lignes.length; i++) {
+        var m = regexTotal.exec(lignes[i]);
+        if (m) {
+            var n = parseInt(m[1].replace(/[^\d]/g, ''), 10);
+            if (!isNaN(n)) {
+                return n;
+            }
+        }
+    }
+    return null;
+}
+// D'abord l'élément qui affiche le compteur, à défaut le texte de la page ligne par ligne
+config.selecteurs_total.forEach(function (selecteur) {
+    if (resultat.total_resultats !== null) {
+        return;
+    }
+    var elements;
+    try {
+        elements = document.querySelectorAll(selecteur);
+    } catch (e) {
+        return;
+    }
+    for (var i = 0; i < elements.length && resultat.total_resultats === null; i++) {
+        resultat.total_resultats = lireTotal(elements[i].innerText || elements[i].textContent);
+    }
+});
+if (resultat.total_resultats === null && document.body) {
+    resultat.total_resultats = lireTotal(document.body.innerText);
+}
+
+// Lien "page suivante" visible et actif
+config.selecteurs_suivant.forEach(function (selecteur) {
+    var elements;
+    try {
+        elements = document.querySelectorAll(selecteur);
+    } catch (e) {
+        return;
+    }
+    elements.forEach(function (el) {
+        var inactif = el.disabled || el.getAttribute('aria-disabled') === 'true'
+            || /disabled/.test(el.className || '');
+        if (!inactif && el.offsetParent !== null) {
+            resultat.suivant = true;
+        }
+    });
+});
+
+return resultat;
+"""
+
+
+def lire_pagination(driver, selecteurs_suivant=(), param_page='page', selecteurs_total=SELECTEURS_TOTAL):
+    """
+    Lire les indices de pagination de la page de liste courante
+
+    Args:
+        selecteurs_total: Éléments affichant le nombre de résultats, lus avant le texte de la page
+
+    Returns:
+        {'total_resultats': int ou None, 'derniere_page': int ou None, 'suivant': bool}
+    """
+    config = {
+        'selecteurs_suivant': list(selecteurs_suivant),
+        'param_page': param_page,
+        'selecteurs_total': list(selecteurs_total),
+    }
+    try:
+        info = driver.execute_script(SCRIPT_PAGINATION, config) or {}
+    except Exception:
+        info = {}
+    return {
+        'total_resultats': info.get('total_resultats'),
+        'derniere_page': info.get('derniere_page'),
+        'suivant': bool(info.get('suivant')),
+    }
+
+
+def calculer_derniere_page(info, nb_par_page):
+    """
+    Dernière page à visiter d'après la première page de liste (None si inconnue)
+
+    Le numéro de page le plus grand affiché fait foi; à défaut, le nombre total
+    de résultats divisé par le nombre d'annonces de la première page.
+    """
+    if info['derniere_page']:
+        return info['derniere_page']
+    if info['total_resultats'] and nb_par_page:
+        return max(1, math.ceil(info['total_resultats'] / nb_par_page))
+    return None
+
+
+class SuiviPagination:
+    """Décider après chaque page de liste s'il reste des pages à charger"""
+
+    def __init__(self, max_pages):
+        self.max_pages = max_pages
+        self.derniere_page = None
+        self.suivant_vu = False
+
+    def mettre_a_jour(self, info, nb_par_page):
+        """Enregistrer les indices lus sur une page; la première page fixe la plage exacte"""
+        if self.derniere_page is None:
+            derniere = calculer_derniere_page(info, nb_par_page)
+            if derniere:
+                self.derniere_page = min(derniere, self.max_pages)
+                print(f"📐 {info['total_resultats'] or '?'} résultats, dernière page: {self.derniere_page}")
+        # Le numéro affiché peut progresser (pagination tronquée "1 2 3 ... ")
+        elif info['derniere_page'] and info['derniere_page'] > self.derniere_page:
+            self.derniere_page = min(info['derniere_page'], self.max_pages)
+        self.suivant_vu = self.suivant_vu or info['suivant']
+
+    def est_derniere(self, info, numero_page, nb_nouvelles=0):
+        """
+        True si la page courante est la dernière
+
+        Args:
+            nb_nouvelles: Annonces pas encore vues sur la page courante
+
+        La dernière page calculée n'arrête le crawl que si la pagination affiche
+        ce numéro comme le dernier ou si la page n'apporte plus d'annonces: un
+        nombre de résultats mal lu ne coupe pas la liste. L'absence de lien
+        "suivant" ne compte que si ce lien a déjà été vu sur le site: des
+        sélecteurs qui ne correspondent à rien n'arrêtent pas le crawl.
+        """
+        if self.derniere_page and numero_page >= self.derniere_page:
+            affichee = bool(info['derniere_page']) and numero_page >= info['derniere_page']
+            if affichee or not nb_nouvelles:
+                return True
+        return self.suivant_vu and not info['suivant']
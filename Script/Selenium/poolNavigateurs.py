@@ -0,0 +1,182 @@
+import threading
+import queue
+import time
+from contextlib import nullcontext
+from urllib.parse import urlparse
+
+
+class LimiteurPolitesse:
+    """Espacer les requêtes vers un même hôte, quel que soit le worker qui les envoie"""
+
+    def __init__(self, delai_min=2.0, controleur=None):
+        """
+        Args:
+            delai_min: Délai fixe entre deux requêtes vers un hôte
+            controleur: ControleurAIMD qui fixe le délai de chaque hôte (remplace delai_min)
+        """
+        self.delai_min = delai_min
+        self.controleur = controleur
+        self._verrou = threading.Lock()
+        self._prochains_creneaux = {}
+
+    def attendre(self, url):
+        """Bloquer jusqu'au prochain créneau libre pour l'hôte de l'URL"""
+        hote = urlparse(url).netloc
+        with self._verrou:
+            maintenant = time.monotonic()
+            creneau = max(maintenant, self._prochains_creneaux.get(hote, 0.0))
+            # Réserver le créneau suivant avant de relâcher le verrou
+            delai = self.controleur.delai(hote) if self.controleur else self.delai_min
+            self._prochains_creneaux[hote] = creneau + delai
+
+        pause = creneau - time.monotonic()
+        if pause > 0:
+            time.sleep(pause)
+
+
+class PoolNavigateurs:
+    """Pool de N navigateurs, chacun piloté par son propre thread"""
+
+    _FIN = object()
+
+    def __init__(self, fabrique_driver, nb_workers=4, limiteur=None, taille_file=0, surveillance=None,
+                 controleur=None, sur_echec=None):
+        """
+        Args:
+            fabrique_driver: Fonction sans argument qui crée un nouveau WebDriver
+            nb_workers: Nombre de navigateurs en parallèle
+            limiteur: LimiteurPolitesse partagé (None = pas de limite)
+            taille_file: Taille max de la file de tâches (0 = illimitée)
+            surveillance: SurveillanceNavigateur qui recycle les navigateurs trop chargés
+            controleur: ControleurAIMD qui limite le nombre de workers actifs par hôte
+                (nb_workers est alors un plafond)
+            sur_echec: Fonction (url, erreur) appelée pour chaque URL qu'aucun navigateur n'a pu
+                traiter (ex: planifier un réessai)
+        """
+        self.fabrique_driver = fabrique_driver
+        self.nb_workers = max(1, nb_workers)
+        self.limiteur = limiteur
+        self.surveillance = surveillance
+        self.controleur = controleur
+        self.sur_echec = sur_echec
+        self._file = queue.Queue(maxsize=taille_file)
+        self._resultats = {}
+        self._verrou = threading.Lock()
+        self._threads = []
+        # Workers qui lisent encore la file, et fin demandée par terminer()
+        self._consommateurs = 0
+        self._fin = False
+
+    def _abandonner(self, numero):
+        """
+        Retirer de la file un worker sans navigateur, tant qu'un autre peut traiter ses URLs
+
+        Returns:
+            False si c'est le dernier worker: il reste pour vider la file en échec
+        """
+        with self._verrou:
+            if self._fin or self._consommateurs <= 1:
+                return False
+            self._consommateurs -= 1
+        print(f"⚠️  Worker {numero}: arrêté, ses URLs passent aux autres navigateurs")
+        return True
+
+    def _echec(self, url, erreur):
+        print(f"❌ Pas de navigateur pour {url}: {erreur}")
+        if self.sur_echec:
+            try:
+                self.sur_echec(url, erreur)
+            except Exception as e:
+                print(f"❌ Échec non enregistré pour {url}: {e}")
+
+    def _worker(self, numero, tache):
+        driver = None
+        erreur = None
+        try:
+            driver = self.fabrique_driver()
+        except Exception as e:
+            erreur = e
+            print(f"❌ Worker {numero}: impossible de démarrer le navigateur: {e}")
+
+        try:
+            while True:
+                if driver is None and self._abandonner(numero):
+                    return
+                element = self._file.get()
+                try:
+                    if element is self._FIN:
+                        return
+                    index, url = element
+                    resultat = None
+                    if driver is None:
+                        # Plus aucun navigateur: l'URL est enregistrée en échec au lieu d'être perdue
+                        self._echec(url, erreur)
+                    else:
+                        creneau = self.controleur.creneau(urlparse(url).netloc) if self.controleur else nullcontext()
+                        with creneau:
+                            if self.limiteur:
+                                self.limiteur.attendre(url)
+                            try:
+                                resultat = tache(driver, url)
+                            except Exception as e:
+                                print(f"❌ Worker {numero}: erreur sur {url}: {e}")
+                        if self.surveillance:
+                            try:
+                                driver = self.surveillance.verifier(driver, self.fabrique_driver)
+                            except Exception as e:
+                                driver = None
+                                erreur = e
+                                print(f"❌ Worker {numero}: impossible de relancer le navigateur: {e}")
+                    with self._verrou:
+                        self._resultats[index] = resultat
+                finally:
+                    self._file.task_done()
+        finally:
+            if driver is not None:
+                try:
+                    driver.quit()
+                except Exception:
+                    pass
+
+    def demarrer(self, tache):
+        """Lancer les workers; tache(driver, url) est appelée pour chaque URL soumise"""
+        with self._verrou:
+            self._consommateurs = self.nb_workers
+            self._fin = False
+        for numero in range(1, self.nb_workers + 1):
+            thread = threading.Thread(
+                target=self._worker,
+                args=(numero, tache),
+                name=f"navigateur-{numero}",
+                daemon=True,
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def soumettre(self, index, url):
+        """Ajouter une URL à traiter; index fixe sa position dans les résultats"""
+        self._file.put((index, url))
+
+    def terminer(self):
+        """Attendre la fin des tâches, fermer les navigateurs et renvoyer les résultats dans l'ordre"""
+        # Un marqueur de fin par worker encore à l'écoute de la file
+        with self._verrou:
+            self._fin = True
+            consommateurs = self._consommateurs
+        for _ in range(consommateurs):
+            self._file.put(self._FIN)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+        with self._verrou:
+            resultats = [self._resultats[i] for i in sorted(self._resultats)]
+            self._resultats = {}
+        return [r for r in resultats if r]
+
+    def executer(self, urls, tache):
+        """Traiter toute une liste d'URLs et renvoyer les résultats dans l'ordre de la liste"""
+        self.demarrer(tache)
+        for index, url in enumerate(urls):
+            self.soumettre(index, url)
+        return self.terminer()
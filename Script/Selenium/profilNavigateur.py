@@ -0,0 +1,81 @@
+import threading
+from selenium.webdriver.chrome.options import Options
+
+# Octets transférés par la page et toutes ses ressources (Resource Timing API).
+# Les ressources d'autres domaines sans Timing-Allow-Origin comptent pour 0.
+SCRIPT_OCTETS = """
+var total = 0;
+performance.getEntriesByType('navigation').concat(performance.getEntriesByType('resource'))
+    .forEach(function (entree) { total += entree.transferSize || 0; });
+return total;
+"""
+
+
+def options_chrome(user_agent, headless=True, leger=False):
+    """
+    Options Chrome communes aux scrapers
+
+    Args:
+        user_agent: User-Agent envoyé par le navigateur
+        headless: Lancer Chrome sans interface
+        leger: Profil allégé (pas d'images, chargement 'eager')
+    """
+    chrome_options = Options()
+    if headless:
+        chrome_options.add_argument('--headless')
+    chrome_options.add_argument('--no-sandbox')
+    chrome_options.add_argument('--disable-dev-shm-usage')
+    chrome_options.add_argument('--disable-blink-features=AutomationControlled')
+    chrome_options.add_argument(f'user-agent={user_agent}')
+
+    if leger:
+        # Rendre la main dès que le DOM est prêt, sans attendre images et iframes
+        chrome_options.page_load_strategy = 'eager'
+        chrome_options.add_argument('--blink-settings=imagesEnabled=false')
+        chrome_options.add_experimental_option('prefs', {
+            'profile.managed_default_content_settings.images': 2,
+            'profile.default_content_setting_values.notifications': 2,
+            'profile.default_content_setting_values.geolocation': 2,
+        })
+
+    return chrome_options
+
+
+def activer_blocage(driver, motifs):
+    """Bloquer des URLs (polices, médias, traqueurs...) via CDP Network.setBlockedURLs"""
+    if not motifs:
+        return
+    driver.execute_cdp_cmd('Network.enable', {})
+    driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': list(motifs)})
+
+
+def octets_page(driver):
+    """Octets téléchargés pour la page courante"""
+    try:
+        return int(driver.execute_script(SCRIPT_OCTETS) or 0)
+    except Exception:
+        return 0
+
+
+class CompteurOctets:
+    """Octets téléchargés par page, pour comparer profil normal et profil léger"""
+
+    def __init__(self, leger):
+        self.leger = leger
+        self.pages = 0
+        self.total = 0
+        self._verrou = threading.Lock()
+
+    def mesurer(self, driver):
+        octets = octets_page(driver)
+        with self._verrou:
+            self.pages += 1
+            self.total += octets
+        return octets
+
+    def afficher(self):
+        if not self.pages:
+            return
+        profil = 'léger' if self.leger else 'complet'
+        print(f"\n📦 Profil navigateur {profil}: {self.total / self.pages / 1024:.1f} KB/page "
+              f"en moyenne ({self.pages} pages, {self.total / 1024 / 1024:.1f} MB au total)")
@@ -0,0 +1,280 @@
+"""
+Ré-extraction hors ligne des annonces depuis l'archive HTML (archive_html/)
+
+    python Script/Selenium/reextractionArchive.py --output citya_reextraction.jsonl
+    python Script/Selenium/reextractionArchive.py --source seloger --toutes-versions --depuis 2026-01-01
+
+Après la correction d'un sélecteur ou l'ajout d'un champ, les pages de détail
+archivées sont ré-extraites avec lxml sur tous les cœurs, sans réseau ni
+navigateur. Les annonces ont la même forme qu'au crawl (une ligne JSONL par
+annonce), avec la date de téléchargement de la page comme date_extraction.
+L'archive est alimentée par SeleniumImmoV2.py et RIP/SeleniumMultiSource.py:
+seules les pages des hôtes de la source choisie (RIP/sourcesConfig.py) sont relues.
+"""
+import argparse
+import os
+import re
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urljoin, urlsplit
+
+from lxml.etree import ParserError
+
+from SeleniumImmoV2 import (
+    CHAMPS_ANNONCE, SELECTEURS_ANNONCE, SELECTEURS_CARACTERISTIQUES, SELECTEURS_COMPLEMENTS,
+    SCRAPING_CONFIG, SOURCES,
+)
+from archiveHTML import dernieres_versions, lire_index, lire_objet
+from donneesStructurees import champs_structures, lire_payloads_html
+from etatCrawl import reference_annonce
+from fetcherHTTP import extraire_champs_html, parser_html
+from sortieJSONL import EcrivainJSONL
+from statsSelecteurs import SOURCE_JSON
+
+# Champs d'une annonce dans le scraper multi-sources (SeleniumMultiSource.scraper_annonce)
+CHAMPS_SOURCES = [
+    'titre', 'prix', 'type_bien', 'surface',
+    'pieces', 'chambres', 'ville', 'code_postal',
+    'description', 'reference', 'dpe', 'ges'
+]
+
+# Archive et sélecteurs de chaque processus du pool, fixés par initialiser()
+_dossier = None
+_profil = None
+
+
+def hote(url):
+    """Hôte sans 'www.', pour comparer les pages archivées aux URLs de la configuration"""
+    netloc = urlsplit(url).netloc.lower()
+    return netloc[4:] if netloc.startswith('www.') else netloc
+
+
+def pages_source(source_key):
+    """Hôtes de la source et (hôte, chemin) de ses pages de liste dans RIP/sourcesConfig.py"""
+    urls = SOURCES[source_key]['urls'].values()
+    return {
+        'hotes': sorted({hote(url) for url in urls}),
+        'pages_liste': sorted({(hote(url), urlsplit(url).path.rstrip('/')) for url in urls}),
+    }
+
+
+def profil_citya():
+    """Sélecteurs de CityaScraper.scraper_annonce (chemin HTTP + lxml)"""
+    return {
+        **pages_source('citya'),
+        'source': None,
+        'champs': {**SELECTEURS_ANNONCE, **SELECTEURS_COMPLEMENTS},
+        'listes': {'caracteristiques': SELECTEURS_CARACTERISTIQUES},
+        'attributs': None,
+        'structure': sorted(CHAMPS_ANNONCE),
+        'donnees_structurees': SCRAPING_CONFIG['donnees_structurees'],
+    }
+
+
+def profil_source(source_key):
+    """Sélecteurs d'une source de RIP/sourcesConfig.py (scraper multi-sources)"""
+    config = SOURCES[source_key]['selectors']['annonce']
+    return {
+        **pages_source(source_key),
+        'source': source_key,
+        'source_name': SOURCES[source_key]['name'],
+        'champs': {champ: config[champ] for champ in CHAMPS_SOURCES if champ in config},
+        'listes': None,
+        'attributs': {'photos': (config['photos'], 'src')} if 'photos' in config else None,
+        'structure': CHAMPS_SOURCES,
+        'donnees_structurees': SOURCES[source_key].get('donnees_structurees', SCRAPING_CONFIG['donnees_structurees']),
+    }
+
+
+def filtrer_photos(sources, url):
+    """
+    Garder les vraies photos (pas les logos ni les icônes), sans doublons (cf. SeleniumMultiSource)
+
+    Les src sont rendus absolus comme le fait img.src dans le navigateur.
+    """
+    sources = (urljoin(url, src) for src in sources if src)
+    return list({
+        src for src in sources
+        if 'http' in src and not any(x in src.lower() for x in ['logo', 'icon', 'avatar', 'placeholder'])
+    })
+
+
+def initialiser(dossier, profil):
+    global _dossier, _profil
+    _dossier = dossier
+    _profil = profil
+
+
+def extraire_page(tache):
+    """
+    Extraire les champs d'une page archivée (exécuté dans un processus du pool)
+
+    Args:
+        tache: (empreinte du HTML, URL de la page pour rendre les photos absolues)
+
+    Returns:
+        (champs, {champ: sélecteur gagnant}), ou None si la page est illisible
+    """
+    empreinte, url = tache
+    try:
+        html = lire_objet(_dossier, empreinte)
+        # Sans URL: réécrire tous les liens coûte autant que l'extraction, seules les photos en ont besoin
+        arbre = parser_html(html)
+    except (OSError, ParserError, ValueError):
+        return None
+
+    structure = {}
+    if _profil['donnees_structurees']:
+        structure = champs_structures(lire_payloads_html(arbre), url, _profil['structure'])
+    resultat = extraire_champs_html(
+        arbre,
+        champs={champ: liste for champ, liste in _profil['champs'].items() if champ not in structure},
+        listes=_profil['listes'],
+        attributs=_profil['attributs'],
+        html=html,
+    )
+
+    champs = dict(resultat['champs'])
+    if resultat['listes'].get('caracteristiques'):
+        champs['caracteristiques'] = resultat['listes']['caracteristiques']
+    photos = filtrer_photos(resultat['attributs'].get('photos', []), url)
+    if photos:
+        champs['photos'] = photos
+        champs['nb_photos'] = len(photos)
+    champs.update(structure)
+    return champs, {**resultat['selecteurs'], **dict.fromkeys(structure, SOURCE_JSON)}
+
+
+def construire_annonce(profil, entree, champs):
+    """Annonce au format du crawl: même clés et même ordre que scraper_annonce"""
+    if profil['source'] is None:
+        data = {'url': entree['url'], 'date_extraction': entree['date'], **champs}
+        # Comme CityaScraper: les champs vides sont retirés
+        return {k: v for k, v in data.items() if v}
+    return {
+        'source': profil['source'],
+        'source_name': profil['source_name'],
+        'url': entree['url'],
+        'date_extraction': entree['date'],
+        **champs,
+    }
+
+
+def est_page_annonce(profil, url):
+    """Page de détail: référence Citya dans l'URL, ou pour une autre source toute page qui n'est pas une liste"""
+    if profil['source'] is None:
+        return bool(reference_annonce(url))
+    return (hote(url), urlsplit(url).path.rstrip('/')) not in profil['pages_liste']
+
+
+def selectionner_pages(dossier, profil, motif=None, depuis=None, toutes_versions=False):
+    """
+    Pages de détail archivées des hôtes de la source du profil, regroupées par contenu
+
+    Returns:
+        {empreinte: [entrées de l'index]}: une page identique n'est parsée qu'une fois
+    """
+    if toutes_versions:
+        entrees = [e for e in lire_index(dossier) if depuis is None or e['date'] >= depuis]
+    else:
+        entrees = list(dernieres_versions(dossier, depuis).values())
+
+    regex = re.compile(motif) if motif else None
+    # L'archive est partagée par tous les scrapers: les pages des autres sources sont ignorées
+    hotes = set(profil['hotes'])
+    groupes = {}
+    for entree in entrees:
+        if entree.get('statut', 200) != 200 or hote(entree['url']) not in hotes:
+            continue
+        if not (regex.search(entree['url']) if regex else est_page_annonce(profil, entree['url'])):
+            continue
+        groupes.setdefault(entree['hash'], []).append(entree)
+    return groupes
+
+
+def reextraire(dossier, sortie, profil, groupes, nb_processus=None, taille_lot=64):
+    """
+    Ré-extraire les pages sur un pool de processus et écrire les annonces au fil de l'eau
+
+    Returns:
+        Statistiques du run (pages, annonces, illisibles, champs trouvés, durée)
+    """
+    debut = time.monotonic()
+    taches = [(empreinte, entrees[0]['url']) for empreinte, entrees in groupes.items()]
+    trouves = Counter()
+    stats = {'pages': len(taches), 'annonces': 0, 'illisibles': 0}
+
+    with ProcessPoolExecutor(max_workers=nb_processus, initializer=initialiser, initargs=(dossier, profil)) as pool:
+        # Résultats dans l'ordre des tâches, envoyés aux processus par lots
+        for (empreinte, _), resultat in zip(taches, pool.map(extraire_page, taches, chunksize=taille_lot)):
+            if resultat is None:
+                stats['illisibles'] += 1
+                continue
+            champs, gagnants = resultat
+            trouves.update(gagnants.keys())
+            for entree in groupes[empreinte]:
+                sortie.ecrire(construire_annonce(profil, entree, champs))
+                stats['annonces'] += 1
+
+    stats['duree'] = time.monotonic() - debut
+    stats['champs'] = {champ: trouves[champ] for champ in profil['champs']}
+    return stats
+
+
+def afficher_stats(stats):
+    extraites = stats['pages'] - stats['illisibles']
+    debit = stats['pages'] / stats['duree'] * 60 if stats['duree'] else 0
+    print(f"\n📊 {stats['pages']} pages distinctes ré-extraites en {stats['duree']:.1f}s ({debit:.0f} pages/min), "
+          f"{stats['annonces']} annonces, {stats['illisibles']} illisibles")
+    if not extraites:
+        return
+    print("   Champs trouvés:")
+    for champ, nombre in stats['champs'].items():
+        print(f"   - {champ:<20} {nombre / extraites:>6.1%}")
+
+
+if __name__ == '__main__':
+    dossier_script = os.path.dirname(os.path.abspath(__file__))
+
+    parser = argparse.ArgumentParser(description="Ré-extraire les annonces depuis l'archive HTML, sans réseau")
+    parser.add_argument(
+        '--archive',
+        default=os.path.join(dossier_script, 'archive_html'),
+        help="Dossier de l'archive (défaut: archive_html/)"
+    )
+    parser.add_argument(
+        '--source',
+        choices=sorted(SOURCES),
+        help="Sélecteurs de RIP/sourcesConfig.py pour cette source (défaut: ceux de CityaScraper)"
+    )
+    parser.add_argument('--output', help='Fichier JSONL des annonces (défaut: <source>_reextraction.jsonl)')
+    parser.add_argument(
+        '--motif',
+        help="Regex des URLs de détail parmi les pages de la source "
+             "(défaut: référence Citya dans l'URL, ou avec --source toute page hors pages de liste)"
+    )
+    parser.add_argument('--depuis', help='Seulement les pages téléchargées depuis cette date (ISO, ex: 2026-01-01)')
+    parser.add_argument(
+        '--toutes-versions',
+        action='store_true',
+        help="Une annonce par version archivée de chaque page (historique) au lieu de la dernière"
+    )
+    parser.add_argument('--processus', type=int, help='Nombre de processus (défaut: un par cœur)')
+    args = parser.parse_args()
+
+    profil = profil_source(args.source) if args.source else profil_citya()
+    groupes = selectionner_pages(args.archive, profil, args.motif, args.depuis, args.toutes_versions)
+    if not groupes:
+        raise SystemExit(f"❌ Aucune page de détail de {', '.join(profil['hotes'])} dans l'archive '{args.archive}'")
+
+    chemin = args.output or os.path.join(dossier_script, f"{args.source or 'citya'}_reextraction.jsonl")
+    # fsync par gros lots: la sortie se régénère en relançant la commande
+    sortie = EcrivainJSONL(chemin, taille_lot=1000)
+    try:
+        stats = reextraire(args.archive, sortie, profil, groupes, args.processus)
+    finally:
+        sortie.fermer()
+
+    afficher_stats(stats)
+    print(f"\n💾 {sortie.nb_ecrites} annonces écrites dans '{chemin}'")
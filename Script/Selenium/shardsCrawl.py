@@ -0,0 +1,132 @@
+import argparse
+import hashlib
+import json
+import os
+
+from etatCrawl import cle_annonce
+from sortieJSONL import lire_jsonl
+
+# Découpage d'un crawl entre plusieurs machines sans coordination: chaque nœud
+# parcourt les pages de liste mais ne visite que les annonces dont la clé stable
+# (référence ou URL canonique) tombe dans son shard.
+
+
+def numero_shard(url, nb_shards):
+    """Shard d'une annonce, identique sur toutes les machines et d'un run à l'autre"""
+    empreinte = hashlib.sha1(cle_annonce(url).encode('utf-8')).hexdigest()
+    return int(empreinte[:16], 16) % nb_shards
+
+
+class Shard:
+    """Part i (de 0 à N-1) d'un crawl découpé en N"""
+
+    def __init__(self, index, total):
+        if total < 1 or not 0 <= index < total:
+            raise ValueError(f"shard invalide: {index}/{total} (attendu i/N avec 0 <= i < N)")
+        self.index = index
+        self.total = total
+
+    @classmethod
+    def depuis_texte(cls, texte):
+        """Shard depuis l'argument --shard 'i/N'"""
+        try:
+            index, total = (int(partie) for partie in texte.split('/'))
+        except ValueError:
+            raise ValueError(f"shard invalide: '{texte}' (attendu i/N, ex: 0/4)")
+        return cls(index, total)
+
+    def contient(self, url):
+        return numero_shard(url, self.total) == self.index
+
+    def filtrer(self, urls):
+        """URLs de ce shard, dans le même ordre"""
+        return [url for url in urls if self.contient(url)]
+
+    @property
+    def suffixe(self):
+        """Suffixe des fichiers du shard (citya_shard0-4_annonces.jsonl)"""
+        return f"shard{self.index}-{self.total}"
+
+    def __str__(self):
+        return f"{self.index}/{self.total}"
+
+
+def argument_shard(texte):
+    """Type argparse de --shard"""
+    try:
+        return Shard.depuis_texte(texte)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def date_annonce(annonce):
+    return annonce.get('date_extraction') or ''
+
+
+def fusionner_annonces(listes):
+    """Annonces de tous les shards, une seule par clé (la plus récente), dans l'ordre de lecture"""
+    annonces = {}
+    for liste in listes:
+        for annonce in liste:
+            cle = cle_annonce(annonce['url']) if annonce.get('url') else id(annonce)
+            if cle not in annonces or date_annonce(annonce) >= date_annonce(annonces[cle]):
+                annonces[cle] = annonce
+    return list(annonces.values())
+
+
+def fusionner_jsonl(chemins, sortie):
+    """Fusionner les flux JSONL des shards en un seul fichier (celui que lit cleanerImmo)"""
+    annonces = fusionner_annonces(lire_jsonl(chemin) for chemin in chemins)
+    temporaire = sortie + '.tmp'
+    with open(temporaire, 'w', encoding='utf-8') as f:
+        for annonce in annonces:
+            f.write(json.dumps(annonce, ensure_ascii=False) + '\n')
+    os.replace(temporaire, sortie)
+    return len(annonces)
+
+
+def fusionner_json(chemins, sortie):
+    """Fusionner les exports JSON du scraper multi-sources (métadonnées + annonces)"""
+    exports = []
+    for chemin in chemins:
+        with open(chemin, 'r', encoding='utf-8') as f:
+            exports.append(json.load(f))
+    annonces = fusionner_annonces(export['annonces'] for export in exports)
+
+    statistiques = {}
+    for export in exports:
+        for source, compteurs in export['metadata'].get('statistiques', {}).items():
+            cumul = statistiques.setdefault(source, {})
+            for nom, valeur in compteurs.items():
+                cumul[nom] = cumul.get(nom, 0) + valeur
+
+    data_export = {
+        'metadata': {
+            'date_scraping': max(export['metadata']['date_scraping'] for export in exports),
+            'nombre_annonces': len(annonces),
+            'sources': sorted({s for export in exports for s in export['metadata'].get('sources', [])}),
+            'statistiques': statistiques,
+            'shards': [export['metadata'].get('shard') for export in exports],
+        },
+        'annonces': annonces,
+    }
+    temporaire = sortie + '.tmp'
+    with open(temporaire, 'w', encoding='utf-8') as f:
+        json.dump(data_export, f, ensure_ascii=False, indent=2)
+    os.replace(temporaire, sortie)
+    return len(annonces)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Fusionner les sorties des shards d\'un crawl')
+    parser.add_argument('fichiers', nargs='+', help='Sorties des shards (.jsonl de SeleniumImmoV2, .json du multi-sources)')
+    parser.add_argument(
+        '--output',
+        required=True,
+        help='Fichier fusionné (ex: Script/Selenium/citya_annonces.jsonl, lu par cleanerImmo.py)'
+    )
+    args = parser.parse_args()
+
+    fusionner = fusionner_jsonl if args.output.endswith('.jsonl') else fusionner_json
+    nombre = fusionner(args.fichiers, args.output)
+    print(f"🧩 {len(args.fichiers)} shards fusionnés: {nombre} annonces dans '{args.output}'")
@@ -0,0 +1,106 @@
+import json
+import os
+import threading
+
+
+class EcrivainJSONL:
+    """Écrire chaque annonce dès son extraction, une ligne JSON par annonce"""
+
+    def __init__(self, chemin, taille_lot=10, reprise=False):
+        """
+        Args:
+            chemin: Fichier .jsonl de sortie
+            taille_lot: Nombre d'annonces entre deux fsync
+            reprise: Ajouter à la fin du fichier existant au lieu de l'écraser
+        """
+        self.chemin = chemin
+        self.taille_lot = taille_lot
+        self.nb_ecrites = 0
+        self._en_attente = 0
+        self._verrou = threading.RLock()
+
+        if reprise:
+            tronquer_ligne_incomplete(chemin)
+        self._fichier = open(chemin, 'a' if reprise else 'w', encoding='utf-8')
+
+    def ecrire(self, data):
+        """
+        Ajouter une annonce au fichier
+
+        Returns:
+            True si le lot a été synchronisé sur disque
+        """
+        with self._verrou:
+            self._fichier.write(json.dumps(data, ensure_ascii=False) + '\n')
+            self.nb_ecrites += 1
+            self._en_attente += 1
+            if self._en_attente >= self.taille_lot:
+                self.synchroniser()
+                return True
+        return False
+
+    def synchroniser(self):
+        """Forcer l'écriture sur disque des annonces en attente"""
+        with self._verrou:
+            if not self._en_attente:
+                return
+            self._fichier.flush()
+            os.fsync(self._fichier.fileno())
+            self._en_attente = 0
+
+    def fermer(self):
+        with self._verrou:
+            if not self._fichier.closed:
+                self.synchroniser()
+                self._fichier.close()
+
+
+def tronquer_ligne_incomplete(chemin):
+    """Supprimer une dernière ligne coupée par un crash avant de reprendre l'écriture"""
+    if not os.path.exists(chemin):
+        return
+    with open(chemin, 'rb+') as f:
+        contenu = f.read()
+        if contenu and not contenu.endswith(b'\n'):
+            f.truncate(contenu.rfind(b'\n') + 1)
+
+
+def lire_jsonl(chemin):
+    """Lire un fichier JSONL annonce par annonce (une ligne incomplète en fin de fichier est ignorée)"""
+    with open(chemin, 'r', encoding='utf-8') as f:
+        for ligne in f:
+            ligne = ligne.strip()
+            if not ligne:
+                continue
+            try:
+                yield json.loads(ligne)
+            except json.JSONDecodeError:
+                continue
+
+
+class Checkpoint:
+    """Point de reprise du crawl: section en cours, position dans la pagination et URLs restantes"""
+
+    def __init__(self, chemin):
+        self.chemin = chemin
+
+    def sauvegarder(self, etat):
+        """Écrire le point de reprise de façon atomique"""
+        temporaire = self.chemin + '.tmp'
+        with open(temporaire, 'w', encoding='utf-8') as f:
+            json.dump(etat, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporaire, self.chemin)
+
+    def charger(self):
+        """Lire le point de reprise (None s'il n'existe pas)"""
+        try:
+            with open(self.chemin, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def supprimer(self):
+        if os.path.exists(self.chemin):
+            os.remove(self.chemin)
@@ -0,0 +1,118 @@
+import json
+import os
+import threading
+from datetime import datetime
+
+# Pseudo-sélecteur des champs trouvés dans le JSON-LD / l'état d'hydratation
+SOURCE_JSON = 'donnees_structurees'
+
+
+class StatsSelecteurs:
+    """
+    Sélecteur gagnant de chaque champ, par source, conservé entre les runs
+
+    Sert à essayer d'abord le sélecteur qui fonctionne le plus souvent, et à
+    repérer les champs dont le taux de remplissage chute (sélecteurs cassés).
+    """
+
+    def __init__(self, chemin, taille_historique=10):
+        """
+        Args:
+            chemin: Fichier JSON des statistiques (créé s'il n'existe pas)
+            taille_historique: Nombre de runs dont le taux de remplissage est conservé
+        """
+        self.chemin = chemin
+        self.taille_historique = taille_historique
+        self._verrou = threading.Lock()
+        self.stats = {}
+        if os.path.exists(chemin):
+            try:
+                with open(chemin, 'r', encoding='utf-8') as f:
+                    self.stats = json.load(f)
+                self.stats.pop('_mis_a_jour', None)
+            except (OSError, json.JSONDecodeError):
+                self.stats = {}
+        # Compteurs du run en cours: {(source, champ): [pages, remplis]}
+        self.run = {}
+
+    def _champ(self, source, champ):
+        return self.stats.setdefault(source, {}).setdefault(
+            champ, {'pages': 0, 'remplis': 0, 'selecteurs': {}, 'historique': []}
+        )
+
+    def enregistrer(self, source, champ, selecteur=None):
+        """Enregistrer une tentative d'extraction d'un champ (selecteur=None si le champ est resté vide)"""
+        with self._verrou:
+            stats = self._champ(source, champ)
+            stats['pages'] += 1
+            compteur = self.run.setdefault((source, champ), [0, 0])
+            compteur[0] += 1
+            if selecteur:
+                stats['remplis'] += 1
+                stats['selecteurs'][selecteur] = stats['selecteurs'].get(selecteur, 0) + 1
+                compteur[1] += 1
+
+    def ordonner(self, source, champ, selecteurs):
+        """Sélecteurs triés du plus au moins souvent gagnant (ordre d'origine à égalité)"""
+        with self._verrou:
+            succes = self.stats.get(source, {}).get(champ, {}).get('selecteurs', {})
+            if not succes:
+                return list(selecteurs)
+            return sorted(selecteurs, key=lambda selecteur: -succes.get(selecteur, 0))
+
+    def ordonner_tous(self, source, selecteurs_par_champ):
+        """ordonner() appliqué à un dictionnaire {champ: [sélecteurs]}"""
+        return {champ: self.ordonner(source, champ, selecteurs) for champ, selecteurs in selecteurs_par_champ.items()}
+
+    def rapport(self, seuil_chute=0.2, min_pages=5):
+        """
+        Taux de remplissage par (source, champ)
+
+        Un champ est signalé quand son taux sur ce run est inférieur d'au moins
+        `seuil_chute` à sa moyenne sur les runs précédents.
+        """
+        lignes = []
+        with self._verrou:
+            for (source, champ), (pages, remplis) in sorted(self.run.items()):
+                stats = self.stats[source][champ]
+                taux = remplis / pages if pages else 0.0
+                historique = stats['historique']
+                moyenne = sum(historique) / len(historique) if historique else None
+                meilleur = max(stats['selecteurs'].items(), key=lambda item: item[1])[0] if stats['selecteurs'] else None
+                lignes.append({
+                    'source': source,
+                    'champ': champ,
+                    'pages': pages,
+                    'taux_remplissage': round(taux, 3),
+                    'moyenne_precedente': round(moyenne, 3) if moyenne is not None else None,
+                    'meilleur_selecteur': meilleur,
+                    'chute': moyenne is not None and pages >= min_pages and moyenne - taux >= seuil_chute,
+                })
+        return lignes
+
+    def afficher_rapport(self, seuil_chute=0.2):
+        lignes = self.rapport(seuil_chute)
+        if not lignes:
+            return
+        print("\n🎯 Taux de remplissage des champs (run actuel / runs précédents)")
+        for ligne in lignes:
+            precedent = f"{ligne['moyenne_precedente'] * 100:.0f}%" if ligne['moyenne_precedente'] is not None else '-'
+            alerte = '  ⚠️ CHUTE' if ligne['chute'] else ''
+            print(f"   {ligne['source']:<10} {ligne['champ']:<20} {ligne['taux_remplissage'] * 100:>4.0f}% "
+                  f"/ {precedent:>4}  {ligne['meilleur_selecteur'] or ''}{alerte}")
+
+    def sauvegarder(self):
+        """Ajouter le taux du run à l'historique et écrire le fichier de façon atomique"""
+        with self._verrou:
+            for (source, champ), (pages, remplis) in self.run.items():
+                if pages:
+                    historique = self.stats[source][champ]['historique']
+                    historique.append(round(remplis / pages, 3))
+                    del historique[:-self.taille_historique]
+            self.stats['_mis_a_jour'] = datetime.now().isoformat()
+            temporaire = self.chemin + '.tmp'
+            with open(temporaire, 'w', encoding='utf-8') as f:
+                json.dump(self.stats, f, ensure_ascii=False, indent=2)
+            os.replace(temporaire, self.chemin)
+            self.stats.pop('_mis_a_jour')
+            self.run = {}
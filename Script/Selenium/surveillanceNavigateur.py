@@ -0,0 +1,157 @@
+import os
+import threading
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+MO = 1024 * 1024
+
+# Mémoire d'un Chrome headless après quelques centaines de pages, et marge
+# laissée au système et au processus Python
+MEMOIRE_PAR_NAVIGATEUR = 500 * MO
+MEMOIRE_RESERVEE = 1024 * MO
+
+# Champs acceptés par Network.setCookies (getAllCookies en renvoie d'autres)
+CHAMPS_COOKIE = ('name', 'value', 'domain', 'path', 'secure', 'httpOnly', 'sameSite', 'expires')
+
+
+def memoire_navigateur(driver):
+    """
+    Mémoire résidente (octets) de chromedriver et de tous les processus Chrome lancés
+
+    Returns:
+        Le total, ou None sans psutil ou si le processus est introuvable
+    """
+    if psutil is None:
+        return None
+    try:
+        parent = psutil.Process(driver.service.process.pid)
+        processus = [parent] + parent.children(recursive=True)
+    except (AttributeError, psutil.Error):
+        return None
+    total = 0
+    for p in processus:
+        try:
+            total += p.memory_info().rss
+        except psutil.Error:
+            continue
+    return total
+
+
+def memoire_disponible():
+    """Mémoire vive disponible (octets), None si inconnue"""
+    if psutil is not None:
+        return psutil.virtual_memory().available
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def nb_navigateurs_auto(max_navigateurs, memoire_par_navigateur=MEMOIRE_PAR_NAVIGATEUR, reserve=MEMOIRE_RESERVEE):
+    """Nombre de navigateurs à lancer en parallèle d'après la mémoire disponible (entre 1 et max_navigateurs)"""
+    disponible = memoire_disponible()
+    if disponible is None:
+        return max_navigateurs
+    nombre = max(1, min(max_navigateurs, int((disponible - reserve) // memoire_par_navigateur)))
+    if nombre < max_navigateurs:
+        print(f"🧠 {disponible / MO:.0f} Mo disponibles: {nombre} navigateurs au lieu de {max_navigateurs}")
+    return nombre
+
+
+def lire_cookies(driver):
+    """Tous les cookies du navigateur, tous domaines confondus"""
+    cookies = driver.execute_cdp_cmd('Network.getAllCookies', {}).get('cookies', [])
+    return [
+        {cle: cookie[cle] for cle in CHAMPS_COOKIE if cle in cookie and not (cle == 'expires' and cookie.get('session'))}
+        for cookie in cookies
+    ]
+
+
+class SurveillanceNavigateur:
+    """
+    Recycler un navigateur quand il a chargé trop de pages ou occupe trop de mémoire
+
+    La mémoire d'un Chrome headless grossit au fil des pages jusqu'à le ralentir
+    ou le faire planter; le navigateur est alors remplacé par un neuf qui reprend
+    ses cookies. La frontière du crawl est gardée par le scraper, pas par le driver.
+    """
+
+    def __init__(self, max_pages=200, max_memoire_mo=1500, controle_toutes=10, metriques=None):
+        """
+        Args:
+            max_pages: Pages chargées avant recyclage (None = pas de limite)
+            max_memoire_mo: Mémoire (Mo) au-delà de laquelle le navigateur est recyclé (None = pas de limite)
+            controle_toutes: Mesurer la mémoire toutes les N pages (mesure coûteuse)
+            metriques: MetriquesCrawl où compter les recyclages
+        """
+        self.max_pages = max_pages
+        self.max_memoire_mo = max_memoire_mo
+        self.controle_toutes = controle_toutes
+        self.metriques = metriques
+        self.pages = {}
+        self.nb_recyclages = 0
+        self.memoire_max_mo = 0.0
+        self._verrou = threading.Lock()
+
+    def compter(self, driver):
+        """
+        Compter une page de plus pour ce navigateur
+
+        Returns:
+            La raison du recyclage, ou None si le navigateur peut continuer
+        """
+        with self._verrou:
+            pages = self.pages.get(id(driver), 0) + 1
+            self.pages[id(driver)] = pages
+        if self.max_pages and pages >= self.max_pages:
+            return f"{pages} pages"
+        if self.max_memoire_mo and pages % self.controle_toutes == 0:
+            memoire = memoire_navigateur(driver)
+            if memoire is not None:
+                memoire_mo = memoire / MO
+                with self._verrou:
+                    self.memoire_max_mo = max(self.memoire_max_mo, memoire_mo)
+                if self.metriques:
+                    self.metriques.definir('navigateur_memoire_max_mo', round(self.memoire_max_mo, 1))
+                if memoire_mo >= self.max_memoire_mo:
+                    return f"{memoire_mo:.0f} Mo"
+        return None
+
+    def recycler(self, driver, fabrique_driver, raison=''):
+        """Fermer le navigateur et en lancer un neuf avec les mêmes cookies"""
+        try:
+            cookies = lire_cookies(driver)
+        except Exception:
+            cookies = []
+        with self._verrou:
+            self.pages.pop(id(driver), None)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+        # Le profil persistant libéré par quit() est repris par le nouveau navigateur
+        nouveau = fabrique_driver()
+        if cookies:
+            try:
+                nouveau.execute_cdp_cmd('Network.setCookies', {'cookies': cookies})
+            except Exception as e:
+                print(f"⚠️  Cookies non transférés au nouveau navigateur: {e}")
+
+        with self._verrou:
+            self.nb_recyclages += 1
+            nb_recyclages = self.nb_recyclages
+        if self.metriques:
+            self.metriques.definir('navigateurs_recycles', nb_recyclages)
+        print(f"♻️  Navigateur recyclé ({raison}, {len(cookies)} cookies conservés)")
+        return nouveau
+
+    def verifier(self, driver, fabrique_driver):
+        """Compter une page et renvoyer le navigateur à utiliser ensuite (le même ou un neuf)"""
+        raison = self.compter(driver)
+        if raison is None:
+            return driver
+        return self.recycler(driver, fabrique_driver, raison)
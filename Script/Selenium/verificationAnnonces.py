@@ -0,0 +1,196 @@
+"""
+Vérification de la disponibilité des annonces connues, sans navigateur
+
+    python Script/Selenium/verificationAnnonces.py
+    python Script/Selenium/verificationAnnonces.py --etat citya_shard0-4_etat.sqlite --limite 5000
+
+Chaque annonce encore considérée en ligne dans l'état du crawl reçoit une requête
+HEAD (GET sans lire le corps si le serveur refuse HEAD), sans suivre les
+redirections. 404/410: annonce retirée; redirection vers une autre page: annonce
+redirigée (vendue, remplacée par une recherche...). Les résultats sont écrits dans
+l'état, que cleanerImmo.py utilise pour écarter ces annonces.
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urljoin, urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Configuration partagée avec les scrapers
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from RIP.sourcesConfig import SCRAPING_CONFIG
+
+from controleurAIMD import ControleurAIMD, est_congestion
+from etatCrawl import EtatCrawl, EN_LIGNE, RETIREE, REDIRIGEE, cle_annonce, url_canonique
+
+STATUTS_RETIREE = (404, 410)
+# Serveurs ou CDN qui refusent HEAD: la page est redemandée en GET
+STATUTS_HEAD_REFUSE = (403, 405, 501)
+
+
+def meme_annonce(url, cible):
+    """Une redirection vers la même annonce (même référence, ou même URL au schéma près) n'est pas un retrait"""
+    return (cle_annonce(url) == cle_annonce(cible)
+            or url_canonique(url).partition('://')[2] == url_canonique(cible).partition('://')[2])
+
+
+class VerificateurAnnonces:
+    """Requêtes HEAD concurrentes, un pool de connexions keep-alive et une limite par hôte"""
+
+    def __init__(self, user_agent, nb_workers=32, par_hote=8, timeout=10, max_redirections=3):
+        """
+        Args:
+            nb_workers: Requêtes en cours au total
+            par_hote: Requêtes simultanées max vers un même hôte (réduites sur 429/5xx/timeout)
+            max_redirections: Redirections suivies tant qu'elles mènent à la même annonce
+                (http -> https, slash final, paramètres de suivi)
+        """
+        self.nb_workers = nb_workers
+        self.timeout = timeout
+        self.max_redirections = max_redirections
+        self.controleur = ControleurAIMD(
+            concurrence_initiale=par_hote, concurrence_max=par_hote, delai_initial=0, delai_min=0
+        )
+        self.session = requests.Session()
+        adaptateur = HTTPAdapter(pool_connections=nb_workers, pool_maxsize=nb_workers)
+        self.session.mount('http://', adaptateur)
+        self.session.mount('https://', adaptateur)
+        self.session.headers.update({'User-Agent': user_agent, 'Accept-Language': 'fr-FR,fr;q=0.9'})
+
+        self.compteurs = {EN_LIGNE: 0, RETIREE: 0, REDIRIGEE: 0, 'indeterminees': 0}
+        self._verrou = threading.Lock()
+
+    def requete(self, methode, url):
+        """
+        Une requête sans redirection ni lecture du corps, dans la limite de l'hôte
+
+        Returns:
+            La réponse (à fermer), ou None en cas d'erreur réseau
+        """
+        domaine = urlparse(url).netloc
+        with self.controleur.creneau(domaine):
+            debut = time.monotonic()
+            try:
+                reponse = self.session.request(
+                    methode, url, allow_redirects=False, stream=True, timeout=self.timeout
+                )
+            except requests.RequestException as e:
+                self.controleur.signaler(domaine, time.monotonic() - debut, congestion=isinstance(e, requests.Timeout))
+                return None
+            self.controleur.signaler(domaine, time.monotonic() - debut, congestion=est_congestion(reponse.status_code))
+        return reponse
+
+    def statut(self, url):
+        """Statut HTTP et cible de redirection de l'URL ((None, None) si la requête échoue)"""
+        reponse = self.requete('HEAD', url)
+        if reponse is not None and reponse.status_code in STATUTS_HEAD_REFUSE:
+            reponse.close()
+            reponse = self.requete('GET', url)
+        if reponse is None:
+            return None, None
+        with reponse:
+            cible = urljoin(url, reponse.headers['Location']) if reponse.is_redirect else None
+            return reponse.status_code, cible
+
+    def verifier(self, url):
+        """
+        Returns:
+            (url, disponibilité ou None si indéterminée (429, 5xx, erreur réseau), URL de redirection)
+        """
+        courante = url
+        for _ in range(self.max_redirections + 1):
+            statut, cible = self.statut(courante)
+            if statut in STATUTS_RETIREE:
+                return url, RETIREE, None
+            if cible:
+                if not meme_annonce(url, cible):
+                    return url, REDIRIGEE, cible
+                courante = cible
+                continue
+            return url, EN_LIGNE if statut == 200 else None, None
+        # Boucle de redirections vers la même annonce
+        return url, None, None
+
+    def compter(self, disponibilite):
+        with self._verrou:
+            self.compteurs[disponibilite or 'indeterminees'] += 1
+
+    def verifier_tout(self, urls, etat, taille_lot=500):
+        """Vérifier toutes les URLs et écrire les résultats dans l'état par lots"""
+        lot = []
+        executeur = ThreadPoolExecutor(max_workers=self.nb_workers)
+        try:
+            futures = [executeur.submit(self.verifier, url) for url in urls]
+            for numero, future in enumerate(as_completed(futures), 1):
+                url, disponibilite, redirection = future.result()
+                self.compter(disponibilite)
+                # Une annonce indéterminée sera revérifiée en premier au prochain passage
+                if disponibilite:
+                    lot.append((url, disponibilite, redirection))
+                if len(lot) >= taille_lot:
+                    etat.enregistrer_disponibilites(lot)
+                    lot = []
+                if numero % 1000 == 0:
+                    print(f"   … {numero}/{len(urls)} annonces vérifiées")
+        finally:
+            # Sur interruption, les requêtes pas encore parties sont annulées et le lot en cours gardé
+            executeur.shutdown(wait=False, cancel_futures=True)
+            if lot:
+                etat.enregistrer_disponibilites(lot)
+        return self.compteurs
+
+    def afficher(self, duree):
+        total = sum(self.compteurs.values())
+        debit = total / duree if duree else 0
+        print(f"\n🔎 {total} annonces vérifiées en {duree:.0f}s ({debit:.0f}/s):")
+        print(f"   - En ligne: {self.compteurs[EN_LIGNE]}")
+        print(f"   - Retirées (404/410): {self.compteurs[RETIREE]}")
+        print(f"   - Redirigées: {self.compteurs[REDIRIGEE]}")
+        print(f"   - Indéterminées (erreur, 429, 5xx): {self.compteurs['indeterminees']}")
+        self.controleur.afficher()
+
+    def fermer(self):
+        self.session.close()
+
+
+if __name__ == '__main__':
+    dossier = os.path.dirname(os.path.abspath(__file__))
+    config = SCRAPING_CONFIG['verification']
+
+    parser = argparse.ArgumentParser(description='Marquer les annonces retirées ou redirigées dans l\'état du crawl')
+    parser.add_argument(
+        '--etat',
+        default=os.path.join(dossier, 'citya_etat.sqlite'),
+        help='État du crawl à vérifier (défaut: citya_etat.sqlite)'
+    )
+    parser.add_argument('--limite', type=int, help='Nombre max d\'annonces, les moins récemment vérifiées d\'abord')
+    parser.add_argument('--workers', type=int, default=config['workers'], help='Requêtes simultanées au total')
+    parser.add_argument('--par-hote', type=int, default=config['par_hote'], help='Requêtes simultanées par hôte')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.etat):
+        raise SystemExit(f"❌ État du crawl introuvable: '{args.etat}'")
+
+    etat = EtatCrawl(args.etat)
+    verificateur = VerificateurAnnonces(
+        SCRAPING_CONFIG['user_agent'],
+        nb_workers=args.workers,
+        par_hote=args.par_hote,
+        timeout=config['timeout']
+    )
+    try:
+        urls = etat.urls_a_verifier(args.limite)
+        print(f"🔎 {len(urls)} annonces à vérifier ({args.workers} requêtes simultanées, {args.par_hote} par hôte)")
+        debut = time.monotonic()
+        verificateur.verifier_tout(urls, etat)
+        verificateur.afficher(time.monotonic() - debut)
+    except KeyboardInterrupt:
+        print("\n⚠️  Interruption: les lots déjà vérifiés sont enregistrés")
+    finally:
+        verificateur.fermer()
+        etat.fermer()
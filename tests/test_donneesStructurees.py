@@ -0,0 +1,48 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Script', 'Selenium'))
+from donneesStructurees import champs_json_ld
+
+URL = 'https://www.citya.com/annonces/vente/appartement/lyon-69003/TAPP123'
+URL_SIMILAIRE = 'https://www.citya.com/annonces/vente/appartement/lyon-69003/TAPP999'
+
+
+def test_offre_imbriquee_sans_url():
+    objets = [{
+        '@type': 'Apartment', 'name': 'T3', 'floorSize': {'value': 65},
+        'offers': {'@type': 'Offer', 'price': 250000},
+    }]
+    assert champs_json_ld(objets, URL) == {'titre': 'T3', 'prix': '250000 €', 'surface': '65 m²'}
+
+
+def test_offre_imbriquee_avec_la_meme_url():
+    objets = [{
+        '@type': 'Apartment', 'name': 'T3', 'url': URL,
+        'offers': {'@type': 'Offer', 'price': 250000, 'url': URL},
+    }]
+    assert champs_json_ld(objets, URL) == {'titre': 'T3', 'prix': '250000 €'}
+
+
+def test_real_estate_listing_et_offre_avec_url():
+    objets = [{
+        '@type': 'RealEstateListing', 'name': 'T3', 'url': URL,
+        'offers': {'@type': 'Offer', 'price': 1200, 'url': URL},
+    }]
+    assert champs_json_ld(objets, URL) == {'titre': 'T3', 'prix': '1200 €'}
+
+
+def test_annonce_de_la_page_par_l_url_de_son_offre():
+    objets = [{'@graph': [
+        {'@type': 'Apartment', 'name': 'Annonce', 'offers': {'@type': 'Offer', 'price': 1, 'url': URL}},
+        {'@type': 'Apartment', 'name': 'Similaire', 'offers': {'@type': 'Offer', 'price': 2, 'url': URL_SIMILAIRE}},
+    ]}]
+    assert champs_json_ld(objets, URL) == {'titre': 'Annonce', 'prix': '1 €'}
+
+
+def test_bien_d_une_offre():
+    objets = [{
+        '@type': 'Offer', 'price': 300000, 'url': URL,
+        'itemOffered': {'@type': 'House', 'name': 'Maison', 'numberOfRooms': 4},
+    }]
+    assert champs_json_ld(objets, URL) == {'titre': 'Maison', 'prix': '300000 €', 'pieces': '4 pièces'}